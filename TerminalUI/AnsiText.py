@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import re
+import urwid
+from urwid.util import calc_width
+
+
+### CONSTANTS ###
+# CSI sequences (SGR when the final byte is 'm' and there are no intermediate bytes), OSC strings and other escapes, e.g. ESC = or ESC ( B
+_ESCAPE = re.compile(r'\x1b(?:\[([0-?]*)([ -/]*)([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)?|[ -/]*[0-~]?)')
+# the parameters of an SGR sequence, anything else (e.g. the private parameter bytes <=>?) is not SGR
+_SGR_PARAMETERS = re.compile(r'[\d;:]*')
+
+_BASIC_COLOURS = ('black', 'dark red', 'dark green', 'brown', 'dark blue', 'dark magenta', 'dark cyan', 'light gray',
+                  'dark gray', 'light red', 'light green', 'yellow', 'light blue', 'light magenta', 'light cyan', 'white')
+
+# SGR parameter to (state index, value) for the settings that are a single parameter
+_SGR_SETTINGS = {1: (2, True), 22: (2, False), 3: (3, True), 23: (3, False), 4: (4, True), 24: (4, False),
+                 5: (5, True), 25: (5, False), 7: (6, True), 27: (6, False), 9: (7, True), 29: (7, False)}
+_SETTING_NAMES = ('bold', 'italics', 'underline', 'blink', 'standout', 'strikethrough')
+_DEFAULT_STATE = ('default', 'default', False, False, False, False, False, False)
+
+
+### ANSI LINES ###
+class AnsiLines():
+    """Converts received lines to the text, urwid display attributes and display width shown in the receive textbox, see TerminalUI._update_receive_text.
+
+    ANSI SGR escape sequences (colours, bold, underline and so on) are parsed into urwid AttrSpec display attributes, and other escape sequences, which would move the cursor or otherwise corrupt the screen, are removed. Each line starts with the default attributes. Lines that are pure ASCII without an escape take a fast path, their text is the line and their width is its length. The result for every other line is cached, and the cache only holds the lines shown by the last call to lines, so a line is parsed and measured once however many frames it is shown for.
+    """
+
+    def __init__(self):
+        self._cache = {}        # line to (text, attributes, width) for the lines last shown that are not plain ASCII
+        self._specs = {}        # SGR state to AttrSpec, shared by every line using the state
+
+    def lines(self, lines : list) -> tuple:
+        """Returns the text, display attributes and line widths to show a list of lines.
+
+        Args:
+            lines (list): the received lines, oldest first
+
+        Returns:
+            tuple: the (text, attributes, widths) of the lines, where text is the lines joined by new lines, attributes is the run length encoded urwid display attributes of the text, empty if no line has attributes, and widths is the display width of each line
+        """
+        cache = self._cache
+        shown = {}
+        texts = []
+        attributes = []
+        widths = []
+        styled = False
+        for line in lines:
+            if texts:
+                _append_run(attributes, None, 1)
+            if '\x1b' not in line and line.isascii():
+                texts.append(line)
+                widths.append(len(line))
+                _append_run(attributes, None, len(line))
+                continue
+
+            entry = shown.get(line) or cache.get(line)
+            if entry is None:
+                entry = self.parse(line)
+            shown[line] = entry
+            text, runs, width = entry
+            texts.append(text)
+            widths.append(width)
+            if runs:
+                styled = True
+                for attribute, length in runs:
+                    _append_run(attributes, attribute, length)
+            else:
+                _append_run(attributes, None, len(text))
+        self._cache = shown
+
+        return '\n'.join(texts), attributes if styled else [], widths
+
+    def parse(self, line : str) -> tuple:
+        """Parses the escape sequences of a single line and measures its display width.
+
+        Args:
+            line (str): the received line
+
+        Returns:
+            tuple: the (text, attributes, width) of the line, where attributes is the run length encoded urwid display attributes of the text, empty if it has none
+        """
+        if '\x1b' not in line:
+            return line, [], line_width(line)
+
+        state = _DEFAULT_STATE
+        attribute = None
+        runs = []
+        texts = []
+        position = 0
+        for match in _ESCAPE.finditer(line):
+            start = match.start()
+            if start > position:
+                texts.append(line[position:start])
+                _append_run(runs, attribute, start - position)
+            position = match.end()
+
+            if match.group(3) == 'm' and not match.group(2):
+                state = _apply_sgr(state, match.group(1))
+                attribute = self._attribute(state)
+        if position < len(line):
+            texts.append(line[position:])
+            _append_run(runs, attribute, len(line) - position)
+
+        text = ''.join(texts)
+        if all(attribute is None for attribute, _ in runs):
+            runs = []
+        return text, runs, line_width(text)
+
+    def _attribute(self, state : tuple) -> urwid.AttrSpec:
+        """Returns the shared AttrSpec for an SGR state, or None for the default state."""
+
+        if state == _DEFAULT_STATE:
+            return None
+        spec = self._specs.get(state)
+        if spec is None:
+            foreground = ','.join([state[0]] + [name for name, on in zip(_SETTING_NAMES, state[2:]) if on])
+            spec = self._specs[state] = urwid.AttrSpec(foreground, state[1], 256)
+        return spec
+
+
+### LINE WIDTH LAYOUT ###
+class LineWidthLayout(urwid.StandardTextLayout):
+    """A urwid StandardTextLayout that uses line widths measured by the owner of the text, see AnsiLines, rather than measuring every line each time the text is laid out. Lines that fit the width are laid out without measuring them, and only lines that need wrapping or trimming are passed to the standard layout. The widths must be set with set_widths whenever the text changes; without them pure ASCII text is laid out using the length of each line, and other text is measured as usual.
+    """
+
+    def __init__(self):
+        super(LineWidthLayout, self).__init__()
+        self._widths = None
+
+    def set_widths(self, widths : list):
+        """Sets the display width of each line of the text about to be laid out, or None to measure the lines."""
+        self._widths = widths
+
+    def calculate_text_segments(self, text, width, wrap):
+        widths = self._widths
+        if isinstance(text, bytes) or (widths is None and not text.isascii()) or (widths is not None and len(widths) != text.count('\n') + 1):
+            return super(LineWidthLayout, self).calculate_text_segments(text, width, wrap)
+
+        segments = []
+        position = 0
+        index = 0
+        while position <= len(text):
+            end = text.find('\n', position)
+            if end == -1:
+                end = len(text)
+            line_cols = widths[index] if widths is not None else end - position
+            index += 1
+
+            if line_cols == 0:
+                segments.append([(0, end)])
+            elif line_cols <= width or wrap == 'clip':
+                segments.append([(line_cols, position, end), (0, end)])
+            else:
+                # wrapped or trimmed by the standard layout, offset to the position of the line in the text
+                for line_segments in super(LineWidthLayout, self).calculate_text_segments(text[position:end], width, wrap):
+                    segments.append([_offset_segment(segment, position) for segment in line_segments])
+            position = end + 1
+        return segments
+
+
+### HELPER FUNCTIONS ###
+def line_width(text : str) -> int:
+    """Returns the number of screen columns a line of text takes, its length if it is pure ASCII."""
+
+    if text.isascii():
+        return len(text)
+    return calc_width(text, 0, len(text))
+
+
+def _append_run(runs : list, attribute, length : int):
+    """Appends a run to run length encoded display attributes, extending the last run if it has the same attribute."""
+
+    if length <= 0:
+        return
+    if runs and runs[-1][0] is attribute:
+        runs[-1] = (attribute, runs[-1][1] + length)
+    else:
+        runs.append((attribute, length))
+
+
+def _apply_sgr(state : tuple, parameters : str) -> tuple:
+    """Returns the SGR state after applying the parameters of an SGR escape sequence, e.g. '1;31' or '38:5:196'. Parameters are separated by ';', and a parameter can have sub-parameters separated by ':'. Parameters that are not valid SGR leave the state unchanged rather than raising, as the line comes from outside the program."""
+
+    if _SGR_PARAMETERS.fullmatch(parameters) is None:
+        return state
+    groups = [[int(value) if value else 0 for value in group.split(':')] for group in parameters.split(';')] if parameters else [[0]]
+    state = list(state)
+    index = 0
+    while index < len(groups):
+        group = groups[index]
+        code = group[0]
+        index += 1
+        if code == 4 and len(group) > 1 and group[1] == 0:
+            code = 24 # 4:0 is no underline, other underline styles (4:3 curly) are shown as underline
+        if code == 0:
+            state = list(_DEFAULT_STATE)
+        elif code in _SGR_SETTINGS:
+            position, on = _SGR_SETTINGS[code]
+            state[position] = on
+        elif 30 <= code <= 37 or 90 <= code <= 97:
+            state[0] = _BASIC_COLOURS[code - 30 if code < 90 else code - 82]
+        elif 40 <= code <= 47 or 100 <= code <= 107:
+            state[1] = _BASIC_COLOURS[code - 40 if code < 100 else code - 92]
+        elif code == 39:
+            state[0] = 'default'
+        elif code == 49:
+            state[1] = 'default'
+        elif code in (38, 48, 58):
+            if len(group) > 1:
+                # 38:5:n or 38:2:r:g:b, where 2 may be followed by a colour space ID before r:g:b
+                values = group[1:]
+                if values[0] == 2 and len(values) > 4:
+                    values = [2] + values[2:5]
+                colour = _extended_colour(values)
+            else:
+                colour = _extended_colour([group[0] for group in groups[index:index + 4]])
+                index = len(groups) if colour is None else index + (2 if groups[index][0] == 5 else 4)
+            # 58 sets the underline colour, which is not shown
+            if colour is not None and code != 58:
+                state[0 if code == 38 else 1] = colour
+    return tuple(state)
+
+
+def _extended_colour(values : list) -> str:
+    """Returns the urwid colour for the parameters following 38 or 48: 5, n for the 256 colour palette or 2, r, g, b for 24 bit colour, approximated by the nearest 12 bit colour. Returns None if they are incomplete or the colour model is not supported."""
+
+    if len(values) >= 2 and values[0] == 5:
+        return 'h%d'%(min(values[1], 255))
+    if len(values) >= 4 and values[0] == 2:
+        return '#' + ''.join('%x'%(min(round(value / 17), 15)) for value in values[1:4])
+    return None
+
+
+def _offset_segment(segment : tuple, offset : int) -> tuple:
+    """Returns a urwid layout segment moved by offset characters in the text."""
+
+    if len(segment) == 2:
+        return (segment[0], segment[1] + offset if segment[1] is not None else None)
+    if isinstance(segment[2], int):
+        return (segment[0], segment[1] + offset, segment[2] + offset)
+    return (segment[0], segment[1] + offset, segment[2])
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import time
+import heapq
+import itertools
+import threading
+from typing import Callable
+
+
+### COMMAND SCHEDULER ###
+class CommandScheduler():
+    """Paces outbound commands for devices that drop data when commands arrive too quickly, see TerminalUI.enable_command_queue.
+
+    Commands are queued by priority (lower values are sent first, in the order queued for equal priorities) and sent by a worker thread, so the thread queuing them is never blocked. The send function is called on the worker thread, never the main loop thread, so must not change widgets directly. Sending is limited by a token bucket holding up to burst tokens that refills at rate tokens per second, each command using one token, and optionally by the number of commands in flight, those sent but not yet marked complete.
+    """
+
+    def __init__(self, send : Callable[[str], None], rate : float, burst : int=1, max_in_flight : int=None, error_callback : Callable[[str, Exception], None]=None):
+        """The constructor for the CommandScheduler class.
+
+        Args:
+            send (Callable[[str], None]): called on the worker thread to send each command
+            rate (float): the number of commands per second the token bucket refills at
+            burst (int, optional): The number of commands that can be sent back to back after the queue has been idle. Defaults to 1.
+            max_in_flight (int, optional): The number of commands sent but not yet completed before sending waits, see complete. Defaults to None, not limited.
+            error_callback (Callable[[str, Exception], None], optional): called on the worker thread with the command and the exception when send raises anything other than an OSError. An OSError is a failure to reach the device, so is only counted in errors and the next command is sent. Defaults to None, the exception is raised again, stopping the worker thread.
+
+        Raises:
+            RuntimeError: if the rate is not greater than 0, or burst or max_in_flight is less than 1
+        """
+        if rate <= 0:
+            raise RuntimeError('The command rate must be greater than 0.')
+        if burst < 1 or (max_in_flight is not None and max_in_flight < 1):
+            raise RuntimeError('The command burst and max in flight must be 1 or greater.')
+        self._send = send
+        self._error_callback = error_callback
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self._condition = threading.Condition(threading.Lock())
+        self._queue = []                    # heap of (priority, sequence, command)
+        self._sequence = itertools.count()
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._thread = None
+        self._running = False
+        self.in_flight = 0
+        self.sent = 0
+        self.errors = 0
+        self.last_error = None              # the last exception raised by send, OSError or not
+        self.version = 0                    # incremented whenever the depth or in flight count changes
+
+    def start(self):
+        """Starts the worker thread. Does nothing if it is already running."""
+
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._worker, name='CommandScheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout : float=1.0):
+        """Stops the worker thread once it has finished sending the current command. Queued commands are kept and are sent if the scheduler is started again."""
+
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def put(self, command : str, priority : int=0):
+        """Queues a command. Safe to call from any thread.
+
+        Args:
+            command (str): the command
+            priority (int, optional): Lower values are sent first. Defaults to 0.
+        """
+        with self._condition:
+            heapq.heappush(self._queue, (priority, next(self._sequence), command))
+            self.version += 1
+            self._condition.notify()
+
+    def complete(self, count : int=1):
+        """Marks sent commands as complete, allowing more to be sent when max_in_flight is set. Safe to call from any thread."""
+
+        with self._condition:
+            if self.in_flight == 0:
+                return
+            self.in_flight = max(self.in_flight - count, 0)
+            self.version += 1
+            self._condition.notify()
+
+    def clear(self) -> int:
+        """Discards the queued commands.
+
+        Returns:
+            int: the number of commands discarded
+        """
+        with self._condition:
+            discarded = len(self._queue)
+            self._queue = []
+            self.version += 1
+        return discarded
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def describe(self) -> str:
+        """Returns a one line description of the queue depth and in flight count, used as part of the title of the command area."""
+
+        if not self._queue and not self.in_flight and not self.errors:
+            return ''
+        text = '%d queued'%(len(self._queue))
+        if self.max_in_flight is not None:
+            text += ' %d/%d in flight'%(self.in_flight, self.max_in_flight)
+        if self.errors:
+            text += ' %d failed'%(self.errors)
+        return text
+
+    def _refill(self, now : float):
+        self._tokens = min(self._tokens + (now - self._refilled) * self.rate, self.burst)
+        self._refilled = now
+
+    def _worker(self):
+        """Sends queued commands as the token bucket and in flight limit allow."""
+
+        while True:
+            with self._condition:
+                while True:
+                    if not self._running:
+                        return
+                    self._refill(time.monotonic())
+                    if not self._queue or (self.max_in_flight is not None and self.in_flight >= self.max_in_flight):
+                        self._condition.wait()
+                    elif self._tokens < 1:
+                        self._condition.wait((1 - self._tokens) / self.rate)
+                    else:
+                        break
+                _, _, command = heapq.heappop(self._queue)
+                self._tokens -= 1
+                if self.max_in_flight is not None:
+                    self.in_flight += 1
+                self.version += 1
+
+            try:
+                self._send(command)
+                self.sent += 1
+            except Exception as error:
+                self.errors += 1
+                self.last_error = error
+                if self.max_in_flight is not None:
+                    self.complete()
+                # anything other than an OSError is a bug in send or a request to exit (urwid.ExitMainLoop), so is passed on rather than swallowed
+                if not isinstance(error, OSError):
+                    if self._error_callback is None:
+                        with self._condition:
+                            self._running = False
+                        raise
+                    self._error_callback(command, error)
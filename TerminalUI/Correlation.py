@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import time
+import array
+import itertools
+import threading
+import collections
+from typing import Callable
+
+
+### COMMAND TRACKER ###
+class CommandTracker():
+    """Links commands to the received lines that respond to them and measures the round-trip latency of each command, see TerminalUI.enable_command_tracking.
+
+    Each tracked command is given an ID and a time.monotonic timestamp and waits in a pending queue. Every received line is passed to the matcher with the pending commands, oldest first, and the first command it matches is completed. Commands that are not answered within the timeout are expired and counted. The IDs and latencies of the last capacity completed commands are held in a ring of array('q') and array('d'), and the p50/p99 of that window are only recalculated when a command completes.
+    """
+
+    def __init__(self, matcher : Callable[[str, str], bool], timeout : float=5.0, capacity : int=1024):
+        """The constructor for the CommandTracker class.
+
+        Args:
+            matcher (Callable[[str, str], bool]): called with a pending command and a received line, returns true if the line is the response to the command
+            timeout (float, optional): The seconds a command waits for its response before it is expired. Defaults to 5.0.
+            capacity (int, optional): The number of most recent latencies retained for the rolling percentiles. Defaults to 1024.
+
+        Raises:
+            RuntimeError: if the timeout is not greater than 0 or the capacity is less than 1
+        """
+        if timeout <= 0:
+            raise RuntimeError('The command timeout must be greater than 0.')
+        if capacity < 1:
+            raise RuntimeError('The latency capacity must be 1 or greater.')
+        self._matcher = matcher
+        self.timeout = timeout
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._pending = collections.deque()     # (id, command, submit time), oldest first
+        self._next_id = 1
+
+        # completed command i is held at i % capacity
+        self._ids = array.array('q', bytes(8 * capacity))
+        self._latencies = array.array('d', bytes(8 * capacity))
+        self.completed = 0
+        self.expired = 0
+        self.last = None                        # (id, command, latency) of the last completed command
+        self._percentiles = None                # (p50, p99), None until recalculated
+
+    def submit(self, command : str) -> int:
+        """Starts tracking a command. Safe to call from any thread.
+
+        Args:
+            command (str): the command sent
+
+        Returns:
+            int: the ID of the command
+        """
+        with self._lock:
+            command_id = self._next_id
+            self._next_id += 1
+            self._pending.append((command_id, command, time.monotonic()))
+        return command_id
+
+    def match(self, lines, times=None) -> int:
+        """Completes the pending commands that the received lines respond to. Called by the TerminalUI main loop with each batch of received lines.
+
+        Args:
+            lines: the received lines, in the order received
+            times (optional): the time.monotonic time each line was received. Defaults to None, the lines are treated as received now.
+
+        Returns:
+            int: the number of commands completed
+        """
+        if not self._pending:
+            return 0
+
+        if times is None:
+            times = itertools.repeat(time.monotonic())
+        matched = 0
+        with self._lock:
+            for line, received in zip(lines, times):
+                for position, (command_id, command, submitted) in enumerate(self._pending):
+                    if self._matcher(command, line):
+                        del self._pending[position]
+                        self._record(command_id, command, max(received - submitted, 0.0))
+                        matched += 1
+                        break
+                if not self._pending:
+                    break
+        return matched
+
+    def _record(self, command_id : int, command : str, latency : float):
+        index = self.completed % self.capacity
+        self._ids[index] = command_id
+        self._latencies[index] = latency
+        self.completed += 1
+        self.last = (command_id, command, latency)
+        self._percentiles = None
+
+    def expire(self) -> int:
+        """Expires the pending commands that have waited longer than the timeout. Called by the TerminalUI main loop before each redraw.
+
+        Returns:
+            int: the number of commands expired
+        """
+        if not self._pending:
+            return 0
+
+        deadline = time.monotonic() - self.timeout
+        expired = 0
+        with self._lock:
+            while self._pending and self._pending[0][2] < deadline:
+                self._pending.popleft()
+                expired += 1
+        self.expired += expired
+        return expired
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def latency(self, command_id : int) -> float:
+        """Returns the round-trip latency in seconds of a completed command, or None if it has not completed, was expired or is no longer in the window."""
+
+        # IDs start at 1 and unused slots hold 0, so the whole ring can be searched (array.index only takes bounds from Python 3.10)
+        if command_id < 1:
+            return None
+        try:
+            index = self._ids.index(command_id)
+        except ValueError:
+            return None
+        return self._latencies[index]
+
+    def percentiles(self) -> tuple:
+        """Returns the (p50, p99) round-trip latency in seconds over the last capacity completed commands, or (None, None) if no command has completed."""
+
+        if self.completed == 0:
+            return None, None
+        if self._percentiles is None:
+            window = sorted(self._latencies[:min(self.completed, self.capacity)])
+            self._percentiles = (_nearest_rank(window, 50), _nearest_rank(window, 99))
+        return self._percentiles
+
+    def summary(self) -> dict:
+        """Returns the completed, expired and pending counts, the last completed command and the rolling percentiles, with latencies in milliseconds."""
+
+        p50, p99 = self.percentiles()
+        last = self.last
+        return {'completed': self.completed, 'expired': self.expired, 'pending': self.pending,
+                'last_id': last[0] if last else None, 'last_command': last[1] if last else None,
+                'last_ms': last[2] * 1000 if last else None,
+                'p50_ms': p50 * 1000 if p50 is not None else None,
+                'p99_ms': p99 * 1000 if p99 is not None else None}
+
+    def describe(self) -> str:
+        """Returns a one line description of the last completed command and the rolling percentiles, used as the title of the command area."""
+
+        if self.last is None:
+            return '%d pending'%(self.pending) if self.pending else ''
+        command_id, command, latency = self.last
+        if len(command) > 20:
+            command = command[:19] + '~'
+        p50, p99 = self.percentiles()
+        text = '#%d %s %.1f ms | p50 %.1f ms p99 %.1f ms'%(command_id, command, latency * 1000, p50 * 1000, p99 * 1000)
+        if self.expired:
+            text += ' | %d timed out'%(self.expired)
+        return text
+
+
+### HELPER FUNCTIONS ###
+def _nearest_rank(ordered : list, percentile : float) -> float:
+    """Returns the nearest rank percentile of an ordered, non-empty list."""
+
+    rank = -(-percentile * len(ordered) // 100)     # ceil
+    return ordered[max(int(rank), 1) - 1]
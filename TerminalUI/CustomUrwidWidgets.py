@@ -4,6 +4,9 @@
 import re
 import urwid
 from typing import Union
+from TerminalUI.KeyBindings import KeyBindings
+from TerminalUI.NumericFormats import NumericFormat
+from TerminalUI.AnsiText import LineWidthLayout
 
 ### CUSTOM WIDGETS ###
 
@@ -26,42 +29,39 @@ class CommandEdit(urwid.Edit):
         urwid.Edit.__init__(self, caption, edit_text, multiline, align, wrap, allow_tab, edit_pos, layout, mask)
 
     def keypress(self, size, key):
+        handler = self.key_bindings.get(key)
+        if handler is None:
+            urwid.Edit.keypress(self, size, key)
+            return
+        return handler(self, size, key)
 
+    def _history_back(self, size, key):
         # Curser Up to go back in history
-        if self._command_map[key] == urwid.CURSOR_UP:
-            self._history_idx = min(self._history_idx+1, len(self._history)-1)
-            self.set_edit_text(self._history[self._history_idx])
-            return
+        self._history_idx = min(self._history_idx+1, len(self._history)-1)
+        self.set_edit_text(self._history[self._history_idx])
 
+    def _history_forward(self, size, key):
         # Cursor Down to go forward in history
-        if self._command_map[key] == urwid.CURSOR_DOWN:
-            self._history_idx = max(self._history_idx-1, -1)
-            if self._history_idx == -1:
-                self.set_edit_text('')
-            else:
-                self.set_edit_text(self._history[self._history_idx])
-            return
+        self._history_idx = max(self._history_idx-1, -1)
+        if self._history_idx == -1:
+            self.set_edit_text('')
+        else:
+            self.set_edit_text(self._history[self._history_idx])
 
+    def _handle_enter_keypress(self, size, key):
         # Enter to emit done signal
-        elif key == 'enter':
-            self._history.insert(0, self.get_edit_text()) 
-            if len(self._history) > self._history_size:
-                self._history.pop()
-            self._history_idx = -1
+        self._history.insert(0, self.get_edit_text()) 
+        if len(self._history) > self._history_size:
+            self._history.pop()
+        self._history_idx = -1
 
-            urwid.emit_signal(self, 'done', self, self.get_edit_text())
-            self.set_edit_text('')
-            # super(SerialCommand, self).set_edit_text('')
-            return
+        urwid.emit_signal(self, 'done', self, self.get_edit_text())
+        self.set_edit_text('')
 
+    def _handle_escape_keypress(self, size, key):
         # Escape to clear text
-        elif key == 'esc':
-            self._history_idx = -1
-            self.set_edit_text('')
-            # super(SerialCommand, self).set_edit_text('')
-            return
-
-        urwid.Edit.keypress(self, size, key)
+        self._history_idx = -1
+        self.set_edit_text('')
 
     def selectable(self):
         return self._enabled
@@ -69,14 +69,21 @@ class CommandEdit(urwid.Edit):
     def enable(self, enable):
         self._enabled = enable
 
+    # default key bindings, shared by every CommandEdit until changed with key_bindings = key_bindings.copy()
+    key_bindings = KeyBindings({urwid.CURSOR_UP: _history_back, urwid.CURSOR_DOWN: _history_forward},
+                               {'enter': _handle_enter_keypress, 'esc': _handle_escape_keypress})
+
 ### CUSTOM OPTION ###
 class UserOption(urwid.WidgetWrap):
     _metaclass_ = urwid.signals.MetaSignals
     signals = ['value_change']
 
-    def __init__(self, option_name : str, value : Union[list, str, int, float], caption : str="", increment : Union[int, float]=None, limits : Union[int, float, list]=[None, None], enter_fires_change_event : bool=True, enabled : bool=True):
+    def __init__(self, option_name : str, value : Union[list, str, int, float], caption : str="", increment : Union[int, float]=None, limits : Union[int, float, list]=[None, None], enter_fires_change_event : bool=True, enabled : bool=True, number_format : NumericFormat=None, units : str=""):
         # Variables
         self._option_name = option_name
+        self._is_list = type(value) == list
+        self._format = number_format if not self._is_list else None    # typed numeric options only accept values of this format
+        self._units = units
         self._value_list = None             # holds the list of selectable values, if passed values is a list, else will be none
         self._current_value = 0             # holds the current value, or current index of selected _values_list, if value is a list of selectable options
         self._shown_value = 0               # holds the current value shown to the user
@@ -107,9 +114,21 @@ class UserOption(urwid.WidgetWrap):
             self._current_value = value
             self._shown_value = value
 
-            if type(value) == str:
+            if self._format is not None:
+                value = self._format.coerce(value)
+                self._current_value = value
+                self._shown_value = value
+                if self._increment is None:
+                    self._increment = self._format.step
+            elif type(value) == str:
                 self._increment = None # incrementing a string does not make sense
 
+            # Text around the value, the value itself is between _prefix_len and _suffix_len from the end
+            self._prefix = '< ' if self._increment != None else ''
+            self._suffix = (' ' + units if units else '') + (' >' if self._increment != None else '')
+            self._prefix_len = len(self._prefix)
+            self._suffix_len = len(self._suffix)
+
             # Initialise urwid edit text to contain user option value
             self._option_text = urwid.Edit(edit_text="???", align='center', edit_pos=None)
             self._set_option_text(self._current_value)
@@ -126,24 +145,26 @@ class UserOption(urwid.WidgetWrap):
 
 
     def _set_option_text(self, value):
-        if type(self._option_text) == urwid.SelectableIcon:
+        if self._is_list:
             txt = "< %s >"%(str(self._value_list[value]))
             self._option_text.set_text(txt)
-        elif type(self._option_text) == urwid.Edit:
-            if self._increment != None:
+        else:
+            if self._format is not None:
+                txt = self._prefix + self._format.format(value) + self._suffix
+            elif self._increment != None:
                 txt = "< %s >"%(str(value))
             else:
                 txt = "%s"%(str(value))
             self._option_text.set_edit_text(txt)
 
     def _set_option_text_curs_pos(self):
-        if type(self._option_text) == urwid.SelectableIcon:
+        if self._is_list:
             tmp_list = [str(x) for x in self._value_list]
             curs_pos = len(max(tmp_list, key=len)) + 5 # to hide the cursor so don't see it flashing, +4 for < and > and two spaces then +1 to put at end
             self._option_text._cursor_position = curs_pos
-        elif type(self._option_text) == urwid.Edit:
+        else:
             # doesn't seem to work at the moment
-            curs_pos = len(self._option_text.get_edit_text()) - 2 # to move cursor to last place, doesn't seem to be working
+            curs_pos = len(self._option_text.get_edit_text()) - (self._suffix_len if self._format is not None else 2) # to move cursor to last place, doesn't seem to be working
             self._option_text.edit_pos = curs_pos
 
     
@@ -164,7 +185,7 @@ class UserOption(urwid.WidgetWrap):
         return self._caption
 
     def set_value(self, value : Union[str, int, float]):
-        if type(self._option_text) == urwid.SelectableIcon:
+        if self._is_list:
             if type(value) == int or type(value) == float:
                 if type(value) == float and not value.is_integer():
                     raise RuntimeError('The passed list option index be an integer not a float.')
@@ -175,7 +196,9 @@ class UserOption(urwid.WidgetWrap):
                 if value in self._value_list:
                     self._current_value = self._value_list.index(value)
 
-        elif type(self._option_text) == urwid.Edit:            
+        else:
+            if self._format is not None:
+                value = self._format.coerce(value)
             if self._limits[0] != None:
                 value = max(value, self._limits[0])
             if self._limits[1] != None:
@@ -187,9 +210,9 @@ class UserOption(urwid.WidgetWrap):
         self._set_option_text(self._current_value)
 
     def get_value(self):
-        if type(self._option_text) == urwid.SelectableIcon:
+        if self._is_list:
             retval = self._value_list[self._current_value]
-        elif type(self._option_text) == urwid.Edit:
+        else:
             retval = self._current_value
 
         # if it isn't a string return whatever value is
@@ -210,13 +233,13 @@ class UserOption(urwid.WidgetWrap):
 
 
     def get_value_index(self):
-        if type(self._option_text) == urwid.SelectableIcon:
+        if self._is_list:
             return self._current_value
-        elif type(self._option_text) == urwid.Edit:
+        else:
             return None
 
     def set_option_list(self, values_list : list, index : int=0):
-        if type(self._option_text) == urwid.SelectableIcon:
+        if self._is_list:
             self._value_list = values_list
             self._limits = [0, len(self._value_list)-1]   # limits are 0 and length of list
             self.set_value(index)
@@ -230,12 +253,40 @@ class UserOption(urwid.WidgetWrap):
     def get_option_list(self):
         return self._value_list
 
+    def get_state(self) -> dict:
+        """Returns a JSON serialisable snapshot of the option value, the selected index is included for selectable list options."""
+        if self._is_list:
+            return {'value': self._value_list[self._current_value], 'index': self._current_value}
+        return {'value': self._current_value}
+
+    def set_state(self, state : dict) -> bool:
+        """Restores a snapshot returned by get_state. A selectable list option is restored by value if the value is still in the list, else by index. Returns false if the state could not be applied."""
+        value = state.get('value')
+        if self._is_list:
+            index = state.get('index')
+            if not (type(index) == int and 0 <= index < len(self._value_list) and self._value_list[index] == value):
+                if value not in self._value_list:
+                    return False
+                index = self._value_list.index(value)
+            value = index
+        elif type(value) not in (int, float, str):
+            return False
+
+        try:
+            self.set_value(value)
+        except (RuntimeError, TypeError):
+            return False
+        return True
+
     def selectable(self):
         return self._enabled
 
     def enable(self, enable):
         self._enabled = enable
 
+    def enter_fires_change_event(self, enter_fires_change_event : bool):
+        self._enter_fires_change_event = enter_fires_change_event
+
     def valid_numerical_char(self, ch):
         """
         Return true for decimal digits.
@@ -262,31 +313,23 @@ class UserOption(urwid.WidgetWrap):
         
 
     def keypress(self, size, key):
-        # Handle left/right arrow keypresses
-        if self._command_map[key] == urwid.CURSOR_LEFT or self._command_map[key] == urwid.CURSOR_RIGHT:
-            return self._handle_left_right_keypresses(size, key)
-
-        # Handle up/down arrow keypresses
-        elif self._command_map[key] == urwid.CURSOR_UP or self._command_map[key] == urwid.CURSOR_DOWN:
-            return self._handle_up_down_keypresses(size, key)
-
-        # Handle enter keypress
-        elif key == 'enter':
-            return self._handle_enter_keypress(size, key)
-
-        # Handle escape keypress
-        elif key == 'esc':
-            self._editing = False
-            self.set_value(self._current_value)
-            return # nothing to show keypress has been handled
+        # Handle bound keys, left/right, up/down, enter, escape, backspace and delete by default
+        handler = self.key_bindings.get(key)
+        if handler is not None:
+            return handler(self, size, key)
 
-        # Handle printable character keypress or backspace or delete
-        if self.valid_char(key) or key == 'backspace' or key == 'delete':
+        # Handle printable character keypress
+        if self.valid_char(key):
             return self._handle_edit_keypress(size, key)
         
         # So higher widgets can deal with keypress
         return key
 
+    def _handle_escape_keypress(self, size, key):
+        self._editing = False
+        self.set_value(self._current_value)
+        # nothing returned to show keypress has been handled
+
 
     def _handle_left_right_keypresses(self, size, key):
         # If not currently being edited and increment is not none, increment/decrement value
@@ -339,6 +382,9 @@ class UserOption(urwid.WidgetWrap):
             self._emit('value_change')
 
     def _handle_edit_keypress(self, size, key):
+        if self._format is not None:
+            return self._handle_number_keypress(size, key)
+
         # If valid printable character, or backspace or delete and increment is none, assume editing a string
         if (self.valid_char(key) or key == 'backspace' or key == 'delete') and self._increment == None:
             # handle key
@@ -373,89 +419,139 @@ class UserOption(urwid.WidgetWrap):
                 self._shown_value = 0
                 self._option_text.set_edit_text('< 0 >')
 
+    def _handle_number_keypress(self, size, key):
+        # only characters of the number format can be typed
+        if len(key) == 1 and key not in self._format.chars:
+            return
+
+        current_text = self._option_text.get_edit_text()
+        urwid.Edit.keypress(self._option_text, size, key)
+        txt = self._option_text.get_edit_text()
+
+        # don't allow editing of the text around the value, or entering text that can not become a number of the format
+        entry = txt[self._prefix_len:len(txt)-self._suffix_len]
+        if len(txt) < self._prefix_len + self._suffix_len or not txt.startswith(self._prefix) or not txt.endswith(self._suffix) or not self._format.accepts(entry):
+            self._option_text.set_edit_text(current_text)
+            return
+
+        # an incomplete number (e.g. '-' or '0x') keeps the last complete value
+        self._editing = True
+        value = self._format.parse(entry)
+        if value is not None:
+            self._shown_value = value
+
     def _increment_value(self):
         self._shown_value += self._increment
+        if self._format is not None:
+            self._shown_value = self._format.coerce(self._shown_value)
         if self._limits[1] != None and self._shown_value > self._limits[1]:
-            if type(self._option_text) == urwid.SelectableIcon:
+            if self._is_list:
                 self._shown_value = self._limits[0]     # wrap value
-            elif type(self._option_text) == urwid.Edit:
+            else:
                 self._shown_value = self._limits[1]     # do not wrap value
 
     def _decrement_value(self):
         self._shown_value -= self._increment
+        if self._format is not None:
+            self._shown_value = self._format.coerce(self._shown_value)
         if self._limits[0] != None and self._shown_value < self._limits[0]:
-            if type(self._option_text) == urwid.SelectableIcon:
+            if self._is_list:
                 self._shown_value = self._limits[1]     # wrap value
-            elif type(self._option_text) == urwid.Edit:
+            else:
                 self._shown_value = self._limits[0]     # do not wrap value
 
+    # default key bindings, shared by every UserOption until changed with key_bindings = key_bindings.copy()
+    key_bindings = KeyBindings({urwid.CURSOR_LEFT: _handle_left_right_keypresses, urwid.CURSOR_RIGHT: _handle_left_right_keypresses,
+                                urwid.CURSOR_UP: _handle_up_down_keypresses, urwid.CURSOR_DOWN: _handle_up_down_keypresses},
+                               {'enter': _handle_enter_keypress, 'esc': _handle_escape_keypress,
+                                'backspace': _handle_edit_keypress, 'delete': _handle_edit_keypress})
+
 
 ### CUSTOM URWID FRAME ###
 class CustomFrame(urwid.Frame):
+    _TAB_ORDER = {'header': ('body', 'footer'), 'body': ('footer', 'header'), 'footer': ('header', 'body')}
 
     def keypress(self, size, key):
+        handler = self.key_bindings.get(key)
+        if handler is not None:
+            handler(self, size, key)
+        urwid.Frame.keypress(self, size, key)
 
-        if key == 'tab':
-            if self.focus_position == 'header' and self.body.selectable():
-                self.focus_position = 'body'
-            elif self.focus_position == 'header' and self.footer.selectable():
-                self.focus_position = 'footer'
+    def _focus_next(self, size, key):
+        # move to the next selectable part of the frame
+        for position in self._TAB_ORDER[self.focus_position]:
+            if getattr(self, position).selectable():
+                self.focus_position = position
+                break
 
-            elif self.focus_position == 'body' and self.footer.selectable():
-                self.focus_position = 'footer'
-            elif self.focus_position == 'body' and self.header.selectable():
-                self.focus_position = 'header'
+    key_bindings = KeyBindings(keys={'tab': _focus_next})
 
-            elif self.focus_position == 'footer' and self.header.selectable():
-                self.focus_position = 'header'
-            elif self.focus_position == 'footer' and self.body.selectable():
-                self.focus_position = 'body'
 
-        urwid.Frame.keypress(self, size, key)
+### SIZED WIDGET MIXIN ###
+class SizedWidgetMixin():
+    """Holds the size of the area a widget is shown in. The size is set by the owner when the screen or layout changes, rather than being worked out on every render, and a resize signal is emitted when it changes. The widget class must declare the 'resize' signal."""
+
+    def __init__(self, *args, **kwargs):
+        self._size = (0,0)
+        super(SizedWidgetMixin, self).__init__(*args, **kwargs)
+
+    def set_size(self, size) -> bool:
+        """Sets the size of the area the widget is shown in, emitting the resize signal if it changed.
+
+        Args:
+            size (tuple): the new (rows, cols)
+
+        Returns:
+            bool: true if the size changed
+        """
+        if size == self._size:
+            return False
+        old_size, self._size = self._size, size
+        self._emit('resize', old_size, size)
+        return True
+
+    def get_size(self):
+        return self._size
 
 
 ### CUSTOM URWID TEXT ###
-class CustomText(urwid.Text):
+class CustomText(SizedWidgetMixin, urwid.Text):
+    """A urwid Text that holds the size of the area it is shown in, see SizedWidgetMixin."""
     _metaclass_ = urwid.signals.MetaSignals
     signals = ['resize']
 
-    _size = (0,0)
-    _first_render = False
-    
-    def render (self, size, focus = False):
-        canvas = super(CustomText, self).render(size, focus)
-        new_size = (canvas.rows(), canvas.cols())
-        # check if to raise *on_resize* event
-        if new_size != self._size and not self._first_render:
-            self._emit('resize', self._size, new_size)
-        self._size = new_size
-        self._first_render = False
-        return canvas
+    def set_text_attributes(self, text : str, attributes : list, widths : list=None):
+        """Sets the text and its run length encoded display attributes directly, skipping the decomposition of markup done by set_text, see AnsiLines.
 
-    def get_size(self):
-        return self._size
+        Args:
+            text (str): the text
+            attributes (list): the run length encoded display attributes, e.g. [('attr1', 10), (None, 5)]
+            widths (list, optional): The display width of each line, used by a LineWidthLayout. Defaults to None.
+        """
+        if isinstance(self.layout, LineWidthLayout):
+            self.layout.set_widths(widths)
+        self._text, self._attrib = text, attributes
+        self._invalidate()
 
 
 ### CUSTOM URWID FILLER ###
-class CustomFiller(urwid.Filler):
+class CustomFiller(SizedWidgetMixin, urwid.Filler):
+    """A urwid Filler that can show the last rows of a body that is too tall for it, and that holds the size of the area it is shown in, see SizedWidgetMixin."""
     _metaclass_ = urwid.signals.MetaSignals
     signals = ['resize']
 
-    def __init__(self, body, valign=urwid.MIDDLE, height=urwid.PACK, min_height=None, top=0, bottom=0):
-        self._size = (0,0)
-        self._first_render = False
+    def __init__(self, body, valign=urwid.MIDDLE, height=urwid.PACK, min_height=None, top=0, bottom=0, show_tail=False):
+        self._show_tail = show_tail # when the body is taller than the filler, show its last rows rather than its first rows
+
+        super(CustomFiller, self).__init__(body, valign, height, min_height, top, bottom)
 
-        urwid.Filler.__init__(self, body, valign, height, min_height, top, bottom)
-    
     def render (self, size, focus = False):
-        canvas = super(CustomFiller, self).render(size, focus)
-        new_size = (canvas.rows(), canvas.cols())
-        # check if to raise *on_resize* event
-        if new_size != self._size and not self._first_render:
-            self._emit('resize', self._size, new_size)
-        self._size = new_size
-        self._first_render = False
+        canvas = None
+        if self._show_tail and self.height_type == urwid.PACK:
+            body_canvas = self._original_widget.render((size[0],), focus)
+            if body_canvas.rows() > size[1]:
+                canvas = urwid.CompositeCanvas(body_canvas)
+                canvas.trim(body_canvas.rows() - size[1], size[1])
+        if canvas is None:
+            canvas = super(CustomFiller, self).render(size, focus)
         return canvas
-
-    def get_size (self):
-        return self._size
\ No newline at end of file
@@ -0,0 +1,353 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import os
+import abc
+import tty
+import codecs
+import socket
+import subprocess
+from typing import Tuple, Union
+
+
+### DATA SOURCE BASE CLASS ###
+class DataSource(abc.ABC):
+    """Base class for sources of received lines that are read by the TerminalUI event loop via urwid's watch_file, so no reader thread is required. Each time the source is readable it is drained with non-blocking reads of up to chunk_size bytes, the data is decoded and split into lines incrementally (a line split across two reads is joined back together) and all complete lines are passed to TerminalUI.append_receive_lines in one call.
+
+    Subclasses implement fileno, _read_chunk and close, and can override _lines_received to handle lines other than by showing them.
+    """
+
+    def __init__(self, encoding : str='utf-8', chunk_size : int=65536, max_bytes_per_read : int=1048576):
+        """The constructor for the DataSource class.
+
+        Args:
+            encoding (str, optional): The encoding of the received data, undecodable bytes are replaced. Defaults to 'utf-8'.
+            chunk_size (int, optional): The number of bytes requested by each read. Defaults to 65536.
+            max_bytes_per_read (int, optional): The maximum number of bytes read each time the source is readable, so a fast source cannot starve the event loop. Defaults to 1048576.
+        """
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._chunk_size = chunk_size
+        self._max_bytes_per_read = max_bytes_per_read
+        self._partial_line = ''
+        self._terminal_ui = None
+        self._watch_handle = None
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.eof = False
+        self.paused = False # reading stopped by the TerminalUI 'block' receive policy
+
+    @abc.abstractmethod
+    def fileno(self) -> int:
+        """Returns the file descriptor watched by the event loop, read by _read_chunk."""
+
+    @abc.abstractmethod
+    def close(self):
+        """Closes the source and releases its file descriptor or other resources."""
+
+    def write(self, data : bytes):
+        """Writes data back to the source, e.g. to send a command to a device. Only supported by sources that are connected to something that can receive data.
+
+        Raises:
+            RuntimeError: if the source is read only
+        """
+        raise RuntimeError('The %s data source is read only.'%(type(self).__name__))
+
+    def _read_chunk(self) -> bytes:
+        """Reads up to chunk_size bytes without blocking.
+
+        Raises:
+            BlockingIOError: if there is no data waiting
+
+        Returns:
+            bytes: the data read, or an empty bytes object at end of file
+        """
+        return os.read(self.fileno(), self._chunk_size)
+
+    def attach(self, terminal_ui):
+        """Starts reading from the source into the receive textbox. Called by TerminalUI once its main loop exists.
+
+        Args:
+            terminal_ui (TerminalUI): the TerminalUI to feed
+        """
+        self._terminal_ui = terminal_ui
+        self.paused = False
+        if not self.eof and self._watch_handle is None:
+            self._watch_handle = terminal_ui.main_loop.watch_file(self.fileno(), self._on_readable)
+
+    def detach(self):
+        """Stops reading from the source. Any partial line is kept until the source is attached again."""
+
+        if self._watch_handle is not None:
+            self._terminal_ui.main_loop.remove_watch_file(self._watch_handle)
+            self._watch_handle = None
+
+    def _on_readable(self):
+        """Event loop handler, drains the source then hands the complete lines to the TerminalUI."""
+
+        # leave the data with the producer until the TerminalUI has room, it is resumed on the next drain
+        if self._terminal_ui.receive_would_block():
+            self.detach()
+            self.paused = True
+            return
+
+        chunks = []
+        total = 0
+        eof = False
+        while total < self._max_bytes_per_read:
+            try:
+                data = self._read_chunk()
+            except BlockingIOError:
+                break
+            except OSError:
+                # e.g. EIO from a pty or ECONNRESET from a socket, treat as end of file
+                data = b''
+            if not data:
+                eof = True
+                break
+            chunks.append(data)
+            total += len(data)
+
+        self.feed(b''.join(chunks), final=eof)
+        if eof:
+            self.eof = True
+            self.detach()
+
+    def feed(self, data : bytes, final : bool=False):
+        """Decodes data, splits it into lines and appends the complete lines to the receive textbox. A trailing partial line is held until the rest of it arrives, or until final is set.
+
+        Args:
+            data (bytes): the data received
+            final (bool, optional): the source has ended, so any partial line is also appended. Defaults to False.
+        """
+        self.bytes_read += len(data)
+        text = self._partial_line + self._decoder.decode(data, final)
+        if '\r' in text:
+            text = text.replace('\r\n', '\n')
+
+        lines = text.split('\n')
+        self._partial_line = lines.pop()
+        if final and self._partial_line:
+            lines.append(self._partial_line)
+            self._partial_line = ''
+
+        if lines:
+            self.lines_read += len(lines)
+            self._lines_received(lines)
+
+    def _lines_received(self, lines : list):
+        """Called with each batch of complete lines, appends them to the receive textbox."""
+        self._terminal_ui.append_receive_lines(lines)
+
+
+### PIPE SOURCE ###
+class PipeSource(DataSource):
+    """Reads lines from a pipe, FIFO or any other file descriptor that supports non-blocking reads."""
+
+    def __init__(self, pipe, **kwargs):
+        """The constructor for the PipeSource class.
+
+        Args:
+            pipe: a file descriptor, or an object with a fileno method such as a file object returned by open or subprocess.Popen.stdout
+            **kwargs: passed to the DataSource constructor
+        """
+        super(PipeSource, self).__init__(**kwargs)
+        self._pipe = pipe
+        self._fd = pipe if isinstance(pipe, int) else pipe.fileno()
+        os.set_blocking(self._fd, False)
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def close(self):
+        if self._fd is None:
+            return
+        if isinstance(self._pipe, int):
+            os.close(self._fd)
+        else:
+            self._pipe.close()
+        self._fd = None
+
+
+### SUBPROCESS SOURCE ###
+class SubprocessSource(PipeSource):
+    """Runs a command and reads lines from its combined stdout and stderr. Data written to the source is sent to the command's stdin."""
+
+    def __init__(self, args : Union[list, str], shell : bool=False, cwd : str=None, env : dict=None, **kwargs):
+        """The constructor for the SubprocessSource class, starts the command.
+
+        Args:
+            args (Union[list, str]): the command to run, as accepted by subprocess.Popen
+            shell (bool, optional): Run the command through the shell. Defaults to False.
+            cwd (str, optional): The working directory of the command. Defaults to None.
+            env (dict, optional): The environment of the command. Defaults to None.
+            **kwargs: passed to the DataSource constructor
+        """
+        self.process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=shell, cwd=cwd, env=env)
+        super(SubprocessSource, self).__init__(self.process.stdout, **kwargs)
+
+    def write(self, data : bytes):
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+    def close(self):
+        super(SubprocessSource, self).close()
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(1)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process.stdin.close()
+
+
+### SOCKET SOURCE ###
+class SocketSource(DataSource):
+    """Reads lines from a TCP connection or from UDP datagrams. For TCP the source connects to address, for UDP it binds to address and each datagram is treated as one or more complete lines."""
+
+    def __init__(self, address : Tuple[str, int], protocol : str='tcp', **kwargs):
+        """The constructor for the SocketSource class, connects or binds the socket.
+
+        Args:
+            address (Tuple[str, int]): the (host, port) to connect to for TCP, or to bind to for UDP
+            protocol (str, optional): either 'tcp' or 'udp'. Defaults to 'tcp'.
+            **kwargs: passed to the DataSource constructor
+
+        Raises:
+            RuntimeError: if the protocol is not 'tcp' or 'udp'
+        """
+        super(SocketSource, self).__init__(**kwargs)
+        if protocol == 'tcp':
+            self.socket = socket.create_connection(address)
+        elif protocol == 'udp':
+            self.socket = socket.socket(socket.AF_INET6 if ':' in address[0] else socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.bind(address)
+        else:
+            raise RuntimeError('The socket protocol must be either tcp or udp.')
+        self.socket.setblocking(False)
+        self._protocol = protocol
+
+    def fileno(self) -> int:
+        return self.socket.fileno()
+
+    def _read_chunk(self) -> bytes:
+        if self._protocol == 'tcp':
+            return self.socket.recv(self._chunk_size)
+
+        # An empty datagram is not the end of the stream, and a datagram always ends a line
+        while True:
+            data = self.socket.recv(self._chunk_size)
+            if data:
+                return data if data.endswith(b'\n') else data + b'\n'
+
+    def write(self, data : bytes):
+        if self._protocol != 'tcp':
+            raise RuntimeError('Only TCP socket data sources can be written to.')
+        self.socket.sendall(data)
+
+    def close(self):
+        self.socket.close()
+
+
+### PTY SOURCE ###
+class PtySource(DataSource):
+    """Creates a pseudo terminal and reads lines written to it. The port_name attribute (e.g. /dev/pts/3) can be opened like a serial port by a device simulator or any other program, which makes it a local stand-in for a serial device. Data written to the source is received by whatever has port_name open.
+    """
+
+    def __init__(self, **kwargs):
+        """The constructor for the PtySource class, creates the pseudo terminal in raw mode.
+
+        Args:
+            **kwargs: passed to the DataSource constructor
+        """
+        super(PtySource, self).__init__(**kwargs)
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._slave_fd) # no echo or line ending translation, like a serial port
+        os.set_blocking(self._master_fd, False)
+        self.port_name = os.ttyname(self._slave_fd)
+
+    def fileno(self) -> int:
+        return self._master_fd
+
+    def write(self, data : bytes):
+        os.write(self._master_fd, data)
+
+    def close(self):
+        if self._master_fd is None:
+            return
+        os.close(self._master_fd)
+        os.close(self._slave_fd) # kept open until now so the reader does not see EIO each time a writer closes port_name
+        self._master_fd = None
+
+
+### FILE TAIL SOURCE ###
+class FileTailSource(DataSource):
+    """Follows a growing file, like tail -f. Regular files always appear readable to select, so instead of watch_file the file is polled with a main loop alarm. The file is reopened if it is truncated or replaced, e.g. by log rotation.
+    """
+
+    def __init__(self, path : str, from_start : bool=False, poll_period : float=0.1, **kwargs):
+        """The constructor for the FileTailSource class, opens the file.
+
+        Args:
+            path (str): the path of the file to follow
+            from_start (bool, optional): Read the existing contents of the file rather than only new data. Defaults to False.
+            poll_period (float, optional): The number of seconds between checks for new data. Defaults to 0.1.
+            **kwargs: passed to the DataSource constructor
+        """
+        super(FileTailSource, self).__init__(**kwargs)
+        self._path = path
+        self._poll_period = poll_period
+        self._alarm_handle = None
+        self._fd = None
+        self._open(from_start)
+
+    def _open(self, from_start : bool):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self._path, os.O_RDONLY)
+        self._inode = os.fstat(self._fd).st_ino
+        if not from_start:
+            os.lseek(self._fd, 0, os.SEEK_END)
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def attach(self, terminal_ui):
+        self._terminal_ui = terminal_ui
+        if self._alarm_handle is None:
+            self._alarm_handle = terminal_ui.main_loop.set_alarm_in(0, self._poll)
+
+    def detach(self):
+        if self._alarm_handle is not None:
+            self._terminal_ui.main_loop.remove_alarm(self._alarm_handle)
+            self._alarm_handle = None
+
+    def _poll(self, main_loop, user_data=None):
+        """Alarm handler that reads any new data then checks for truncation or replacement of the file."""
+
+        # reaching the end of a file being followed is not the end of the source
+        chunks = []
+        total = 0
+        while total < self._max_bytes_per_read and not self._terminal_ui.receive_would_block():
+            data = self._read_chunk()
+            if not data:
+                break
+            chunks.append(data)
+            total += len(data)
+        if chunks:
+            self.feed(b''.join(chunks))
+
+        try:
+            stat = os.stat(self._path)
+            if stat.st_ino != self._inode:
+                self._open(from_start=True)
+            elif stat.st_size < os.lseek(self._fd, 0, os.SEEK_CUR):
+                os.lseek(self._fd, 0, os.SEEK_SET)
+        except FileNotFoundError:
+            pass # replaced file not yet created, keep reading the old one
+
+        self._alarm_handle = main_loop.set_alarm_in(self._poll_period, self._poll)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import gzip
+import json
+import time
+import zlib
+import threading
+import urwid
+from typing import Callable, Tuple
+
+
+### HEADLESS SCREEN ###
+class HeadlessScreen(urwid.display_common.BaseScreen):
+    """A virtual urwid screen of a fixed size that does not require a TTY. Canvases are kept in memory rather than written to a terminal, and input is injected with feed_input. Used by TerminalUI.run(headless=True).
+    """
+
+    def __init__(self, screen_size : Tuple[int, int]=(80, 24)):
+        """The constructor for the HeadlessScreen class.
+
+        Args:
+            screen_size (Tuple[int, int], optional): The (columns, rows) size of the virtual screen. Defaults to (80, 24).
+        """
+        super(HeadlessScreen, self).__init__()
+        self._screen_size = tuple(screen_size)
+        self._canvas = None
+        self._rows = []
+        self._update_callback = None
+        self.frame_count = 0
+        self.bytes_written = 0  # estimate of the bytes a terminal would have been sent, see draw_screen
+        self.draw_callback = None # called with (size, canvas) after every frame, used for recording
+
+    def get_cols_rows(self) -> Tuple[int, int]:
+        return self._screen_size
+
+    def set_screen_size(self, screen_size : Tuple[int, int]):
+        """Resizes the virtual screen and notifies the main loop as a terminal would.
+
+        Args:
+            screen_size (Tuple[int, int]): The new (columns, rows) size of the virtual screen
+        """
+        self._screen_size = tuple(screen_size)
+        self.feed_input(['window resize'])
+
+    def hook_event_loop(self, event_loop, callback):
+        self._update_callback = callback
+
+    def unhook_event_loop(self, event_loop):
+        self._update_callback = None
+
+    def get_input_descriptors(self) -> list:
+        return []
+
+    def set_mouse_tracking(self, enable : bool=True):
+        pass
+
+    def set_input_timeouts(self, *args):
+        pass
+
+    def draw_screen(self, size : Tuple[int, int], canvas : urwid.Canvas):
+        # like raw_display only rows that differ from the last frame would be sent, each with a cursor move escape sequence
+        rows = canvas.text
+        for y, row in enumerate(rows):
+            if y >= len(self._rows) or self._rows[y] != row:
+                self.bytes_written += len(row) + len('\x1b[%d;1H'%(y+1))
+        self._rows = rows
+
+        self._canvas = canvas
+        self.frame_count += 1
+        if self.draw_callback is not None:
+            self.draw_callback(size, canvas)
+
+    def clear(self):
+        self._canvas = None
+        self._rows = []
+
+    def feed_input(self, keys : list):
+        """Injects keys into the main loop as if they had been typed. Must be called from the main loop thread.
+
+        Args:
+            keys (list): the list of urwid key strings, e.g. ['a', 'enter']
+        """
+        if self._update_callback is not None:
+            self._update_callback(keys, [])
+
+    def get_screen_text(self) -> list:
+        """Returns the text of the last drawn frame, one string per row.
+
+        Returns:
+            list: the rows of the last frame, or an empty list if nothing has been drawn yet
+        """
+        if self._canvas is None:
+            return []
+        return [row.decode('utf-8', 'replace') for row in self._canvas.text]
+
+
+### EVENT RECORDER ###
+class EventRecorder():
+    """Records a timestamped stream of TerminalUI input/output events to a file. Each event is written as a compact JSON array [seconds_since_start, kind, payload] on its own line, and the file is gzip compressed if the path ends in '.gz'.
+
+    Event kinds are 'size' (screen size), 'key' (keypresses), 'recv' (receive text), 'cmd' (commands entered), 'opt' (option change events) and 'draw' (crc32 of each drawn frame).
+    """
+
+    def __init__(self, path : str):
+        """The constructor for the EventRecorder class, opens the file for writing.
+
+        Args:
+            path (str): The path of the file to record to
+        """
+        self._file = _open_event_file(path, 'wt')
+        self._lock = threading.Lock()
+        self._start_time = time.monotonic()
+        self._encoder = json.JSONEncoder(separators=(',', ':'), default=str)
+
+    def record(self, kind : str, payload):
+        """Writes a single event to the file. Safe to call from any thread.
+
+        Args:
+            kind (str): the kind of event
+            payload: JSON serialisable event data
+        """
+        line = self._encoder.encode([round(time.monotonic() - self._start_time, 6), kind, payload])
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + '\n')
+
+    def record_frame(self, size : Tuple[int, int], canvas : urwid.Canvas):
+        """Records a 'draw' event containing the crc32 of the frame text.
+
+        Args:
+            size (Tuple[int, int]): the size the frame was drawn at
+            canvas (urwid.Canvas): the drawn canvas
+        """
+        self.record('draw', zlib.crc32(b'\n'.join(canvas.text)))
+
+    def close(self):
+        """Flushes and closes the recording file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+### EVENT REPLAYER ###
+class EventReplayer():
+    """Replays the input events ('size', 'key' and 'recv') of a file written by EventRecorder into a running TerminalUI. Output events are regenerated by the TerminalUI itself.
+    """
+
+    INPUT_EVENTS = ('size', 'key', 'recv')
+
+    def __init__(self, path : str, speed : float=1.0, done_callback : Callable[['EventReplayer'], None]=None):
+        """The constructor for the EventReplayer class, loads the input events from the file.
+
+        Args:
+            path (str): The path of the file written by EventRecorder
+            speed (float, optional): The replay speed multiplier, 1.0 replays at the recorded rate. Set to 0 to replay as fast as possible. Defaults to 1.0.
+            done_callback (Callable[[EventReplayer], None], optional): The function to call once all events have been replayed. Defaults to None.
+
+        Raises:
+            RuntimeError: if the speed is negative
+        """
+        if speed < 0:
+            raise RuntimeError('The replay speed must be 0 or greater.')
+
+        with _open_event_file(path, 'rt') as f:
+            events = (json.loads(line) for line in f if line.strip())
+            self._events = [event for event in events if event[1] in self.INPUT_EVENTS]
+
+        self._speed = speed
+        self._done_callback = done_callback
+        self._idx = 0
+        self._terminal_ui = None
+        self._start_time = 0
+        self.elapsed = None # wall clock seconds taken to replay all events
+
+    def start(self, terminal_ui):
+        """Starts replaying into the TerminalUI. The TerminalUI main loop must have been created.
+
+        Args:
+            terminal_ui (TerminalUI): the TerminalUI to replay events into
+        """
+        self._terminal_ui = terminal_ui
+        self._idx = 0
+        self._start_time = time.monotonic()
+        self._schedule_next()
+
+    def _schedule_next(self):
+        """Sets an alarm for the next event, or finishes the replay if there are no events left."""
+
+        if self._idx >= len(self._events):
+            self.elapsed = time.monotonic() - self._start_time
+            if self._done_callback is not None:
+                self._done_callback(self)
+            return
+
+        delay = 0
+        if self._speed != 0:
+            delay = max(0, self._events[self._idx][0] / self._speed - (time.monotonic() - self._start_time))
+        self._terminal_ui.main_loop.set_alarm_in(delay, self._replay_event)
+
+    def _replay_event(self, main_loop, user_data=None):
+        """Alarm handler that applies the next event then schedules the following one."""
+
+        _, kind, payload = self._events[self._idx]
+        self._idx += 1
+
+        if kind == 'key':
+            # through the input filter, as typed keys are, so global key bindings fire on replay too
+            keys = main_loop.input_filter(payload, [])
+            if keys:
+                main_loop.process_input(keys)
+        elif kind == 'recv':
+            self._terminal_ui.set_receive_text(payload[0], payload[1])
+        elif kind == 'size' and isinstance(main_loop.screen, HeadlessScreen):
+            main_loop.screen.set_screen_size(payload)
+
+        self._schedule_next()
+
+
+### HELPER FUNCTIONS ###
+def _open_event_file(path : str, mode : str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
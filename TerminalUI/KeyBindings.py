@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import urwid
+from typing import Callable
+
+
+### KEY BINDINGS ###
+class KeyBindings():
+    """A key to handler dispatch table, so handling a keypress is one or two dictionary lookups however many keys are bound.
+
+    Handlers can be bound to keys, and to urwid commands (e.g. urwid.CURSOR_UP), which apply to every key the urwid command map maps to that command when the key is pressed. Key bindings take precedence over command bindings. The bindings passed to the constructor are the defaults; bindings added with bind and bind_command are kept separately and take precedence over them, so unbinding a key restores its default handler.
+    """
+
+    def __init__(self, commands : dict=None, keys : dict=None, command_map : urwid.CommandMap=None):
+        """The constructor for the KeyBindings class.
+
+        Args:
+            commands (dict, optional): urwid command to default handler. Defaults to None.
+            keys (dict, optional): key to default handler. Defaults to None.
+            command_map (urwid.CommandMap, optional): The command map used to look up the command of a key. Defaults to None, the shared urwid.command_map.
+        """
+        self._default_commands = dict(commands or {})
+        self._default_keys = dict(keys or {})
+        self._commands = {}                 # urwid command to handler, added with bind_command
+        self._keys = {}                     # key to handler, added with bind
+        self._unbound = set()               # keys whose default handling was removed with unbind
+        self._command_map = command_map if command_map is not None else urwid.command_map
+        self._key_table = {}
+        self._command_table = {}
+        self.compile()
+
+    def compile(self):
+        """Rebuilds the key and command lookup tables from the default and added bindings."""
+
+        key_table = dict(self._default_keys)
+        key_table.update(self._keys)
+        key_table.update(dict.fromkeys(self._unbound))     # None, so the key's command binding is not looked up either
+        command_table = dict(self._default_commands)
+        command_table.update(self._commands)
+        self._key_table, self._command_table = key_table, command_table
+
+    def get(self, key : str) -> Callable:
+        """Returns the handler bound to a key, or to its urwid command, or None."""
+
+        if key in self._key_table:
+            return self._key_table[key]
+        return self._command_table.get(self._command_map[key])
+
+    def bind(self, key : str, handler : Callable):
+        """Binds a handler to a key, taking precedence over any handler bound to the key or to its urwid command."""
+
+        self._keys[key] = handler
+        self._unbound.discard(key)
+        self._key_table[key] = handler
+
+    def bind_command(self, command : str, handler : Callable):
+        """Binds a handler to an urwid command, and so to every key mapped to it."""
+
+        self._commands[command] = handler
+        self._command_table[command] = handler
+
+    def unbind(self, key : str) -> bool:
+        """Removes the handler bound to a key with bind, so its default handler applies again. If there was none, the default handler of the key is removed instead, until the key is bound again.
+
+        Returns:
+            bool: false if no handler was bound to the key
+        """
+        if self._keys.pop(key, None) is None:
+            if self.get(key) is None:
+                return False
+            self._unbound.add(key)
+        self.compile()
+        return True
+
+    def copy(self) -> 'KeyBindings':
+        """Returns a copy that can be changed without affecting this table."""
+
+        key_bindings = KeyBindings(self._default_commands, self._default_keys, self._command_map)
+        key_bindings._commands = dict(self._commands)
+        key_bindings._keys = dict(self._keys)
+        key_bindings._unbound = set(self._unbound)
+        key_bindings.compile()
+        return key_bindings
+
+    def __contains__(self, key : str) -> bool:
+        return self.get(key) is not None
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import urwid
+
+
+### LAYOUT ###
+class Layout():
+    """Builds the body of a TerminalUI from a declarative layout spec. The spec is a tree of splits and panes, each a dictionary:
+
+        {'split': 'columns' or 'rows', 'children': [...], 'weight': 1.0, 'hidden': False}
+        {'pane': name, 'weight': 1.0, 'hidden': False}
+
+    Columns places its children side by side and rows places them one above the other, sharing the space in proportion to their weights. A pane is only shown once a widget has been set for it, and a split is only shown while it has a visible child.
+
+    Each split is built once as a urwid Columns or Pile and every widget is kept whether it is shown or not. Showing or hiding a pane only updates the contents of the split that holds it (and of its parents, if the split itself is shown or hidden), so no part of the widget tree is rebuilt.
+    """
+
+    SPLITS = {'columns': urwid.Columns, 'rows': urwid.Pile}
+
+    def __init__(self, spec : dict, panes : dict=None):
+        """The constructor for the Layout class.
+
+        Args:
+            spec (dict): the layout spec, the root must be a split
+            panes (dict, optional): pane name to widget for the panes that exist now, more can be set with set_pane. Defaults to None.
+
+        Raises:
+            RuntimeError: if the spec is invalid, the root is not a split or a pane name is used more than once
+        """
+        self._panes = {}    # pane name to node
+        self._root = self._build(spec, None)
+        if 'split' not in self._root:
+            raise RuntimeError('The root of a layout must be a split.')
+        self._empty = urwid.SolidFill(' ')
+
+        for name, widget in (panes or {}).items():
+            if name in self._panes:
+                self._panes[name]['widget'] = widget
+        self._sync_all(self._root)
+
+    def _build(self, spec : dict, parent : dict) -> dict:
+        """Validates a spec node and returns the node used to track it, building the container of a split."""
+
+        if not isinstance(spec, dict) or ('split' in spec) == ('pane' in spec):
+            raise RuntimeError('Each layout node must be a dictionary with either a split or a pane key.')
+        weight = spec.get('weight', 1.0)
+        if not isinstance(weight, (int, float)) or weight <= 0:
+            raise RuntimeError('Layout weights must be numbers greater than 0.')
+
+        node = {'parent': parent, 'weight': weight, 'hidden': bool(spec.get('hidden', False)), 'widget': None}
+        if 'pane' in spec:
+            if spec['pane'] in self._panes:
+                raise RuntimeError('The pane %s is used more than once in the layout.'%(spec['pane']))
+            node['pane'] = spec['pane']
+            self._panes[spec['pane']] = node
+            return node
+
+        if spec['split'] not in self.SPLITS:
+            raise RuntimeError('Layout splits must be one of %s.'%(', '.join(self.SPLITS)))
+        node['split'] = spec['split']
+        node['widget'] = self.SPLITS[spec['split']]([])
+        node['children'] = [self._build(child, node) for child in spec.get('children', [])]
+        return node
+
+    def _visible(self, node : dict) -> bool:
+        if node['hidden']:
+            return False
+        if 'pane' in node:
+            return node['widget'] is not None
+        return bool(node['widget'].contents)
+
+    def _sync_all(self, node : dict):
+        """Fills the contents of every split, children first."""
+
+        for child in node.get('children', []):
+            if 'split' in child:
+                self._sync_all(child)
+        self._sync(node, propagate=False)
+
+    def _sync(self, node : dict, propagate : bool=True):
+        """Sets the contents of a split to its visible children, keeping the focus on the same widget if it is still shown. If the split is shown or hidden as a result, its parent is updated too."""
+
+        container = node['widget']
+        was_visible = self._visible(node)
+        focus = container.focus if container.contents else None
+
+        container.contents = [(child['widget'], container.options('weight', child['weight'])) for child in node['children'] if self._visible(child)]
+        widgets = [widget for widget, _ in container.contents]
+        if focus in widgets:
+            container.focus_position = widgets.index(focus)
+        else:
+            selectable = [position for position, widget in enumerate(widgets) if widget.selectable()]
+            if selectable:
+                container.focus_position = selectable[0]
+
+        if propagate and node['parent'] is not None and was_visible != self._visible(node):
+            self._sync(node['parent'])
+
+    @property
+    def widget(self) -> urwid.Widget:
+        """The widget for the whole layout, to be used as the body of the TerminalUI frame."""
+        return self._root['widget'] if self._visible(self._root) else self._empty
+
+    def has_pane(self, name : str) -> bool:
+        """Returns true if the layout has a slot for the pane."""
+        return name in self._panes
+
+    def set_pane(self, name : str, widget : urwid.Widget) -> bool:
+        """Sets, replaces or removes (if widget is None) the widget for a pane.
+
+        Returns:
+            bool: false if the layout has no slot for the pane, so it is not shown
+        """
+        node = self._panes.get(name)
+        if node is None:
+            return False
+        if node['widget'] is not widget:
+            node['widget'] = widget
+            self._sync(node['parent'])
+        return True
+
+    def set_visible(self, name : str, visible : bool) -> bool:
+        """Shows or hides a pane. A hidden pane keeps its widget, so it can be shown again without being rebuilt.
+
+        Returns:
+            bool: false if the layout has no slot for the pane
+        """
+        node = self._panes.get(name)
+        if node is None:
+            return False
+        if node['hidden'] == visible:
+            node['hidden'] = not visible
+            self._sync(node['parent'])
+        return True
+
+    def is_visible(self, name : str) -> bool:
+        """Returns true if the pane and all of the splits that hold it are shown."""
+
+        node = self._panes.get(name)
+        while node is not None:
+            if not self._visible(node):
+                return False
+            node = node['parent']
+        return name in self._panes
+
+    def set_weight(self, name : str, weight : float) -> bool:
+        """Sets the weight of a pane.
+
+        Returns:
+            bool: false if the layout has no slot for the pane
+        """
+        node = self._panes.get(name)
+        if node is None:
+            return False
+        if weight <= 0:
+            raise RuntimeError('Layout weights must be numbers greater than 0.')
+        node['weight'] = weight
+        self._sync(node['parent'])
+        return True
+
+    def pane_size(self, name : str, size : tuple) -> tuple:
+        """Works out the size a pane is rendered at from the size of the whole layout.
+
+        Args:
+            name (str): the name of the pane
+            size (tuple): the (columns, rows) of the whole layout
+
+        Returns:
+            tuple: the (columns, rows) of the pane, or None if the pane is not shown
+        """
+        if not self.is_visible(name):
+            return None
+
+        path = []
+        node = self._panes[name]
+        while node['parent'] is not None:
+            path.append(node)
+            node = node['parent']
+
+        cols, rows = size
+        for child in reversed(path):
+            container = child['parent']['widget']
+            position = [widget for widget, _ in container.contents].index(child['widget'])
+            if child['parent']['split'] == 'columns':
+                cols = container.column_widths((cols, rows))[position]
+            else:
+                rows = container.get_item_rows((cols, rows), False)[position]
+        return cols, rows
+
+    def to_spec(self) -> dict:
+        """Returns the current layout, including weights and hidden states, as a spec."""
+        return self._to_spec(self._root)
+
+    def _to_spec(self, node : dict) -> dict:
+        spec = {'weight': node['weight'], 'hidden': node['hidden']}
+        if 'pane' in node:
+            spec['pane'] = node['pane']
+        else:
+            spec['split'] = node['split']
+            spec['children'] = [self._to_spec(child) for child in node['children']]
+        return spec
+
+
+def default_layout(options_width_weight : float=0.3) -> dict:
+    """Returns the spec for the default TerminalUI layout, the receive, plot and status areas one above the other with the options area beside them.
+
+    Args:
+        options_width_weight (float, optional): The amount of the screen width to use for the options area. Defaults to 0.3.
+
+    Returns:
+        dict: the layout spec
+    """
+    return {'split': 'columns', 'children': [
+                {'split': 'rows', 'weight': 1-options_width_weight, 'children': [
+                    {'pane': 'receive', 'weight': 0.6},
+                    {'pane': 'plot', 'weight': 0.4},
+                    {'pane': 'status', 'weight': 0.4}]},
+                {'pane': 'options', 'weight': options_width_weight}]}
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import re
+
+
+### NUMERIC FORMAT ###
+class NumericFormat():
+    """The parsing, validation and formatting of a typed numeric option, see get_numeric_format. The characters that can be typed and the patterns that check the text being entered are compiled once per format, so each keystroke is a set lookup and a regular expression match rather than a float conversion inside a try/except.
+
+    The formats are:
+        'int': whole numbers, e.g. -12
+        'float': decimal numbers, e.g. 0.25
+        'fixed': decimal numbers with a fixed number of decimal places (digits, default 2), e.g. 1.50. Values are rounded to the decimal places, so stepping does not accumulate floating point error.
+        'hex': non-negative whole numbers shown in hexadecimal, padded to digits hex digits (default 0, no padding), e.g. 0x1F. Entry accepts an optional 0x prefix.
+    """
+    __slots__ = ('name', 'digits', 'chars', 'step', '_partial', '_complete', '_parse', '_format', '_coerce')
+
+    def __init__(self, name : str, digits : int=None):
+        """The constructor for the NumericFormat class, compiles the patterns for the format.
+
+        Args:
+            name (str): one of 'int', 'float', 'fixed' or 'hex'
+            digits (int, optional): The number of decimal places for 'fixed', or the minimum number of hex digits for 'hex'. Defaults to None, 2 for 'fixed' and 0 for 'hex'.
+
+        Raises:
+            RuntimeError: if the format is not recognised, or digits is negative
+        """
+        if name not in NUMERIC_FORMATS:
+            raise RuntimeError('The number format must be one of %s.'%(', '.join(NUMERIC_FORMATS)))
+        if digits is not None and digits < 0:
+            raise RuntimeError('The number of digits must be 0 or greater.')
+
+        self.name = name
+        if name == 'int':
+            self.digits = None
+            self.chars = frozenset('0123456789-')
+            self.step = 1
+            self._partial = re.compile(r'-?\d*')
+            self._complete = re.compile(r'-?\d+')
+            self._parse = int
+            self._format = str
+            self._coerce = lambda value: int(round(value))
+        elif name == 'float':
+            self.digits = None
+            self.chars = frozenset('0123456789.-')
+            self.step = 1
+            self._partial = re.compile(r'-?\d*\.?\d*')
+            self._complete = re.compile(r'-?(\d+\.?\d*|\.\d+)')
+            self._parse = float
+            self._format = str
+            self._coerce = float
+        elif name == 'fixed':
+            places = 2 if digits is None else digits
+            self.digits = places
+            self.chars = frozenset('0123456789.-' if places else '0123456789-')
+            self.step = 10 ** -places if places else 1
+            self._partial = re.compile(r'-?\d*\.?\d{0,%d}'%(places) if places else r'-?\d*')
+            self._complete = re.compile(r'-?(\d+\.?\d{0,%d}|\.\d{1,%d})'%(places, places) if places else r'-?\d+')
+            self._parse = lambda text: round(float(text), places)
+            self._format = lambda value: '%.*f'%(places, value)
+            self._coerce = lambda value: round(float(value), places)
+        else:
+            width = 0 if digits is None else digits
+            self.digits = width
+            self.chars = frozenset('0123456789abcdefABCDEFxX')
+            self.step = 1
+            self._partial = re.compile(r'(0[xX]?)?[0-9a-fA-F]*')
+            self._complete = re.compile(r'(0[xX])?[0-9a-fA-F]+')
+            self._parse = lambda text: int(text, 16)
+            self._format = lambda value: '0x%0*X'%(width, value)
+            self._coerce = lambda value: max(int(round(value)), 0)
+
+    def accepts(self, text : str) -> bool:
+        """Returns true if the text is a number of this format, or could become one as more characters are typed."""
+        return self._partial.fullmatch(text) is not None
+
+    def parse(self, text : str):
+        """Returns the value of the text, or None if the text is not a complete number of this format."""
+
+        if self._complete.fullmatch(text) is None:
+            return None
+        return self._parse(text)
+
+    def format(self, value) -> str:
+        """Returns the text shown for a value, without units."""
+        return self._format(value)
+
+    def coerce(self, value):
+        """Converts a value to this format, parsing it if it is a string.
+
+        Raises:
+            RuntimeError: if the value is a string that is not a number of this format
+        """
+        if isinstance(value, str):
+            parsed = self.parse(value.strip())
+            if parsed is None:
+                raise RuntimeError('%r is not a valid %s value.'%(value, self.name))
+            value = parsed
+        return self._coerce(value)
+
+
+NUMERIC_FORMATS = ('int', 'float', 'fixed', 'hex')
+_FORMAT_CACHE = {}      # (name, digits) to NumericFormat, formats are shared by every option using them
+
+
+def get_numeric_format(name : str, digits : int=None) -> NumericFormat:
+    """Returns the shared NumericFormat for a format name and number of digits, compiling it the first time it is used.
+
+    Args:
+        name (str): one of 'int', 'float', 'fixed' or 'hex'
+        digits (int, optional): The number of decimal places for 'fixed', or the minimum number of hex digits for 'hex'. Defaults to None.
+
+    Raises:
+        RuntimeError: if the format is not recognised, or digits is negative
+
+    Returns:
+        NumericFormat: the format
+    """
+    number_format = _FORMAT_CACHE.get((name, digits))
+    if number_format is None:
+        number_format = _FORMAT_CACHE[(name, digits)] = NumericFormat(name, digits)
+    return number_format
@@ -0,0 +1,470 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import json
+from typing import Union
+from TerminalUI.NumericFormats import NUMERIC_FORMATS, get_numeric_format
+
+
+### OPTION SPEC ###
+class OptionSpec():
+    """A validated description of a single user option. The type is 'list' for a list of selectable values, otherwise the type of the editable value ('int', 'float' or 'str'). An int or float option with a number_format is a typed numeric option, which only accepts numbers of that format (see NumericFormat) and can show units after the value.
+    """
+    __slots__ = ('name', 'type', 'value', 'caption', 'increment', 'limits', 'enter_fires_change_event', 'enabled', 'enabled_when', 'number_format', 'digits', 'units')
+
+    # record keys left out of to_record when they have their default value
+    OPTIONAL_DEFAULTS = {'enabled_when': None, 'number_format': None, 'digits': None, 'units': ''}
+
+    VALUE_TYPES = {list: 'list', int: 'int', float: 'float', str: 'str'}
+
+    def __init__(self, name : str, value : Union[list, int, float, str], caption : str="", increment : Union[int, float]=None, limits : list=None, enter_fires_change_event : bool=True, enabled : bool=True, type : str=None, enabled_when : dict=None, number_format : str=None, digits : int=None, units : str=''):
+        """The constructor for the OptionSpec class, validates the option data.
+
+        Args:
+            name (str): The unique name of the option
+            value (Union[list, int, float, str]): A list of selectable values or the initial editable value
+            caption (str, optional): The caption shown beside the option. Defaults to "".
+            increment (Union[int, float], optional): The step used by the left/right keys for editable values. Defaults to None.
+            limits (list, optional): The inclusive [min, max] limits for editable values, either may be None. Defaults to None.
+            enter_fires_change_event (bool, optional): Fire the change event on enter rather than as soon as the value changes. Defaults to True.
+            enabled (bool, optional): If the option is selectable. Defaults to True.
+            type (str, optional): The expected type ('list', 'int', 'float' or 'str'), checked against the value. Defaults to None.
+            enabled_when (dict, optional): Option name to the value, or list of values, it must have for this option to be enabled, e.g. {'enable_options': True}. All of the conditions must hold and the options depended on must be enabled, see OptionDependencies. Overrides enabled. Defaults to None.
+            number_format (str, optional): Makes an int or float option a typed numeric option, one of 'int', 'float', 'fixed' or 'hex'. The increment defaults to the smallest step of the format. Defaults to None.
+            digits (int, optional): The number of decimal places for the 'fixed' format, or the minimum number of hex digits for the 'hex' format. Defaults to None.
+            units (str, optional): The units shown after the value of a typed numeric option, e.g. 'mV'. Defaults to ''.
+
+        Raises:
+            RuntimeError: if the name is not a string
+            RuntimeError: if the value is not a list, int, float or str, or does not match the type
+            RuntimeError: if the limits are not a list or tuple of length 2
+            RuntimeError: if enabled_when is not a dictionary keyed by option name
+            RuntimeError: if the number format is not recognised, or is set for an option that is not an int or float
+        """
+        if not isinstance(name, str):
+            raise RuntimeError('The option name %r must be a string.'%(name,))
+
+        value_type = self.VALUE_TYPES.get(value.__class__)
+        if value_type is None:
+            raise RuntimeError('The option data for %s must be a list, int, float or str, or a tuple where the first element is a list, int, float or str'%(name))
+        if type is not None and type != value_type and not (type == 'float' and value_type == 'int'):
+            raise RuntimeError('The value for the %s option is a %s but the type is %s.'%(name, value_type, type))
+
+        if limits is None:
+            limits = [None, None]
+        elif not isinstance(limits, (list, tuple)) or len(limits) != 2:
+            raise RuntimeError('The limits for the %s option must be a list of length 2.'%(name))
+        _check_enabled_when(name, enabled_when)
+        if number_format is not None:
+            if value_type not in ('int', 'float'):
+                raise RuntimeError('The %s option must have an int or float value to use a number format.'%(name))
+            get_numeric_format(number_format, digits) # validates the format and digits
+
+        self.name = name
+        self.type = type if type is not None else value_type
+        self.value = value
+        self.caption = caption
+        self.increment = increment
+        self.limits = list(limits)
+        self.enter_fires_change_event = enter_fires_change_event
+        self.enabled = enabled
+        self.enabled_when = enabled_when
+        self.number_format = number_format
+        self.digits = digits
+        self.units = units
+
+    @classmethod
+    def from_tuple(cls, name : str, option_data) -> 'OptionSpec':
+        """Creates an OptionSpec from the positional option data format accepted by the TerminalUI constructor. Selectable list tuples are (list_of_values, caption, enter_fires_change_event, enable) and editable value tuples are (value, caption, increment, [min_limit, max_limit], enter_fires_change_event, enable).
+
+        Args:
+            name (str): The unique name of the option
+            option_data: A list, int, float or str, or a tuple where the first element is a list, int, float or str
+
+        Raises:
+            RuntimeError: if it is a selectable option list passed as part of a tuple and the tuple has a length greater than 4
+            RuntimeError: if it is an editable value option passed as part of a tuple and the tuple has a length greater than 6
+
+        Returns:
+            OptionSpec: the validated option
+        """
+        if option_data.__class__ is not tuple:
+            return cls(name, option_data)
+        if len(option_data) == 0:
+            raise RuntimeError('The tuple containing the option data for %s must not be empty.'%(name))
+
+        if option_data[0].__class__ is list:
+            if len(option_data) > 4:
+                raise RuntimeError('The tuple containing the option data when the option is a list of selectable values must have a length less of 4 or less.')
+            value, caption, enter_fires_change_event, enabled = option_data + ("", True, True)[len(option_data)-1:]
+            return cls(name, value, caption, enter_fires_change_event=enter_fires_change_event, enabled=enabled)
+
+        if len(option_data) > 6:
+            raise RuntimeError('The tuple containing the option data when the option is an editable value must have a length less of 6 or less.')
+        return cls(name, *option_data)
+
+    @classmethod
+    def from_record(cls, record : dict) -> 'OptionSpec':
+        """Creates an OptionSpec from a dictionary record with a 'name' and 'value' key, and optionally the 'type', 'caption', 'increment', 'limits', 'enter_fires_change_event' and 'enabled' keys.
+
+        Args:
+            record (dict): the option record
+
+        Raises:
+            RuntimeError: if the record is not a dictionary, is missing the name or value, or contains unknown keys
+
+        Returns:
+            OptionSpec: the validated option
+        """
+        if not isinstance(record, dict) or 'name' not in record or 'value' not in record:
+            raise RuntimeError('Each option record must be a dictionary containing a name and value.')
+        unknown = set(record) - set(cls.__slots__)
+        if unknown:
+            raise RuntimeError('Unknown keys %s in the record for the %s option.'%(sorted(unknown), record['name']))
+        return cls(**record)
+
+    def to_record(self) -> dict:
+        """Returns the option as a dictionary record, the inverse of from_record.
+
+        Returns:
+            dict: the option record
+        """
+        record = {key: getattr(self, key) for key in self.__slots__}
+        for key, default in self.OPTIONAL_DEFAULTS.items():
+            if record[key] == default:
+                del record[key]
+        return record
+
+
+### OPTION DEPENDENCIES ###
+class OptionDependencies():
+    """A compiled graph of the conditions under which options are enabled. An option with conditions is enabled when every option it depends on is enabled and has one of the required values, so disabling an option also disables the options that depend on it.
+
+    The options are put in topological order when the graph is built, and the options affected by a change to each option (those depending on it directly or through other options) are worked out once, in that order. A change therefore only re-evaluates the affected options, each after the options it depends on.
+    """
+
+    def __init__(self, conditions : dict):
+        """The constructor for the OptionDependencies class, builds the graph.
+
+        Args:
+            conditions (dict): option name to its enabled_when conditions, see OptionSpec
+
+        Raises:
+            RuntimeError: if the conditions form a cycle
+        """
+        self._conditions = {name: self._normalise(enabled_when) for name, enabled_when in conditions.items()}
+        self._compile()
+
+    @staticmethod
+    def _normalise(enabled_when : dict) -> dict:
+        # each condition becomes the tuple of allowed values
+        return {dependency: tuple(allowed) if isinstance(allowed, (list, tuple)) else (allowed,) for dependency, allowed in enabled_when.items()}
+
+    def _compile(self):
+        # direct dependents of each option
+        dependents = {}
+        for name, enabled_when in self._conditions.items():
+            for dependency in enabled_when:
+                dependents.setdefault(dependency, []).append(name)
+
+        # topological order, Kahn's algorithm
+        waiting = {name: len(enabled_when) for name, enabled_when in self._conditions.items()}
+        ready = [name for name in dependents if name not in self._conditions]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for dependent in dependents.get(name, ()):
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) < len(set(dependents) | set(self._conditions)):
+            cycle = sorted(name for name, count in waiting.items() if count > 0)
+            raise RuntimeError('The enabled_when conditions of the options %s form a cycle.'%(', '.join(cycle)))
+        self.order = tuple(name for name in order if name in self._conditions)
+        self._rank = {name: rank for rank, name in enumerate(order)}
+
+        # the options affected by a change to each option, in topological order
+        self._affected = {}
+        for name in reversed(order):
+            affected = set(dependents.get(name, ()))
+            for dependent in dependents.get(name, ()):
+                affected.update(self._affected[dependent])
+            self._affected[name] = tuple(sorted(affected, key=self._rank.__getitem__))
+
+    def __contains__(self, option_name : str) -> bool:
+        return option_name in self._conditions
+
+    def __len__(self) -> int:
+        return len(self._conditions)
+
+    def affected(self, option_names, include_changed : bool=False) -> tuple:
+        """Returns the options whose enabled state depends on any of the passed options, in the order they must be evaluated.
+
+        Args:
+            option_names: the names of the changed options
+            include_changed (bool, optional): Include the passed options that have conditions, used when options are added. Defaults to False.
+
+        Returns:
+            tuple: the names of the affected options
+        """
+        option_names = tuple(option_names)
+        if len(option_names) == 1 and not include_changed:
+            return self._affected.get(option_names[0], ())
+        affected = set()
+        for name in option_names:
+            affected.update(self._affected.get(name, ()))
+            if include_changed and name in self._conditions:
+                affected.add(name)
+        return tuple(sorted(affected, key=self._rank.__getitem__))
+
+    def is_enabled(self, option_name : str, widgets : dict) -> bool:
+        """Evaluates the conditions of an option against the current option widgets.
+
+        Args:
+            option_name (str): the name of an option with conditions
+            widgets (dict): option name to UserOption widget
+
+        Returns:
+            bool: true if every option depended on exists, is enabled and has one of the required values
+        """
+        for dependency, allowed in self._conditions[option_name].items():
+            widget = widgets.get(dependency)
+            if widget is None or not widget.selectable() or widget.get_value() not in allowed:
+                return False
+        return True
+
+    def copy(self) -> 'OptionDependencies':
+        """Returns a copy of the graph, without building it again, that can be changed with set_conditions without changing this graph."""
+
+        copied = OptionDependencies.__new__(OptionDependencies)
+        copied._conditions = dict(self._conditions)
+        copied.order, copied._rank, copied._affected = self.order, self._rank, self._affected   # replaced, never changed, by _compile
+        return copied
+
+    def set_conditions(self, option_name : str, enabled_when : dict):
+        """Sets, or removes if None, the conditions of an option and rebuilds the graph, used when options are added or removed at runtime.
+
+        Raises:
+            RuntimeError: if the conditions would form a cycle, in which case the graph is unchanged
+        """
+        previous = self._conditions.pop(option_name, None)
+        if enabled_when:
+            self._conditions[option_name] = self._normalise(enabled_when)
+        try:
+            self._compile()
+        except RuntimeError:
+            self._conditions.pop(option_name, None)
+            if previous is not None:
+                self._conditions[option_name] = previous
+            self._compile()
+            raise
+
+
+### GROUP SPEC ###
+class GroupSpec():
+    """A validated group of options, shown in the options area with an optional title and an optional blank row after it."""
+    __slots__ = ('name', 'options', 'show_title', 'divider_on')
+
+    def __init__(self, name : str, options : list, show_title : bool=True, divider_on : bool=True):
+        """The constructor for the GroupSpec class.
+
+        Args:
+            name (str): The group name, used as the title
+            options (list): The list of OptionSpec within the group
+            show_title (bool, optional): Show the group name above the options. Defaults to True.
+            divider_on (bool, optional): Leave a blank row after the options. Defaults to True.
+        """
+        self.name = name
+        self.options = options
+        self.show_title = show_title
+        self.divider_on = divider_on
+
+    def to_record(self) -> dict:
+        """Returns the group as a dictionary record.
+
+        Returns:
+            dict: the group record
+        """
+        return {'name': self.name, 'show_title': self.show_title, 'divider_on': self.divider_on, 'options': [option.to_record() for option in self.options]}
+
+
+### OPTION SCHEMA ###
+class OptionSchema():
+    """A validated and compiled set of option groups. Build one with from_dict, from_json or from_toml and pass it as the options argument of the TerminalUI constructor; it can be reused across TerminalUI instances without being validated again.
+    """
+
+    def __init__(self, groups : list):
+        """The constructor for the OptionSchema class, validates that all option names are unique and builds the name index.
+
+        Args:
+            groups (list): The list of GroupSpec
+
+        Raises:
+            RuntimeError: if all options names are not unique
+            RuntimeError: if an option is enabled by an option that does not exist, or the enabled_when conditions form a cycle
+        """
+        self.groups = groups
+        self.options = {}
+        for group in groups:
+            for option in group.options:
+                if option.name in self.options:
+                    raise RuntimeError('All option names must be unique.')
+                self.options[option.name] = option
+        self._dependencies = None
+        self.dependencies()
+
+    def set_enabled_when(self, option_name : str, enabled_when : dict):
+        """Sets, or removes if None, the conditions under which an option is enabled, see OptionSpec.
+
+        Args:
+            option_name (str): the name of the option
+            enabled_when (dict): option name to the value, or list of values, it must have for the option to be enabled
+
+        Raises:
+            RuntimeError: if no option exists with the passed option_name, or the conditions are invalid or form a cycle
+        """
+        if option_name not in self.options:
+            raise RuntimeError('No option with the name %s exists.'%(option_name))
+        _check_enabled_when(option_name, enabled_when)
+
+        previous = self.options[option_name].enabled_when
+        self.options[option_name].enabled_when = enabled_when
+        self._dependencies = None
+        try:
+            self.dependencies()
+        except RuntimeError:
+            self.options[option_name].enabled_when = previous
+            self._dependencies = None
+            raise
+
+    def dependencies(self) -> 'OptionDependencies':
+        """Returns the compiled dependency graph of the enabled_when conditions, built once and reused until the conditions change.
+
+        Raises:
+            RuntimeError: if an option is enabled by an option that does not exist, or the conditions form a cycle
+
+        Returns:
+            OptionDependencies: the dependency graph
+        """
+        if self._dependencies is None:
+            conditions = {name: option.enabled_when for name, option in self.options.items() if option.enabled_when}
+            for name, enabled_when in conditions.items():
+                for dependency in enabled_when:
+                    if dependency not in self.options:
+                        raise RuntimeError('The %s option is enabled by the %s option, which does not exist.'%(name, dependency))
+            self._dependencies = OptionDependencies(conditions)
+        return self._dependencies
+
+    def __len__(self) -> int:
+        return len(self.options)
+
+    def __contains__(self, option_name : str) -> bool:
+        return option_name in self.options
+
+    def __getitem__(self, option_name : str) -> OptionSpec:
+        return self.options[option_name]
+
+    @classmethod
+    def from_dict(cls, options : dict) -> 'OptionSchema':
+        """Creates an OptionSchema from either the options dictionary format accepted by the TerminalUI constructor (see examples/option_example.py), or a record format of the form {'groups': [{'name': ..., 'show_title': ..., 'divider_on': ..., 'options': [option_record, ...]}, ...]} where each option record is described by OptionSpec.from_record.
+
+        Args:
+            options (dict): the options dictionary
+
+        Raises:
+            RuntimeError: if the options is not a dictionary
+            RuntimeError: if the value for each key in options is not a dictionary or a tuple
+            RuntimeError: if the length of the tuple for the group name key value has a length greater than 3
+
+        Returns:
+            OptionSchema: the validated schema
+        """
+        if not isinstance(options, dict):
+            raise RuntimeError('The passed options must be a dictionary')
+
+        if isinstance(options.get('groups'), list):
+            return cls([cls._group_from_record(record) for record in options['groups']])
+
+        groups = []
+        for group_key, group_data in options.items():
+            show_title = True
+            divider_on = True
+            if group_data.__class__ is tuple:
+                if len(group_data) > 3:
+                    raise RuntimeError('The length of the tuple for the value field for the %s key must have a length no greater than 3'%(group_key))
+                if len(group_data) > 1:
+                    show_title = group_data[1]
+                if len(group_data) > 2:
+                    divider_on = group_data[2]
+                group_data = group_data[0]
+            if not isinstance(group_data, dict):
+                raise RuntimeError('The value of the %s key within options should be dictionary or a tuple.'%(group_key))
+
+            groups.append(GroupSpec(group_key, [OptionSpec.from_tuple(name, data) for name, data in group_data.items()], show_title, divider_on))
+
+        return cls(groups)
+
+    @classmethod
+    def _group_from_record(cls, record : dict) -> GroupSpec:
+        if not isinstance(record, dict) or 'name' not in record:
+            raise RuntimeError('Each group record must be a dictionary containing a name.')
+        options = [OptionSpec.from_record(option) for option in record.get('options', [])]
+        return GroupSpec(record['name'], options, record.get('show_title', True), record.get('divider_on', True))
+
+    @classmethod
+    def from_json(cls, path : str) -> 'OptionSchema':
+        """Creates an OptionSchema from a JSON file in the record format described by from_dict.
+
+        Args:
+            path (str): the path of the JSON file
+
+        Returns:
+            OptionSchema: the validated schema
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_toml(cls, path : str) -> 'OptionSchema':
+        """Creates an OptionSchema from a TOML file in the record format described by from_dict, i.e. a [[groups]] array of tables each containing an [[groups.options]] array of tables. Uses tomllib on Python 3.11+, else the tomli package.
+
+        Args:
+            path (str): the path of the TOML file
+
+        Raises:
+            RuntimeError: if no TOML parser is available
+
+        Returns:
+            OptionSchema: the validated schema
+        """
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise RuntimeError('Loading options from TOML requires Python 3.11+ or the tomli package.')
+
+        with open(path, 'rb') as f:
+            return cls.from_dict(tomllib.load(f))
+
+    def to_dict(self) -> dict:
+        """Returns the schema in the record format described by from_dict, suitable for json.dump.
+
+        Returns:
+            dict: the schema records
+        """
+        return {'groups': [group.to_record() for group in self.groups]}
+
+
+### HELPER FUNCTIONS ###
+def _check_enabled_when(name : str, enabled_when : dict):
+    """Raises a RuntimeError if the enabled_when conditions of an option are not a dictionary keyed by option name, or the option depends on itself."""
+
+    if enabled_when is None:
+        return
+    if not isinstance(enabled_when, dict) or not all(isinstance(key, str) for key in enabled_when):
+        raise RuntimeError('The enabled_when conditions for the %s option must be a dictionary keyed by option name.'%(name))
+    if name in enabled_when:
+        raise RuntimeError('The %s option can not be enabled by itself.'%(name))
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import math
+import array
+import threading
+import collections
+import urwid
+from typing import Tuple, Union
+
+
+### SERIES BUFFER ###
+class SeriesBuffer():
+    """A fixed size ring buffer of numeric samples held in an array('d'). Samples can be added from any thread. The min/max of each plotted column is cached, so drawing a plot only has to look at the samples added since the last draw.
+    """
+
+    def __init__(self, capacity : int=4096):
+        """The constructor for the SeriesBuffer class.
+
+        Args:
+            capacity (int, optional): The number of most recent samples retained. Defaults to 4096.
+
+        Raises:
+            RuntimeError: if the capacity is less than 1
+        """
+        if capacity < 1:
+            raise RuntimeError('The series capacity must be 1 or greater.')
+        self.capacity = capacity
+        self.total = 0                      # samples added since creation, sample i is held at i % capacity
+        self._data = array.array('d', bytes(8 * capacity))
+        self._lock = threading.Lock()
+
+        # min/max decimation cache, complete columns only
+        self._columns = None
+        self._column_cache = collections.deque()
+        self._column_cache_end = 0          # the index of the column after the last cached column
+
+    def extend(self, samples : Union[list, array.array, memoryview]):
+        """Adds samples. NaN and infinite samples can not be plotted so are discarded. Only the last capacity samples of a large batch are copied.
+
+        Args:
+            samples (Union[list, array.array, memoryview]): the samples, any sequence of numbers
+        """
+        if not (isinstance(samples, array.array) and samples.typecode == 'd'):
+            samples = array.array('d', samples)
+        # the sum is only non finite if a sample is, or in the rare case the sum overflows, so batches are only filtered sample by sample when needed
+        if not math.isfinite(sum(samples)):
+            samples = array.array('d', (sample for sample in samples if math.isfinite(sample)))
+
+        with self._lock:
+            count = len(samples)
+            if count > self.capacity:
+                samples = samples[-self.capacity:]
+            self._write(self.total + count - len(samples), samples)
+            self.total += count
+
+    def _write(self, start : int, samples : array.array):
+        offset = start % self.capacity
+        first = min(len(samples), self.capacity - offset)
+        self._data[offset:offset+first] = samples[:first]
+        self._data[:len(samples)-first] = samples[first:]
+
+    def _range(self, start : int, stop : int) -> array.array:
+        """Returns the retained samples in [start, stop), oldest first. Called with the lock held."""
+
+        start = max(start, self.total - self.capacity, 0)
+        stop = min(stop, self.total)
+        if start >= stop:
+            return array.array('d')
+        offset = start % self.capacity
+        end = offset + stop - start
+        if end <= self.capacity:
+            return self._data[offset:end]
+        return self._data[offset:] + self._data[:end-self.capacity]
+
+    def last(self) -> float:
+        """Returns the most recent sample, or None if there are no samples."""
+
+        with self._lock:
+            return self._data[(self.total - 1) % self.capacity] if self.total else None
+
+    def decimate(self, columns : int) -> list:
+        """Splits the retained samples into columns of capacity / columns samples and returns the min and max of each column. Columns that are complete are cached, so only new samples are looked at.
+
+        Args:
+            columns (int): the number of columns, e.g. the plot width
+
+        Returns:
+            list: a (min, max) tuple for each column holding samples, oldest first
+        """
+        samples_per_column = -(-self.capacity // columns)
+        with self._lock:
+            if not self.total:
+                return []
+            if columns != self._columns:
+                self._columns = columns
+                self._column_cache = collections.deque(maxlen=columns)
+                self._column_cache_end = 0
+
+            # only the columns that can still be shown are worked out
+            last_column = (self.total - 1) // samples_per_column
+            first_column = max(last_column - columns + 1, max(self.total - self.capacity, 0) // samples_per_column)
+            if self._column_cache_end < first_column:
+                self._column_cache.clear()
+                self._column_cache_end = first_column
+
+            while self._column_cache_end < last_column:
+                column = self._range(self._column_cache_end * samples_per_column, (self._column_cache_end + 1) * samples_per_column)
+                self._column_cache.append((min(column), max(column)))
+                self._column_cache_end += 1
+
+            partial = self._range(last_column * samples_per_column, self.total)
+            cached = list(self._column_cache)[max(first_column - (self._column_cache_end - len(self._column_cache)), 0):]
+        return cached + [(min(partial), max(partial))]
+
+
+### PLOT PANE ###
+class PlotPane(urwid.Widget):
+    """A box widget that plots one or more numeric series, one above the other, each with a summary line showing its latest, minimum and maximum value. Series are plotted as sparklines (block characters) or braille plots (2x4 dots per character). Each series is decimated to the pane width with min/max decimation, so the cost of drawing depends on the pane size rather than the number of samples.
+    """
+    _sizing = frozenset(['box'])
+
+    STYLES = ('sparkline', 'braille')
+    _BLOCKS = ' ▁▂▃▄▅▆▇█'
+    _BRAILLE_BITS = ((0x01, 0x02, 0x04, 0x40), (0x08, 0x10, 0x20, 0x80)) # [dot column][dot row]
+
+    def __init__(self, series : list=None, style : str='sparkline', capacity : int=4096):
+        """The constructor for the PlotPane class.
+
+        Args:
+            series (list, optional): the names of the series to plot, more can be added with add_series. Defaults to None.
+            style (str, optional): 'sparkline' or 'braille'. Defaults to 'sparkline'.
+            capacity (int, optional): The number of most recent samples retained for each series. Defaults to 4096.
+
+        Raises:
+            RuntimeError: if the style is not recognised
+        """
+        self._series = {}   # series name to SeriesBuffer
+        self._limits = {}   # series name to (minimum, maximum) y axis limits, or None to fit to the plotted samples
+        self._changed = False
+        self._capacity = capacity
+        self.set_style(style)
+        for name in series or []:
+            self.add_series(name)
+
+    def set_style(self, style : str):
+        """Sets how series are plotted.
+
+        Args:
+            style (str): 'sparkline' or 'braille'
+
+        Raises:
+            RuntimeError: if the style is not recognised
+        """
+        if style not in self.STYLES:
+            raise RuntimeError('The plot style must be one of %s.'%(', '.join(self.STYLES)))
+        self._style = style
+        self._invalidate()
+
+    def add_series(self, name : str, capacity : int=None, limits : Tuple[float, float]=None):
+        """Adds a series to the bottom of the plot.
+
+        Args:
+            name (str): the unique name of the series
+            capacity (int, optional): The number of most recent samples retained, the pane capacity if None. Defaults to None.
+            limits (Tuple[float, float], optional): Fixed (minimum, maximum) y axis limits, fitted to the plotted samples if None. Defaults to None.
+
+        Raises:
+            RuntimeError: if a series with the same name already exists
+        """
+        if name in self._series:
+            raise RuntimeError('A series with the name %s already exists.'%(name))
+        self._series[name] = SeriesBuffer(capacity or self._capacity)
+        self._limits[name] = limits
+        self._invalidate()
+
+    def remove_series(self, name : str) -> bool:
+        """Removes a series from the plot.
+
+        Returns:
+            bool: true if the series was removed, false if no series exists with the passed name
+        """
+        if self._series.pop(name, None) is None:
+            return False
+        del self._limits[name]
+        self._invalidate()
+        return True
+
+    def add_samples(self, name : str, samples : Union[list, array.array, memoryview]):
+        """Adds samples to a series. Safe to call from any thread, the plot is redrawn after the next call to refresh.
+
+        Args:
+            name (str): the name of the series
+            samples (Union[list, array.array, memoryview]): the samples, any sequence of numbers
+
+        Raises:
+            RuntimeError: if no series exists with the passed name
+        """
+        series = self._series.get(name)
+        if series is None:
+            raise RuntimeError('No series with the name %s exists.'%(name))
+        series.extend(samples)
+        self._changed = True
+
+    def refresh(self) -> bool:
+        """Marks the pane for redrawing if samples have been added since the last refresh. Must be called from the main loop thread.
+
+        Returns:
+            bool: true if samples had been added
+        """
+        if not self._changed:
+            return False
+        self._changed = False
+        self._invalidate()
+        return True
+
+    def render(self, size, focus=False):
+        maxcol, maxrow = size
+        lines = []
+        if self._series and maxcol > 0:
+            rows = maxrow // len(self._series)
+            for name, series in self._series.items():
+                if rows < 1:
+                    break
+                lines.extend(self._render_series(name, series, maxcol, rows))
+
+        lines.extend([''] * (maxrow - len(lines)))
+        return urwid.Text('\n'.join(lines[:maxrow]), wrap='clip').render((maxcol,))
+
+    def _render_series(self, name : str, series : SeriesBuffer, cols : int, rows : int) -> list:
+        """Returns the summary line and plot rows for a series."""
+
+        dot_cols = 2 * cols if self._style == 'braille' else cols
+        columns = series.decimate(dot_cols)
+        if not columns:
+            return [name] + [''] * (rows - 1)
+
+        low = min(column[0] for column in columns)
+        high = max(column[1] for column in columns)
+        summary = '%s  last %.6g  min %.6g  max %.6g'%(name, series.last(), low, high)
+        if self._limits[name] is not None:
+            low, high = self._limits[name]
+        span = (high - low) or 1.0
+
+        plot_rows = rows - 1
+        if plot_rows < 1:
+            return [summary]
+        if self._style == 'sparkline':
+            return [summary] + self._sparkline(columns, low, span, plot_rows)
+        return [summary] + self._braille(columns, low, span, plot_rows)
+
+    def _sparkline(self, columns : list, low : float, span : float, rows : int) -> list:
+        """Plots the maximum of each column as a bar, in eighths of a row."""
+
+        levels = rows * 8
+        heights = [min(max(int(round((column[1] - low) / span * levels)), 0), levels) for column in columns]
+        lines = []
+        for row in range(rows - 1, -1, -1):
+            base = row * 8
+            lines.append(''.join(self._BLOCKS[min(max(height - base, 0), 8)] for height in heights))
+        return lines
+
+    def _braille(self, columns : list, low : float, span : float, rows : int) -> list:
+        """Plots each column as a vertical line of dots from its minimum to its maximum."""
+
+        dot_rows = rows * 4
+        cells = [[0] * ((len(columns) + 1) // 2) for _ in range(rows)]
+        for x, (minimum, maximum) in enumerate(columns):
+            top = min(max(int((1 - (maximum - low) / span) * (dot_rows - 1) + 0.5), 0), dot_rows - 1)
+            bottom = min(max(int((1 - (minimum - low) / span) * (dot_rows - 1) + 0.5), 0), dot_rows - 1)
+            bits = self._BRAILLE_BITS[x % 2]
+            for y in range(top, bottom + 1):
+                cells[y // 4][x // 2] |= bits[y % 4]
+        return [''.join(chr(0x2800 + cell) for cell in row) for row in cells]
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import os
+import csv
+import json
+import stat
+import time
+import array
+import secrets
+import itertools
+import contextlib
+import threading
+import collections
+from typing import Callable
+
+
+### RECEIVE BUFFER ###
+class ReceiveBuffer():
+    """Holds the lines received by a TerminalUI. Producers on any thread push lines into a pending queue, and the TerminalUI main loop drains the queue into the retained history once per frame, so the cost of updating the screen does not grow with the rate lines arrive. The time.monotonic() time each line was pushed is kept in a compact array('d') alongside the text.
+
+    When the pending queue reaches the high water mark the overload policy decides what happens to new lines:
+        'block': the producer waits until the main loop has drained the queue (producers on the main loop thread are never blocked)
+        'drop_oldest': the oldest pending lines are discarded to make room
+        'drop_newest': the new lines are discarded
+        'sample': only 1 in every sample_n new lines is kept
+    """
+
+    POLICIES = ('block', 'drop_oldest', 'drop_newest', 'sample')
+    TIMESTAMP_MODES = ('hidden', 'absolute', 'delta')
+
+    def __init__(self, history_size : int=1000, policy : str='drop_oldest', high_water : int=100000, sample_n : int=10):
+        """The constructor for the ReceiveBuffer class.
+
+        Args:
+            history_size (int, optional): The maximum number of lines to retain. Defaults to 1000.
+            policy (str, optional): The overload policy, one of 'block', 'drop_oldest', 'drop_newest' or 'sample'. Defaults to 'drop_oldest'.
+            high_water (int, optional): The number of pending lines at which the overload policy applies. Defaults to 100000.
+            sample_n (int, optional): Keep 1 in every sample_n lines when the policy is 'sample'. Defaults to 10.
+        """
+        self.history_size = history_size
+        self._lines = []                    # retained lines, only the last history_size are used, trimmed in blocks
+        self._times = array.array('d')      # monotonic time each retained line was pushed
+        self._wall_clock_offset = time.time() - time.monotonic()
+        self._pending = collections.deque()
+        self._pending_times = collections.deque()
+        self._pending_clear = False
+        self._condition = threading.Condition(threading.Lock())
+        self._sample_count = 0
+        self.dropped = 0
+        self.last_drained = ()              # the lines added by the last drain
+        self.last_drained_times = ()        # monotonic time each of those lines was pushed
+        self.last_cleared = False           # the history was cleared by the last drain
+        self.set_policy(policy, high_water, sample_n)
+
+    def set_policy(self, policy : str, high_water : int=None, sample_n : int=None):
+        """Sets the overload policy.
+
+        Args:
+            policy (str): one of 'block', 'drop_oldest', 'drop_newest' or 'sample'
+            high_water (int, optional): The number of pending lines at which the overload policy applies, unchanged if None. Defaults to None.
+            sample_n (int, optional): Keep 1 in every sample_n lines when the policy is 'sample', unchanged if None. Defaults to None.
+
+        Raises:
+            RuntimeError: if the policy is not recognised, or high_water or sample_n is less than 1
+        """
+        if policy not in self.POLICIES:
+            raise RuntimeError('The receive policy must be one of %s.'%(', '.join(self.POLICIES)))
+        if (high_water is not None and high_water < 1) or (sample_n is not None and sample_n < 1):
+            raise RuntimeError('The high water mark and sample rate must be 1 or greater.')
+
+        with self._condition:
+            self.policy = policy
+            if high_water is not None:
+                self.high_water = high_water
+            if sample_n is not None:
+                self.sample_n = sample_n
+            self._condition.notify_all()
+
+    def is_full(self) -> bool:
+        """Returns true if the pending queue has reached the high water mark."""
+        return len(self._pending) >= self.high_water
+
+    def push(self, lines : list, clear : bool=False, can_block : bool=True):
+        """Queues lines to be added to the history on the next drain. Safe to call from any thread.
+
+        Args:
+            lines (list): the lines to add
+            clear (bool, optional): Clear the history, and any lines still pending, before adding the lines. Defaults to False.
+            can_block (bool, optional): Allow the 'block' policy to wait, must be false on the thread that drains the buffer. Defaults to True.
+        """
+        now = time.monotonic()
+        with self._condition:
+            if clear:
+                self._pending.clear()
+                self._pending_times.clear()
+                self._pending_clear = True
+
+            space = self.high_water - len(self._pending)
+            if len(lines) <= space:
+                self._extend_pending(lines, now)
+            elif self.policy == 'block':
+                while can_block and len(self._pending) >= self.high_water:
+                    self._condition.wait()
+                self._extend_pending(lines, now)
+            elif self.policy == 'drop_oldest':
+                overflow = len(self._pending) + len(lines) - self.high_water
+                if overflow >= len(self._pending):
+                    self._pending.clear()
+                    self._pending_times.clear()
+                    self._extend_pending(lines[-self.high_water:], now)
+                else:
+                    for _ in range(overflow):
+                        self._pending.popleft()
+                        self._pending_times.popleft()
+                    self._extend_pending(lines, now)
+                self.dropped += overflow
+            elif self.policy == 'drop_newest':
+                space = max(space, 0)
+                self._extend_pending(lines[:space], now)
+                self.dropped += len(lines) - space
+            else:
+                space = max(space, 0)
+                offset = (-self._sample_count) % self.sample_n
+                kept = lines[space+offset::self.sample_n]
+                self._extend_pending(lines[:space], now)
+                self._extend_pending(kept, now)
+                self._sample_count += len(lines) - space
+                self.dropped += len(lines) - space - len(kept)
+
+    def _extend_pending(self, lines : list, now : float):
+        self._pending.extend(lines)
+        self._pending_times.extend(itertools.repeat(now, len(lines)))
+
+    def drain(self) -> bool:
+        """Moves the pending lines into the history and wakes any blocked producers. Called by the TerminalUI main loop.
+
+        Returns:
+            bool: true if the history changed
+        """
+        with self._condition:
+            if not self._pending and not self._pending_clear:
+                return False
+            pending, self._pending = self._pending, collections.deque()
+            pending_times, self._pending_times = self._pending_times, collections.deque()
+            clear, self._pending_clear = self._pending_clear, False
+            self._condition.notify_all()
+
+        # a lone blank line is replaced rather than appended to
+        if clear or (len(self) == 1 and self._lines[-1].strip() == ''):
+            del self._lines[:]
+            del self._times[:]
+        self._lines.extend(pending)
+        self._times.extend(pending_times)
+        self.last_drained = pending
+        self.last_drained_times = pending_times
+        self.last_cleared = clear
+
+        # trim in blocks so the cost of discarding old lines is spread over many drains
+        if len(self._lines) >= 2 * self.history_size:
+            excess = len(self._lines) - self.history_size
+            del self._lines[:excess]
+            del self._times[:excess]
+        return True
+
+    def tail(self, count : int, timestamp_mode : str='hidden') -> list:
+        """Returns the most recent lines of the history, formatting the timestamps of only those lines.
+
+        Args:
+            count (int): the maximum number of lines to return
+            timestamp_mode (str, optional): 'hidden' for no timestamp, 'absolute' to prefix each line with the local time it was received, or 'delta' to prefix each line with the seconds since the previous line. Defaults to 'hidden'.
+
+        Returns:
+            list: the lines, oldest first
+        """
+        start = len(self._lines) - min(count, len(self))
+        lines = self._lines[start:]
+        if timestamp_mode == 'hidden' or not lines:
+            return lines
+
+        times = self._times
+        if timestamp_mode == 'absolute':
+            formatted = []
+            for t, line in zip(times[start:], lines):
+                t += self._wall_clock_offset
+                formatted.append('%s.%03d %s'%(time.strftime('%H:%M:%S', time.localtime(t)), int(t % 1 * 1000), line))
+            return formatted
+
+        # delta, the first retained line has nothing before it so shows a delta of 0
+        previous = times[start-1] if start > len(self._lines) - len(self) else times[start]
+        formatted = []
+        for t, line in zip(times[start:], lines):
+            formatted.append('+%.6f %s'%(t - previous, line))
+            previous = t
+        return formatted
+
+    def snapshot(self) -> tuple:
+        """Returns a copy of the retained history that is safe to read from another thread while the history keeps changing. Only references to the lines are copied, so this is cheap enough to call from the main loop.
+
+        Returns:
+            tuple: (lines, times, wall_clock_offset) where times are monotonic and adding wall_clock_offset gives time.time() values
+        """
+        start = len(self._lines) - len(self)
+        return self._lines[start:], self._times[start:], self._wall_clock_offset
+
+    def __len__(self) -> int:
+        return min(len(self._lines), self.history_size)
+
+
+### EXPORT FUNCTIONS ###
+EXPORT_FORMATS = ('text', 'jsonl', 'csv')
+
+def export_history(path : str, lines : list, times : array.array, wall_clock_offset : float, fmt : str='text', progress_callback : Callable[[int, int], None]=None, chunk_size : int=10000):
+    """Writes received lines and the time each was received to a file, a chunk at a time. The file is written to a temporary file which is renamed over path once complete. Intended to be run on a worker thread with the values returned by ReceiveBuffer.snapshot.
+
+    Formats are:
+        'text': one line per received line, prefixed with its local date and time
+        'jsonl': one JSON object per line of the form {"time": unix_time, "line": text}
+        'csv': a header row then time, line rows where time is the local ISO 8601 date and time
+
+    Args:
+        path (str): the path of the file to write
+        lines (list): the received lines
+        times (array.array): the monotonic time each line was received
+        wall_clock_offset (float): added to the monotonic times to give time.time() values
+        fmt (str, optional): one of 'text', 'jsonl' or 'csv'. Defaults to 'text'.
+        progress_callback (Callable[[int, int], None], optional): called with (lines_written, total_lines) after each chunk. Defaults to None.
+        chunk_size (int, optional): the number of lines formatted and written at a time. Defaults to 10000.
+
+    Raises:
+        RuntimeError: if the format is not recognised
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise RuntimeError('The export format must be one of %s.'%(', '.join(EXPORT_FORMATS)))
+
+    with atomic_open(path, 'w', encoding='utf-8', newline='' if fmt == 'csv' else None) as f:
+        writer = csv.writer(f) if fmt == 'csv' else None
+        if writer is not None:
+            writer.writerow(('time', 'line'))
+
+        for start in range(0, len(lines), chunk_size):
+            end = min(start + chunk_size, len(lines))
+            chunk_times = [t + wall_clock_offset for t in times[start:end]]
+            chunk_lines = lines[start:end]
+
+            if fmt == 'jsonl':
+                f.writelines('%s\n'%json.dumps({'time': t, 'line': line}) for t, line in zip(chunk_times, chunk_lines))
+            elif fmt == 'csv':
+                writer.writerows((_format_time(t, 'T'), line) for t, line in zip(chunk_times, chunk_lines))
+            else:
+                f.writelines('%s %s\n'%(_format_time(t, ' '), line) for t, line in zip(chunk_times, chunk_lines))
+
+            if progress_callback is not None:
+                progress_callback(end, len(lines))
+
+@contextlib.contextmanager
+def atomic_open(path : str, mode : str='w', **kwargs):
+    """Opens a temporary file in the same directory as path for writing, which is flushed to disk and renamed over path when the with block completes, or removed if it raises, so readers only ever see a complete file. The temporary file is created with the permissions open would give a new file, or those of the file being replaced.
+
+    Args:
+        path (str): the path of the file to write
+        mode (str, optional): the mode passed to open, must be a write mode. Defaults to 'w'.
+        **kwargs: passed to open, e.g. encoding
+
+    Yields:
+        file: the open temporary file
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    while True:
+        tmp_path = os.path.join(directory, '.%s.%s.tmp'%(name, secrets.token_hex(4)))
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)    # the umask is applied as for any new file
+            break
+        except FileExistsError:
+            continue
+
+    try:
+        try:
+            with contextlib.suppress(FileNotFoundError):
+                os.fchmod(fd, stat.S_IMODE(os.stat(path).st_mode))
+            with open(fd, mode, closefd=False, **kwargs) as f:    # the descriptor is closed below, even if open raises
+                yield f
+                f.flush()
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _format_time(t : float, separator : str) -> str:
+    return '%s.%03d'%(time.strftime('%Y-%m-%d' + separator + '%H:%M:%S', time.localtime(t)), int(t % 1 * 1000))
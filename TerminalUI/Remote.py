@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import os
+import json
+import errno
+import stat
+import time
+import socket
+import collections
+from typing import Tuple, Union
+from TerminalUI.DataSources import DataSource
+
+
+### REMOTE SERVER ###
+class RemoteServer():
+    """Publishes a TerminalUI session to viewer clients over a Unix domain socket or a TCP socket, see TerminalUI.start_server and RemoteSource.
+
+    Updates made during a frame (received lines, option changes and command debug text) are collected and serialized once, as a single JSON line, when the frame is drawn. The same bytes are queued for every client. Sockets are non-blocking and each client's queue is flushed as far as the socket allows once per frame, so a slow client never stalls the main loop. A client whose queue grows beyond max_backlog bytes has it discarded and is sent a snapshot of the current state instead, so it catches up rather than falling further behind.
+
+    Every frame is a JSON object with a 't' key (the time.time() of the frame) and any of:
+        'snapshot': true if the frame is the whole state rather than the changes, sent when a client connects or falls behind
+        'title': the TerminalUI title, in snapshots
+        'clear': true if the receive textbox was cleared before the lines were added
+        'recv': a list of received lines
+        'opt': option name to option state, as returned by UserOption.get_state
+        'debug': the command debug text
+    """
+
+    def __init__(self, address : Union[str, Tuple[str, int]], max_backlog : int=1048576):
+        """The constructor for the RemoteServer class, creates the listening socket.
+
+        Args:
+            address (Union[str, Tuple[str, int]]): the path of a Unix domain socket, which only the current user can connect to, or a (host, port) to listen on with TCP. Use a host of '127.0.0.1' to only allow local clients.
+            max_backlog (int, optional): The number of bytes queued for a client before it is treated as too slow and resynchronised with a snapshot. Defaults to 1048576.
+
+        Raises:
+            RuntimeError: if the Unix domain socket path exists and is not a socket, or another server is listening on it
+        """
+        if isinstance(address, str):
+            _remove_stale_socket(address)   # left behind by a previous session
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.socket = socket.socket(socket.AF_INET6 if ':' in address[0] else socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind(address)
+        if isinstance(address, str):
+            os.chmod(address, 0o600)    # before listening, so no client can connect while the umask permissions apply
+            socket_stat = os.stat(address)
+        self.socket.listen()
+        self.socket.setblocking(False)
+
+        self.address = self.socket.getsockname()
+        self._path = address if isinstance(address, str) else None
+        self._socket_id = (socket_stat.st_dev, socket_stat.st_ino) if self._path is not None else None     # to not remove a later server's socket at the same path
+        self._max_backlog = max_backlog
+        self._terminal_ui = None
+        self._watch_handle = None
+        self._clients = {}      # client socket to its _RemoteClient
+        self._lines = []        # received lines since the last frame
+        self._clear = False
+        self._options = {}      # option name to state, changed since the last frame
+        self._debug = None      # command debug text, if changed since the last frame
+        self.frames_sent = 0
+        self.resyncs = 0
+
+    def attach(self, terminal_ui):
+        """Starts accepting clients. Called by TerminalUI once its main loop exists."""
+
+        self._terminal_ui = terminal_ui
+        if self._watch_handle is None:
+            self._watch_handle = terminal_ui.main_loop.watch_file(self.socket.fileno(), self._on_connect)
+
+    def detach(self):
+        """Stops accepting clients and disconnects the connected clients."""
+
+        if self._watch_handle is not None:
+            self._terminal_ui.main_loop.remove_watch_file(self._watch_handle)
+            self._watch_handle = None
+        for client in list(self._clients.values()):
+            self._disconnect(client)
+
+    def close(self):
+        """Disconnects all clients and closes the listening socket."""
+
+        self.detach()
+        self.socket.close()
+        if self._path is not None:
+            try:
+                path_stat = os.lstat(self._path)
+            except FileNotFoundError:
+                return
+            if (path_stat.st_dev, path_stat.st_ino) == self._socket_id:
+                os.unlink(self._path)
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+
+    ### UPDATES ###
+    def add_lines(self, lines, clear : bool=False):
+        """Queues received lines for the next frame. Called by the TerminalUI main loop."""
+
+        if clear:
+            self._lines = []
+            self._clear = True
+        self._lines.extend(lines)
+
+    def set_option_state(self, name : str, state : dict):
+        """Queues an option state for the next frame. Safe to call from any thread."""
+        self._options[name] = state
+
+    def set_debug_text(self, text : str):
+        """Queues the command debug text for the next frame. Called by the TerminalUI main loop."""
+        self._debug = text
+
+    def publish(self):
+        """Serializes the updates made since the last frame, queues them for every client and flushes as much of each client's queue as its socket accepts. Called by the TerminalUI main loop before each redraw."""
+
+        options, self._options = self._options, {}
+        if self._lines or self._clear or options or self._debug is not None:
+            if self._clients:
+                frame = {'t': time.time()}
+                if self._clear:
+                    frame['clear'] = True
+                if self._lines:
+                    frame['recv'] = self._lines
+                if options:
+                    frame['opt'] = options
+                if self._debug is not None:
+                    frame['debug'] = self._debug
+                data = self._serialize(frame)
+                self.frames_sent += 1
+                for client in self._clients.values():
+                    client.queue.append(data)
+                    client.queued += len(data)
+            self._lines = []
+            self._clear = False
+            self._debug = None
+
+        for client in list(self._clients.values()):
+            if client.queued > self._max_backlog:
+                # a partly sent frame must be finished so the client can still split the stream into frames
+                head = client.queue[0] if isinstance(client.queue[0], memoryview) else None
+                client.queue.clear()
+                client.queued = 0
+                if head is not None:
+                    client.queue.append(head)
+                    client.queued = len(head)
+                client.resyncs += 1
+                self.resyncs += 1
+                self._send_snapshot(client)
+            self._flush(client)
+
+    def _serialize(self, frame : dict) -> bytes:
+        return (json.dumps(frame, separators=(',', ':')) + '\n').encode('utf-8')
+
+    def _send_snapshot(self, client : '_RemoteClient'):
+        """Queues the whole state of the TerminalUI for a client."""
+
+        data = self._serialize(dict(self._terminal_ui.get_remote_snapshot(), t=time.time(), snapshot=True))
+        client.queue.append(data)
+        client.queued += len(data)
+
+    def _flush(self, client : '_RemoteClient'):
+        """Sends as much of a client's queue as the socket accepts without blocking."""
+
+        try:
+            while client.queue:
+                sent = client.socket.send(client.queue[0])
+                client.queued -= sent
+                if sent < len(client.queue[0]):
+                    client.queue[0] = memoryview(client.queue[0])[sent:]
+                    break
+                client.queue.popleft()
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._disconnect(client)
+
+
+    ### CLIENTS ###
+    def _on_connect(self):
+        """Event loop handler for the listening socket."""
+
+        try:
+            client_socket, _ = self.socket.accept()
+        except BlockingIOError:
+            return
+        client_socket.setblocking(False)
+
+        client = _RemoteClient(client_socket)
+        client.watch_handle = self._terminal_ui.main_loop.watch_file(client_socket.fileno(), lambda: self._on_client_readable(client))
+        self._clients[client_socket] = client
+        self._send_snapshot(client)
+        self._flush(client)
+
+    def _on_client_readable(self, client : '_RemoteClient'):
+        """Event loop handler for a client socket. Viewers do not send anything, so this only detects a disconnect."""
+
+        try:
+            data = client.socket.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._disconnect(client)
+
+    def _disconnect(self, client : '_RemoteClient'):
+        if self._clients.pop(client.socket, None) is None:
+            return
+        self._terminal_ui.main_loop.remove_watch_file(client.watch_handle)
+        client.socket.close()
+
+
+class _RemoteClient():
+    """The state the RemoteServer keeps for each connected client."""
+
+    __slots__ = ('socket', 'queue', 'queued', 'resyncs', 'watch_handle')
+
+    def __init__(self, client_socket : socket.socket):
+        self.socket = client_socket
+        self.queue = collections.deque()    # serialized frames, shared with the other clients
+        self.queued = 0                     # bytes in the queue
+        self.resyncs = 0
+        self.watch_handle = None
+
+
+### REMOTE SOURCE ###
+class RemoteSource(DataSource):
+    """Connects to a RemoteServer and shows the session it publishes in this TerminalUI, making it a viewer. Received lines are appended to the receive textbox, option states are applied to options with the same name and the command debug text is copied. Disconnecting, by removing the source, does not affect the server.
+    """
+
+    def __init__(self, address : Union[str, Tuple[str, int]], **kwargs):
+        """The constructor for the RemoteSource class, connects to the server.
+
+        Args:
+            address (Union[str, Tuple[str, int]]): the path of the server's Unix domain socket, or the (host, port) of its TCP socket
+            **kwargs: passed to the DataSource constructor
+        """
+        super(RemoteSource, self).__init__(**kwargs)
+        if isinstance(address, str):
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(address)
+        else:
+            self.socket = socket.create_connection(address)
+        self.socket.setblocking(False)
+        self.frames_received = 0
+        self.title = None
+
+    def fileno(self) -> int:
+        return self.socket.fileno()
+
+    def _read_chunk(self) -> bytes:
+        return self.socket.recv(self._chunk_size)
+
+    def close(self):
+        self.socket.close()
+
+    def _lines_received(self, lines : list):
+        """Applies each frame received from the server."""
+
+        for line in lines:
+            if not line:
+                continue
+            frame = json.loads(line)
+            self.frames_received += 1
+            if 'title' in frame:
+                self.title = frame['title']
+
+            if frame.get('snapshot') or frame.get('clear'):
+                self._terminal_ui.set_receive_text('\n'.join(frame.get('recv', [])))
+            elif frame.get('recv'):
+                self._terminal_ui.append_receive_lines(frame['recv'])
+            if frame.get('opt'):
+                self._terminal_ui.set_options(frame['opt'])
+            if frame.get('debug') is not None:
+                self._terminal_ui.set_command_debug_text(frame['debug'])
+
+
+### HELPER FUNCTIONS ###
+def _remove_stale_socket(path : str):
+    """Removes a Unix domain socket file left behind by a server that is no longer running. A socket that accepts a connection belongs to a running server and anything else at the path is left alone, so a second server or a mistyped address can not take over a session or delete a user's file.
+
+    Raises:
+        RuntimeError: if the path exists and is not a socket, or a server is listening on it
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise RuntimeError('%s exists and is not a socket.'%(path))
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    probe.settimeout(1)
+    try:
+        probe.connect(path)
+    except OSError as error:
+        if error.errno != errno.ECONNREFUSED:
+            raise RuntimeError('Could not check whether a server is listening on %s: %s'%(path, error)) from error
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError('Another server is listening on %s.'%(path))
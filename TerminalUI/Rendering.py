@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import time
+import urwid
+from typing import Callable, Tuple
+from TerminalUI.Headless import HeadlessScreen
+
+
+### FRAME STATS ###
+class FrameStats():
+    """Counts the frames drawn and skipped by a TerminalUI, the time taken to render them and the bytes written to the terminal for them."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clears all counts."""
+
+        self.frames = 0
+        self.skipped_frames = 0
+        self.render_seconds = 0.0
+        self.bytes_written = 0
+        self.max_frame_bytes = 0
+        self.last_frame_bytes = 0
+
+    def record_frame(self, render_seconds : float, frame_bytes : int):
+        """Records a drawn frame.
+
+        Args:
+            render_seconds (float): the time taken to render and draw the frame
+            frame_bytes (int): the bytes written to the terminal for the frame
+        """
+        self.frames += 1
+        self.render_seconds += render_seconds
+        self.bytes_written += frame_bytes
+        self.last_frame_bytes = frame_bytes
+        self.max_frame_bytes = max(self.max_frame_bytes, frame_bytes)
+
+    def summary(self) -> dict:
+        """Returns the counts along with the mean bytes and milliseconds per drawn frame.
+
+        Returns:
+            dict: the frame statistics
+        """
+        frames = max(self.frames, 1)
+        return {'frames': self.frames, 'skipped_frames': self.skipped_frames, 'bytes_written': self.bytes_written,
+                'mean_frame_bytes': self.bytes_written / frames, 'max_frame_bytes': self.max_frame_bytes,
+                'mean_frame_ms': 1000 * self.render_seconds / frames}
+
+
+### BYTE COUNTING SCREEN ###
+class ByteCountingScreen(urwid.raw_display.Screen):
+    """A raw_display.Screen that counts the bytes written to the terminal, used to benchmark the output bandwidth of each frame."""
+
+    def __init__(self, *args, **kwargs):
+        super(ByteCountingScreen, self).__init__(*args, **kwargs)
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        super(ByteCountingScreen, self).write(data)
+
+
+### CUSTOM MAIN LOOP ###
+class CustomMainLoop(urwid.MainLoop):
+    """A urwid MainLoop that records FrameStats for every frame. In the 'skip_unchanged' render mode a frame is skipped entirely, without rendering the widgets or writing to the terminal, unless the dirty_panes callback reports a pane has changed since the last frame. Only idle frames are skipped, changed panes are not composed on their own: a frame that is drawn is rendered as in the 'full' mode, where urwid's canvas cache reuses the canvases of widgets that have not changed and raw_display only writes the rows that differ.
+    """
+
+    RENDER_MODES = ('full', 'skip_unchanged')
+
+    def __init__(self, widget, render_mode : str='full', dirty_panes : Callable[[], set]=None, **kwargs):
+        """The constructor for the CustomMainLoop class.
+
+        Args:
+            widget (urwid.Widget): the topmost widget
+            render_mode (str, optional): 'full' to draw every frame, or 'skip_unchanged' to skip idle frames, where no pane has changed. Defaults to 'full'.
+            dirty_panes (Callable[[], set], optional): returns, and clears, the set of panes changed since the last frame. Required for the 'skip_unchanged' render mode. Defaults to None.
+            **kwargs: passed to the urwid.MainLoop constructor
+
+        Raises:
+            RuntimeError: if the render mode is not recognised
+        """
+        if render_mode not in self.RENDER_MODES:
+            raise RuntimeError('The render mode must be one of %s.'%(', '.join(self.RENDER_MODES)))
+        super(CustomMainLoop, self).__init__(widget, **kwargs)
+        self.render_mode = render_mode
+        self._dirty_panes = dirty_panes
+        self.frame_stats = FrameStats()
+        self.last_dirty_panes = set()
+
+    def draw_screen(self):
+        if self.render_mode == 'skip_unchanged' and self.screen_size is not None:
+            self.last_dirty_panes = self._dirty_panes()
+            if not self.last_dirty_panes:
+                self.frame_stats.skipped_frames += 1
+                return
+
+        bytes_before = getattr(self.screen, 'bytes_written', 0)
+        start = time.perf_counter()
+        super(CustomMainLoop, self).draw_screen()
+        self.frame_stats.record_frame(time.perf_counter() - start, getattr(self.screen, 'bytes_written', 0) - bytes_before)
+
+
+### HELPER FUNCTIONS ###
+def create_main_loop(widget, headless : bool=False, screen_size : Tuple[int, int]=(80, 24), render_mode : str='full', count_bytes : bool=False,
+                     dirty_panes : Callable[[], set]=None, input_filter : Callable[[list, list], list]=None) -> CustomMainLoop:
+    """Creates the CustomMainLoop used by TerminalUI.run and SessionManager.run, on a HeadlessScreen, a ByteCountingScreen or the default urwid screen.
+
+    Args:
+        widget (urwid.Widget): the topmost widget
+        headless (bool, optional): Use a HeadlessScreen rather than the terminal. Defaults to False.
+        screen_size (Tuple[int, int], optional): The (columns, rows) size of the HeadlessScreen. Defaults to (80, 24).
+        render_mode (str, optional): 'full' or 'skip_unchanged', see CustomMainLoop. Defaults to 'full'.
+        count_bytes (bool, optional): Use a ByteCountingScreen when not headless. Defaults to False.
+        dirty_panes (Callable[[], set], optional): see CustomMainLoop. Defaults to None.
+        input_filter (Callable[[list, list], list], optional): the urwid MainLoop input filter. Defaults to None.
+
+    Raises:
+        RuntimeError: if the render mode is not recognised
+
+    Returns:
+        CustomMainLoop: the main loop
+    """
+    if headless:
+        screen = HeadlessScreen(screen_size)
+    elif count_bytes:
+        screen = ByteCountingScreen()
+    else:
+        screen = None
+    return CustomMainLoop(widget, render_mode, dirty_panes, palette=[('reversed', 'standout', '')], screen=screen, input_filter=input_filter)
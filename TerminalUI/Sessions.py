@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import urwid
+from typing import Tuple
+from TerminalUI import TerminalUI
+from TerminalUI.KeyBindings import KeyBindings
+from TerminalUI.Rendering import create_main_loop
+
+
+### SESSION MANAGER ###
+class SessionManager():
+    """Hosts several TerminalUI sessions, e.g. one console per device, in a single urwid main loop and shows one of them at a time. Call SessionManager.run rather than TerminalUI.run for each session.
+
+    Every session keeps running while it is hidden: calls queued from other threads are applied, received lines are moved into its history, and its data sources, command queue, command tracking and remote viewers carry on. Only laying out and drawing its panes is skipped, so a hidden session costs very little and switching to it draws its current state straight away. By default ctrl right and ctrl left show the next and previous session and meta 1 to meta 9 show a session by position; the bindings are in key_bindings, with handlers called as handler(session_manager, key) and returning the key to pass it on to the session.
+    """
+
+    def __init__(self, sessions : dict=None):
+        """The constructor for the SessionManager class.
+
+        Args:
+            sessions (dict, optional): session name to TerminalUI, in the order they are switched between. Defaults to None.
+
+        Raises:
+            RuntimeError: if a TerminalUI is already running
+        """
+        self._sessions = {}         # session name to TerminalUI, in the order added
+        self._active_name = None
+        self.main_loop = None
+        self.key_bindings = KeyBindings(keys=dict({'ctrl right': SessionManager._next_key_pressed, 'ctrl left': SessionManager._previous_key_pressed},
+                                                  **{'meta %d'%(number): SessionManager._number_key_pressed for number in range(1, 10)}))
+        for name, terminal_ui in (sessions or {}).items():
+            self.add_session(name, terminal_ui)
+
+    ### SESSION FUNCTIONS ###
+    def add_session(self, name : str, terminal_ui : TerminalUI):
+        """Adds a session. The first session added is shown, later sessions are hidden until switched to. Once running, must be called from the main loop thread.
+
+        Args:
+            name (str): the unique name of the session
+            terminal_ui (TerminalUI): the session
+
+        Raises:
+            RuntimeError: if the name is already used, or the TerminalUI is already running
+        """
+        if name in self._sessions:
+            raise RuntimeError('A session with the name %s already exists.'%(name))
+        if terminal_ui.main_loop is not None:
+            raise RuntimeError('The TerminalUI for session %s is already running.'%(name))
+
+        self._sessions[name] = terminal_ui
+        if self._active_name is None:
+            self._active_name = name
+        else:
+            terminal_ui._set_rendering(False)
+        if self.main_loop is not None:
+            terminal_ui._attach_main_loop(self.main_loop)
+
+    def remove_session(self, name : str) -> TerminalUI:
+        """Removes a session, stopping its data sources, remote server and command queue if running. If it is shown the next session is shown instead. Once running, must be called from the main loop thread.
+
+        Args:
+            name (str): the name of the session
+
+        Raises:
+            RuntimeError: if there is no session with the name, or it is the last session and the manager is running
+
+        Returns:
+            TerminalUI: the removed session
+        """
+        if name not in self._sessions:
+            raise RuntimeError('There is no session with the name %s.'%(name))
+        if self.main_loop is not None and len(self._sessions) == 1:
+            raise RuntimeError('The last session cannot be removed while running.')
+
+        if name == self._active_name:
+            if len(self._sessions) > 1:
+                self.next_session()
+            else:
+                self._active_name = None
+        terminal_ui = self._sessions.pop(name)
+        if self.main_loop is not None:
+            terminal_ui._detach_main_loop()
+            terminal_ui.main_loop = None
+        terminal_ui._set_rendering(True)
+        return terminal_ui
+
+    def set_active(self, name : str):
+        """Shows a session and hides the session that was shown. Once running, must be called from the main loop thread.
+
+        Args:
+            name (str): the name of the session
+
+        Raises:
+            RuntimeError: if there is no session with the name
+        """
+        if name not in self._sessions:
+            raise RuntimeError('There is no session with the name %s.'%(name))
+        if name == self._active_name:
+            return
+
+        self._sessions[self._active_name]._set_rendering(False)
+        self._active_name = name
+        terminal_ui = self._sessions[name]
+        terminal_ui._set_rendering(True)
+        if self.main_loop is not None:
+            self.main_loop.widget = terminal_ui.main_frame
+
+    def next_session(self, step : int=1):
+        """Shows the session step places after the shown session, wrapping around. Use a negative step for the previous session."""
+
+        names = list(self._sessions)
+        if names:
+            self.set_active(names[(names.index(self._active_name) + step) % len(names)])
+
+    def get_session(self, name : str) -> TerminalUI:
+        """Returns the session with a name, or None."""
+        return self._sessions.get(name)
+
+    def get_session_names(self) -> list:
+        """Returns the names of the sessions, in the order they are switched between."""
+        return list(self._sessions)
+
+    @property
+    def active_name(self) -> str:
+        return self._active_name
+
+    @property
+    def active(self) -> TerminalUI:
+        return self._sessions.get(self._active_name)
+
+    def __contains__(self, name : str) -> bool:
+        return name in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    ### RUN ###
+    def run(self, redraw_period=0.1, headless : bool=False, screen_size : Tuple[int, int]=(80, 24), render_mode : str='full', count_bytes : bool=False):
+        """Will start running every session in one main loop, drawing the shown session to screen and capturing events. The arguments are the same as TerminalUI.run.
+
+        Args:
+            redraw_period (float, optional): Will redraw the screen every X seconds. If set to 0, no update will occur. Defaults to 0.1.
+            headless (bool, optional): Run against a virtual screen rather than the terminal, so no TTY is required. Defaults to False.
+            screen_size (Tuple[int, int], optional): The (columns, rows) size of the virtual screen when headless. Defaults to (80, 24).
+            render_mode (str, optional): 'full' to draw every frame, or 'skip_unchanged' to skip idle frames, where no pane of the shown session has changed. Defaults to 'full'.
+            count_bytes (bool, optional): Count the bytes written to the terminal for each frame, see TerminalUI.get_frame_stats. Defaults to False.
+
+        Raises:
+            RuntimeError: if there are no sessions
+        """
+        if not self._sessions:
+            raise RuntimeError('At least one session must be added before running.')
+
+        self.main_loop = create_main_loop(self.active.main_frame, headless, screen_size, render_mode, count_bytes, self._take_dirty_panes, self._input_filter)
+        for terminal_ui in self._sessions.values():
+            terminal_ui._attach_main_loop(self.main_loop)
+        self.main_loop.event_loop.enter_idle(self._before_draw) # registered before MainLoop.run so it happens before the draw
+        if redraw_period != 0:
+            self.main_loop.set_alarm_in(redraw_period, self._redraw, user_data=redraw_period)
+        try:
+            self.main_loop.run()
+        finally:
+            for terminal_ui in self._sessions.values():
+                terminal_ui._detach_main_loop()
+
+    def exit(self):
+        """Exits the urwid event loop, closing every session."""
+        raise urwid.ExitMainLoop
+
+    def _redraw(self, main_loop, redraw_period=0.1):
+        """Redraws the screen and sets an alarm to redraw in redraw_period seconds."""
+
+        self._before_draw()
+        main_loop.draw_screen()
+        if redraw_period != 0:
+            main_loop.set_alarm_in(redraw_period, self._redraw, redraw_period)
+
+    def _before_draw(self):
+        """Applies the updates made to every session since the last redraw, hidden sessions skip laying out their panes."""
+
+        for terminal_ui in list(self._sessions.values()):
+            if terminal_ui.main_loop is self.main_loop: # not removed by the queued calls of an earlier session
+                terminal_ui._before_draw()
+
+    def _take_dirty_panes(self) -> set:
+        """Returns and clears the panes of the shown session changed since the last frame."""
+        return self.active._take_dirty_panes()
+
+    def _input_filter(self, keys : list, raw : list) -> list:
+        """Input filter for the urwid MainLoop, handles the session switching keys then passes the remaining keys to the shown session's input filter."""
+
+        remaining = []
+        for key in keys:
+            handler = self.key_bindings.get(key)
+            if handler is None or handler(self, key) is not None:
+                remaining.append(key)
+        return self.active._input_filter(remaining, raw)
+
+    def _next_key_pressed(self, key : str):
+        self.next_session()
+
+    def _previous_key_pressed(self, key : str):
+        self.next_session(-1)
+
+    def _number_key_pressed(self, key : str):
+        names = list(self._sessions)
+        index = int(key[-1]) - 1
+        if index >= len(names):
+            return key
+        self.set_active(names[index])
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import os
+import time
+import struct
+from typing import Union
+from TerminalUI.DataSources import DataSource
+
+
+### GLOBALS ###
+_created_names = set()  # the rings created by this process, registered with its resource tracker until closed
+
+
+### SHARED RING ###
+class SharedRing():
+    """A single producer, single consumer byte ring held in multiprocessing.shared_memory, used to pass received lines from a worker process to the TerminalUI without a pipe. Requires Python 3.8+.
+
+    The consumer creates the ring and passes its name to the worker, which attaches to it with SharedRing(name). The producer only ever advances the write position and the consumer only ever advances the read position, so no lock is required. Positions are byte counts that only increase, so the ring is empty when they are equal.
+
+    The positions are published with plain stores, Python has no memory fences. The ring relies on stores becoming visible to the other process in the order they were made, as on x86 and x86-64, so the consumer never sees a write position before the data it covers and the producer never sees a read position before the consumer has finished with the data. Weakly ordered CPUs such as ARM do not guarantee this, so the consumer could read stale data there; use a PipeSource or SocketSource on those machines.
+    """
+
+    # header layout, the positions are kept on separate cache lines so the two processes do not contend
+    _WRITE_OFFSET = 0       # producer: bytes written
+    _DROPPED_OFFSET = 8     # producer: bytes dropped because the ring was full
+    _EOF_OFFSET = 16        # producer: non zero once the producer has finished
+    _CAPACITY_OFFSET = 24   # consumer: data capacity, set on creation
+    _READ_OFFSET = 64       # consumer: bytes read
+    _HEADER_SIZE = 128
+
+    def __init__(self, name : str=None, size : int=1048576):
+        """The constructor for the SharedRing class. Creates a new ring if name is None, else attaches to an existing ring.
+
+        Args:
+            name (str, optional): The name of the ring to attach to, see the name attribute. Defaults to None.
+            size (int, optional): The data capacity in bytes of a new ring, ignored when attaching. Defaults to 1048576.
+
+        Raises:
+            RuntimeError: if multiprocessing.shared_memory is not available
+            RuntimeError: if the size is less than 1
+        """
+        try:
+            from multiprocessing import shared_memory
+        except ImportError:
+            raise RuntimeError('Shared memory rings require Python 3.8+.')
+
+        if name is None:
+            if size < 1:
+                raise RuntimeError('The ring size must be 1 or greater.')
+            self._shm = shared_memory.SharedMemory(create=True, size=self._HEADER_SIZE + size)
+            self._shm.buf[:self._HEADER_SIZE] = bytes(self._HEADER_SIZE)
+            struct.pack_into('<Q', self._shm.buf, self._CAPACITY_OFFSET, size)
+            self._owner = True
+            _created_names.add(self._shm.name)
+        else:
+            self._shm = _attach_shared_memory(shared_memory, name)
+            self._owner = False
+
+        self.name = self._shm.name
+        self.capacity = self._get(self._CAPACITY_OFFSET)
+        self._data = self._shm.buf[self._HEADER_SIZE:self._HEADER_SIZE+self.capacity]
+
+    def _get(self, offset : int) -> int:
+        return struct.unpack_from('<Q', self._shm.buf, offset)[0]
+
+    def _set(self, offset : int, value : int):
+        struct.pack_into('<Q', self._shm.buf, offset, value)
+
+    @property
+    def dropped(self) -> int:
+        """The number of bytes the producer dropped because the ring was full."""
+        return self._get(self._DROPPED_OFFSET)
+
+    @property
+    def eof(self) -> bool:
+        """True once the producer has called set_eof."""
+        return self._get(self._EOF_OFFSET) != 0
+
+    def __len__(self) -> int:
+        return self._get(self._WRITE_OFFSET) - self._get(self._READ_OFFSET)
+
+
+    ### PRODUCER FUNCTIONS ###
+    def write(self, data : Union[bytes, bytearray, memoryview], block : bool=True, timeout : float=None) -> bool:
+        """Writes data into the ring. The data is written whole or not at all, so a line is never split by a full ring.
+
+        Args:
+            data (Union[bytes, bytearray, memoryview]): the data to write
+            block (bool, optional): Wait for the consumer to make room if the ring is full. Defaults to True.
+            timeout (float, optional): The maximum number of seconds to wait when block is true, wait forever if None. Defaults to None.
+
+        Raises:
+            RuntimeError: if the data is larger than the ring
+
+        Returns:
+            bool: true if the data was written, false if it was dropped because the ring was full
+        """
+        size = len(data)
+        if size > self.capacity:
+            raise RuntimeError('%d bytes can not be written to a ring of %d bytes.'%(size, self.capacity))
+
+        write_pos = self._get(self._WRITE_OFFSET)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.capacity - (write_pos - self._get(self._READ_OFFSET)) < size:
+            if not block or (deadline is not None and time.monotonic() >= deadline):
+                self._set(self._DROPPED_OFFSET, self.dropped + size)
+                return False
+            time.sleep(0.001)
+
+        # copy in up to two parts when the data wraps around the end of the ring, then publish it
+        data = memoryview(data).cast('B')
+        offset = write_pos % self.capacity
+        first = min(size, self.capacity - offset)
+        self._data[offset:offset+first] = data[:first]
+        self._data[:size-first] = data[first:]
+        self._set(self._WRITE_OFFSET, write_pos + size)    # after the data, relies on stores being seen in order, see SharedRing
+        return True
+
+    def write_lines(self, lines : list, block : bool=True, timeout : float=None, encoding : str='utf-8') -> bool:
+        """Encodes lines and writes them into the ring in one write, see write.
+
+        Args:
+            lines (list): the lines to write, without trailing new line characters
+            block (bool, optional): Wait for the consumer to make room if the ring is full. Defaults to True.
+            timeout (float, optional): The maximum number of seconds to wait when block is true, wait forever if None. Defaults to None.
+            encoding (str, optional): The encoding of the lines, must match the encoding of the SharedRingSource. Defaults to 'utf-8'.
+
+        Returns:
+            bool: true if the lines were written, false if they were dropped because the ring was full
+        """
+        return self.write(('\n'.join(lines) + '\n').encode(encoding), block, timeout)
+
+    def set_eof(self):
+        """Tells the consumer that the producer has finished, the consumer stops reading once the ring is empty."""
+        self._set(self._EOF_OFFSET, 1)
+
+
+    ### CONSUMER FUNCTIONS ###
+    def peek(self, max_bytes : int=None) -> list:
+        """Returns views of the unread data without copying it. Release the views before calling close.
+
+        Args:
+            max_bytes (int, optional): The maximum number of bytes to return, all unread data if None. Defaults to None.
+
+        Returns:
+            list: up to two memoryviews, two when the unread data wraps around the end of the ring
+        """
+        read_pos = self._get(self._READ_OFFSET)
+        size = self._get(self._WRITE_OFFSET) - read_pos
+        if max_bytes is not None:
+            size = min(size, max_bytes)
+        if size == 0:
+            return []
+
+        offset = read_pos % self.capacity
+        first = min(size, self.capacity - offset)
+        views = [self._data[offset:offset+first]]
+        if first < size:
+            views.append(self._data[:size-first])
+        return views
+
+    def consume(self, size : int):
+        """Marks bytes returned by peek as read, making room for the producer.
+
+        Args:
+            size (int): the number of bytes read
+        """
+        self._set(self._READ_OFFSET, self._get(self._READ_OFFSET) + size)  # after the data is read, relies on stores being seen in order, see SharedRing
+
+
+    def close(self):
+        """Detaches from the ring. The ring is also destroyed if this process created it."""
+
+        if self._shm is None:
+            return
+        self._data.release()
+        self._shm.close()
+        if self._owner:
+            _created_names.discard(self._shm.name)
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass    # already removed, e.g. by the resource tracker of an older Python after a worker exited
+        self._shm = None
+
+
+### SHARED RING SOURCE ###
+class SharedRingSource(DataSource):
+    """Reads lines that worker processes write into a SharedRing. The ring is drained once per frame by the TerminalUI main loop, decoding straight from the shared memory without copying it into bytes objects first. Pass the name attribute to the worker, which writes with:
+
+        ring = SharedRing(name)
+        ring.write_lines(['a line', 'another line'])
+        ring.close()
+
+    There must only be one writer per ring, use one source per worker process.
+    """
+
+    def __init__(self, size : int=1048576, **kwargs):
+        """The constructor for the SharedRingSource class, creates the ring.
+
+        Args:
+            size (int, optional): The capacity of the ring in bytes, it is drained once per redraw so should hold at least the data written in one redraw period. Defaults to 1048576.
+            **kwargs: passed to the DataSource constructor
+        """
+        super(SharedRingSource, self).__init__(**kwargs)
+        self.ring = SharedRing(size=size)
+        self.name = self.ring.name
+        self._idle_handle = None
+
+    @property
+    def dropped_bytes(self) -> int:
+        """The number of bytes the worker dropped because the ring was full."""
+        return self.ring.dropped
+
+    def fileno(self):
+        """Returns None, the ring is drained by the main loop before each frame rather than by watching a file descriptor."""
+        return None
+
+    def attach(self, terminal_ui):
+        self._terminal_ui = terminal_ui
+        if not self.eof and self._idle_handle is None:
+            self._idle_handle = terminal_ui.main_loop.event_loop.enter_idle(self._drain)
+
+    def detach(self):
+        if self._idle_handle is not None:
+            self._terminal_ui.main_loop.event_loop.remove_enter_idle(self._idle_handle)
+            self._idle_handle = None
+
+    def _drain(self):
+        """Idle handler, called by the main loop before each frame, that passes the unread data to feed."""
+
+        # leave the data in the ring until the TerminalUI has room, the worker blocks or drops once the ring is full
+        if self._terminal_ui.receive_would_block():
+            return
+
+        eof = self.ring.eof # checked before peeking so no data written before set_eof is missed
+        views = self.ring.peek(self._max_bytes_per_read)
+        size = 0
+        for view in views:
+            self.feed(view)
+            size += len(view)
+            view.release()
+        self.ring.consume(size)
+
+        if eof and len(self.ring) == 0:
+            self.feed(b'', final=True)
+            self.eof = True
+            self._terminal_ui.main_loop.set_alarm_in(0, lambda main_loop, user_data: self.detach()) # idle handlers can not be removed while they are being called
+
+    def close(self):
+        self.ring.close()
+
+
+### HELPER FUNCTIONS ###
+def _attach_shared_memory(shared_memory, name : str):
+    """Attaches to an existing shared memory block without registering it with this process's resource tracker. Before Python 3.13 attaching registers the block as if this process had created it, so the tracker destroys it, and warns of a leak, when the worker exits while the TerminalUI is still reading it."""
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass    # the track argument was added in Python 3.13
+
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == 'posix' and shm.name not in _created_names:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+### IMPORT MODULES ###
+import threading
+import urwid
+from typing import Callable
+
+
+### STATUS TABLE ###
+class StatusTable(urwid.Widget):
+    """A scrollable box widget showing a table of key and value rows that are updated in place, e.g. per channel counters. Updates can be made from any thread and are applied once per frame by refresh. Only the rows that are visible are rendered, and each row keeps its canvas until its value changes, so frequent updates to a large table only re-render the changed rows that are on screen. The key and value column widths are cached and only grow, unless a row is removed.
+    """
+    _sizing = frozenset(['box'])
+    _selectable = True
+
+    def __init__(self, formatter : Callable[[object], str]=str, separator : str=' : '):
+        """The constructor for the StatusTable class.
+
+        Args:
+            formatter (Callable[[object], str], optional): converts values to the text shown. Defaults to str.
+            separator (str, optional): shown between the key and value columns. Defaults to ' : '.
+        """
+        self._formatter = formatter
+        self._separator = separator
+        self._keys = []             # keys in display order
+        self._rows = {}             # key to row
+        self._values = []           # formatted value of each row
+        self._key_width = 0
+        self._value_width = 0
+        self._top = 0               # the first visible row
+        self._visible_rows = 0      # the number of rows shown at the last render
+        self._row_canvases = {}     # row to its canvas at _canvas_cols columns
+        self._canvas_cols = None
+        self._pending = {}          # key to the latest value not yet applied
+        self._pending_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, values : dict):
+        """Queues new values. Safe to call from any thread, the values are shown after the next call to refresh. Only the latest value of a key is kept until then.
+
+        Args:
+            values (dict): key to value, keys not yet in the table are added as new rows
+        """
+        with self._pending_lock:
+            self._pending.update(values)
+
+    def refresh(self) -> bool:
+        """Applies the queued values and marks the table for redrawing if a visible row changed. Must be called from the main loop thread.
+
+        Returns:
+            bool: true if the table needs redrawing
+        """
+        with self._pending_lock:
+            if not self._pending:
+                return False
+            pending, self._pending = self._pending, {}
+
+        redraw = False
+        widths_changed = False
+        for key, value in pending.items():
+            key = str(key)
+            text = self._formatter(value)
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self._keys)
+                self._rows[key] = row
+                self._keys.append(key)
+                self._values.append(text)
+                if len(key) > self._key_width:
+                    self._key_width = len(key)
+                    widths_changed = True
+            elif self._values[row] == text:
+                continue
+            else:
+                self._values[row] = text
+                self._row_canvases.pop(row, None)
+
+            if len(text) > self._value_width:
+                self._value_width = len(text)
+                widths_changed = True
+            if self._top <= row < self._top + self._visible_rows:
+                redraw = True
+
+        if widths_changed:
+            self._row_canvases.clear()
+            redraw = True
+        if redraw:
+            self._invalidate()
+        return redraw
+
+    def get_value(self, key : str) -> str:
+        """Returns the text shown for a key, or None if the key is not in the table. Values not yet applied by refresh are not included."""
+
+        row = self._rows.get(str(key))
+        return None if row is None else self._values[row]
+
+    def remove(self, key : str) -> bool:
+        """Removes a row. Must be called from the main loop thread.
+
+        Returns:
+            bool: true if the row was removed, false if the key is not in the table
+        """
+        row = self._rows.pop(str(key), None)
+        if row is None:
+            return False
+        del self._keys[row]
+        del self._values[row]
+        for moved_key in self._keys[row:]:
+            self._rows[moved_key] -= 1
+
+        self._key_width = max(map(len, self._keys), default=0)
+        self._value_width = max(map(len, self._values), default=0)
+        self._row_canvases.clear()
+        self._invalidate()
+        return True
+
+    def clear(self):
+        """Removes every row. Must be called from the main loop thread."""
+
+        with self._pending_lock:
+            self._pending = {}
+        self._keys = []
+        self._rows = {}
+        self._values = []
+        self._key_width = self._value_width = self._top = 0
+        self._row_canvases.clear()
+        self._invalidate()
+
+    def render(self, size, focus=False):
+        maxcol, maxrow = size
+        self._visible_rows = maxrow
+        self._top = max(min(self._top, len(self._keys) - maxrow), 0)
+        if maxcol != self._canvas_cols:
+            self._canvas_cols = maxcol
+            self._row_canvases.clear()
+
+        # only the visible rows are rendered, discard canvases that have scrolled out of view
+        visible = range(self._top, min(self._top + maxrow, len(self._keys)))
+        if len(self._row_canvases) > 2 * maxrow:
+            self._row_canvases = {row: canvas for row, canvas in self._row_canvases.items() if row in visible}
+
+        canvases = []
+        for row in visible:
+            canvas = self._row_canvases.get(row)
+            if canvas is None:
+                line = '%s%s%s'%(self._keys[row].ljust(self._key_width), self._separator, self._values[row].rjust(self._value_width))
+                canvas = self._row_canvases[row] = urwid.Text(line, wrap='clip').render((maxcol,))
+            canvases.append((canvas, None, False))
+        if len(canvases) < maxrow:
+            canvases.append((urwid.SolidCanvas(' ', maxcol, maxrow - len(canvases)), None, False))
+        return urwid.CanvasCombine(canvases)
+
+    def keypress(self, size, key):
+        maxcol, maxrow = size
+        moves = {'up': -1, 'down': 1, 'page up': -maxrow, 'page down': maxrow, 'home': -len(self._keys), 'end': len(self._keys)}
+        if key not in moves:
+            return key
+
+        top = max(min(self._top + moves[key], len(self._keys) - maxrow), 0)
+        if top == self._top:
+            return key
+        self._top = top
+        self._invalidate()
@@ -1,9 +1,45 @@
 #!/usr/bin/env python
 
 # ### IMPORT MODULES ###
+import os
+import json
+import time
+import fcntl
+import tempfile
+import threading
+import functools
+import contextlib
+import collections
 import urwid
-from typing import Callable, Union
-from TerminalUI.CustomUrwidWidgets import *
+from typing import Callable, Union, Tuple
+from TerminalUI.CustomUrwidWidgets import CommandEdit, UserOption, CustomFrame, CustomText, CustomFiller
+from TerminalUI.Headless import HeadlessScreen, EventRecorder, EventReplayer
+from TerminalUI.Rendering import CustomMainLoop, create_main_loop
+from TerminalUI.OptionSchema import OptionSchema, OptionSpec, OptionDependencies
+from TerminalUI.DataSources import DataSource
+from TerminalUI.ReceiveBuffer import ReceiveBuffer, EXPORT_FORMATS, export_history, atomic_open
+from TerminalUI.Plotting import PlotPane
+from TerminalUI.StatusTable import StatusTable
+from TerminalUI.Layout import Layout, default_layout
+from TerminalUI.Remote import RemoteServer
+from TerminalUI.Correlation import CommandTracker
+from TerminalUI.CommandQueue import CommandScheduler
+from TerminalUI.KeyBindings import KeyBindings
+from TerminalUI.NumericFormats import get_numeric_format
+from TerminalUI.AnsiText import AnsiLines, LineWidthLayout
+
+
+### DECORATORS ###
+def _on_main_loop(method):
+    """Decorates TerminalUI methods that change urwid widgets. When called from a thread other than the main loop, or within TerminalUI.batch, the call is queued with call_soon_threadsafe and applied by the main loop before the next redraw, and None is returned whatever the method returns, so each decorated method documents this."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if threading.current_thread() is not self._loop_thread or getattr(self._batch_local, 'calls', None) is not None:
+            self.call_soon_threadsafe(method, self, *args, **kwargs)
+            return None
+        return method(self, *args, **kwargs)
+    return wrapper
 
 
 ### TERMINAL UI CLASS ###
@@ -21,16 +57,18 @@ class TerminalUI():
     """
 
     ### INITIALISE ###
-    def __init__(self, title : str, command_entered_callback : Callable[['TerminalUI', str], None], options : dict=None, option_item_selected_callback : Callable[['TerminalUI', str, Union[int, float, bool, str], int], None]=None, options_width_weight : float=0.3):
+    def __init__(self, title : str, command_entered_callback : Callable[['TerminalUI', str], None], options : Union[dict, OptionSchema]=None, option_item_selected_callback : Callable[['TerminalUI', str, Union[int, float, bool, str], int], None]=None, options_width_weight : float=0.3, receive_history_size : int=1000, layout : dict=None):
         """The constructor for the TerminalUI class, will initiliase variables and screen widgets. 
         See https://github.com/jmount1992/TerminalUI/tree/main/examples/option_example.py for details and a code example on setting the options argument
 
         Args:
             title (str): The title wishing to place at the top of the TerminalUI screen
             command_entered_callback (Callable[[TerminalUI, str], None]): The function to run when a command is entered by the user
-            options (dict, optional): A dictionary containing options and their values as well as display information. Defaults to None. 
+            options (Union[dict, OptionSchema], optional): A dictionary containing options and their values as well as display information, or a prebuilt OptionSchema. Defaults to None. 
             option_item_selected_callback (Callable[[TerminalUI, str, Union[int, float, bool, str], int], None], optional): The function to run when an option change event fires. Defaults to None. 
             options_width_weight (float, optional): The amount of the screen width to use for the options area, rest will be used for receive textbox. Defaults to 0.3.
+            receive_history_size (int, optional): The maximum number of received lines to retain. Defaults to 1000.
+            layout (dict, optional): A layout spec placing the receive, options, plot and status panes, see Layout. Defaults to None, the layout returned by default_layout(options_width_weight).
 
         Raises:
             RuntimeError: if the options is not a dictionary
@@ -45,11 +83,55 @@ class TerminalUI():
 
         # CONSTANTS
         self.OPTIONS_WIDTH_WEIGHT = options_width_weight
+        self.EXPORT_KEY = 'ctrl e'
 
         # VARIABLES
         self._command_entered_callback = command_entered_callback
         self._option_item_selected_callback = option_item_selected_callback
         self._command_debug_visible = True
+        self._recorder = None
+        self._replayer = None
+        self._option_index = {}         # option name to UserOption widget
+        self._option_groups = {}        # group name to the list of widgets shown for that group, in display order
+        self._option_group_names = {}   # option name to group name
+        self._option_group_positions = {}   # group name to the options list walker position of its first widget, in display order
+        self._option_dependencies = OptionDependencies({})    # the enabled_when conditions of the options
+        self._option_dependencies_shared = False                # true while _option_dependencies is the graph compiled by the OptionSchema
+        self.options_area = None
+        self.plot_pane = None
+        self.plot_area = None
+        self.status_table = None
+        self.status_area = None
+        self._receive_buffer = ReceiveBuffer(receive_history_size)
+        self._receive_dropped_shown = 0
+        self._timestamp_mode = 'hidden'
+        self._receive_lines = AnsiLines()       # parses and measures the lines shown in the receive textbox
+        self._dirty_panes = {'header', 'receive', 'options', 'command', 'plot', 'status'}
+        self._layout_changed = True
+        self._rendering = True          # false while the session is inactive in a SessionManager, received lines are kept but not laid out
+        self._export_thread = None
+        self.export_directory = tempfile.gettempdir()    # where export_receive_history writes when no path is given
+        self._loop_thread = threading.current_thread()   # the thread that drains the receive buffer, producers on it are never blocked
+        self._pending_calls = collections.deque()        # batches of (function, args, kwargs) queued by call_soon_threadsafe
+        self._batch_local = threading.local()           # the calls of the batch open on each thread
+        self._wakeup_fd = None                           # write end of the main loop's wakeup pipe
+        self._wakeup_pending = False
+        self._data_sources = []
+        self._server = None
+        self._command_tracker = None
+        self._command_scheduler = None
+        self._command_entered_priority = 0
+        self._command_queue_version = 0    # the scheduler version shown in the command area title
+        self.key_bindings = KeyBindings(keys={self.EXPORT_KEY: TerminalUI._export_key_pressed})    # global shortcuts, see bind_key
+        self._option_key_bindings = UserOption.key_bindings.copy()    # shared by the option widgets of this TerminalUI
+        self._autosave_path = None
+        self._autosave_delay = 1.0
+        self._autosave_timer = None
+        self._autosave_lock = threading.Lock()
+        self._autosave_write_lock = threading.Lock()    # held while writing, so snapshots are written in the order taken
+        self._autosave_dirty = {}       # option name to state snapshot, waiting to be written
+        self._autosave_state = {}       # option name to state snapshot, as last written to the autosave file
+        self.main_loop = None
 
         # UI/WIDGET SETUP
         # Receive Area
@@ -59,41 +141,135 @@ class TerminalUI():
         if not (options == None or options == {}):
             self._initialise_options_area(options)
         
-        # Body Area - Receive and Options
-        if not (options == None or options == {}):
-            body = urwid.Columns([('weight', 1-self.OPTIONS_WIDTH_WEIGHT, self.receive_area), ('weight', self.OPTIONS_WIDTH_WEIGHT, self.options_area)])
-        else:
-            body = self.receive_area
-
         # Command Area
         self._initialise_command_area()
 
+        # Body Area - Receive, Options, Plot and Status
+        self._layout = Layout(layout or default_layout(self.OPTIONS_WIDTH_WEIGHT), {'receive': self.receive_area, 'options': self.options_area})
+
         # Main Frame
         self.title_text = urwid.Text('%s'%(title), align='center')
-        self.main_frame = CustomFrame(body, header=self.title_text, footer=self.command_area)
+        self.main_frame = CustomFrame(self._layout.widget, header=self.title_text, footer=self.command_area)
 
         if options == None or options == {}:
             self.main_frame.focus_position = 'footer'
 
 
+    ### LAYOUT FUNCTIONS ###
+    def _update_layout(self):
+        """Places the layout in the main frame after panes are added, removed, shown or hidden."""
+
+        if self.main_frame.body is not self._layout.widget:
+            self.main_frame.body = self._layout.widget
+        self._dirty_panes.update(('header', 'receive', 'options', 'command', 'plot', 'status'))
+        self._layout_changed = True
+
+    def set_pane_visible(self, pane : str, visible : bool):
+        """Shows or hides a pane. Hidden panes keep their widgets and continue to receive updates, so showing them again is cheap.
+
+        Args:
+            pane (str): one of 'header', 'command', or a pane in the layout such as 'receive', 'options', 'plot' or 'status'
+            visible (bool): show or hide the pane
+
+        Raises:
+            RuntimeError: if the pane is not in the layout
+        """
+        if pane == 'header':
+            self.main_frame.header = self.title_text if visible else None
+        elif pane == 'command':
+            self.main_frame.footer = self.command_area if visible else None
+        elif not self._layout.set_visible(pane, visible):
+            raise RuntimeError('The layout has no pane with the name %s.'%(pane))
+        self._update_layout()
+
+    def set_layout(self, layout : dict):
+        """Replaces the layout spec, keeping the existing pane widgets.
+
+        Args:
+            layout (dict): the layout spec, see Layout
+
+        Raises:
+            RuntimeError: if the spec is invalid
+        """
+        self._layout = Layout(layout, {'receive': self.receive_area, 'options': self.options_area, 'plot': self.plot_area, 'status': self.status_area})
+        self._update_layout()
+
+    def get_layout(self) -> dict:
+        """Returns the current layout spec, including the pane weights and which panes are hidden."""
+        return self._layout.to_spec()
+
+
     ### RUN ###
-    def run(self, redraw_period=0.1):
+    def run(self, redraw_period=0.1, headless : bool=False, screen_size : Tuple[int, int]=(80, 24), render_mode : str='full', count_bytes : bool=False):
         """Will start running the TerminalUI, drawing widgets to screen and capturing events.
 
         Args:
             redraw_period (float, optional): Will redraw the screen every X seconds. Used to update widgets when they are updated from a separate thread. If set to 0, no update will occur. Defaults to 0.1.
+            headless (bool, optional): Run against a virtual screen rather than the terminal, so no TTY is required. Defaults to False.
+            screen_size (Tuple[int, int], optional): The (columns, rows) size of the virtual screen when headless. Defaults to (80, 24).
+            render_mode (str, optional): 'full' to draw every frame, or 'skip_unchanged' to skip idle frames, where no pane has changed since the last frame, which saves CPU and bandwidth over slow links when the screen is idle. A frame where any pane has changed is drawn in full, see CustomMainLoop. Any key input, resize or layout change counts as a change to every pane. Defaults to 'full'.
+            count_bytes (bool, optional): Count the bytes written to the terminal for each frame, see get_frame_stats. Always counted (as an estimate) when headless. Defaults to False.
         """
 
-        self.main_loop = urwid.MainLoop(self.main_frame, palette=[('reversed', 'standout', '')])
+        self._attach_main_loop(create_main_loop(self.main_frame, headless, screen_size, render_mode, count_bytes, self._take_dirty_panes, self._input_filter))
+        self.main_loop.event_loop.enter_idle(self._before_draw) # registered before MainLoop.run so it happens before the draw
         if redraw_period != 0:
             self.main_loop.set_alarm_in(redraw_period, self._redraw, user_data=redraw_period)
+        try:
             self.main_loop.run()
+        finally:
+            self._detach_main_loop()
+
+    def _attach_main_loop(self, main_loop : CustomMainLoop):
+        """Starts the recording, replay, data sources, remote server and command queue against a main loop, and opens the wakeup pipe. Called by run, or by a SessionManager for each of its sessions, from the main loop thread."""
+
+        self.main_loop = main_loop
+        if self._recorder is not None:
+            self._start_recording_screen()
+        if self._replayer is not None:
+            self._replayer.start(self)
+        for source in self._data_sources:
+            source.attach(self)
+        if self._server is not None:
+            self._server.attach(self)
+        if self._command_scheduler is not None:
+            self._command_scheduler.start()
+        self._loop_thread = threading.current_thread()
+        self._wakeup_fd = self.main_loop.watch_pipe(self._on_wakeup)
+        fcntl.fcntl(self._wakeup_fd, fcntl.F_SETFL, os.O_NONBLOCK)
+
+    def _detach_main_loop(self):
+        """Stops everything started by _attach_main_loop, closes the wakeup pipe and writes any pending autosave."""
+
+        for source in self._data_sources:
+            source.detach()
+        if self._server is not None:
+            self._server.detach()
+        if self._command_scheduler is not None:
+            self._command_scheduler.stop()
+        wakeup_fd, self._wakeup_fd = self._wakeup_fd, None
+        if wakeup_fd is not None:
+            self.main_loop.remove_watch_pipe(wakeup_fd)
+            os.close(wakeup_fd)
+        self.stop_recording()
+        self.flush_autosave()
+
+    def _set_rendering(self, rendering : bool):
+        """Sets whether the session is shown, used by SessionManager. A session that is not shown keeps applying queued calls and moving received lines into its history, so its data sources, command tracking and remote viewers carry on, but skips laying out the receive, plot and status panes. Showing it again redraws every pane from its current state."""
+
+        if rendering == self._rendering:
+            return
+        self._rendering = rendering
+        if rendering:
+            self._layout_changed = True
+            self._update_receive_text()
+            self._dirty_panes.update(('header', 'receive', 'options', 'command', 'plot', 'status'))
 
     def exit(self):
         """Exits the urwid event loop. Use this to close the TerminalUI after calling TerminalUI.run().
         """
         raise urwid.ExitMainLoop
-    
+
     def _redraw(self, main_loop, redraw_period=0.1):
         """Redraws the screen and set an alarm to redraw in X seconds.
 
@@ -101,18 +277,267 @@ class TerminalUI():
             main_loop ([type]): the urwid MainLoop object
             redraw_period (float, optional): The number of seconds until redraw the screen again. Set to 0 to not redraw. Defaults to 0.1.
         """
+        self._before_draw()
         main_loop.draw_screen()
         if redraw_period != 0:
             main_loop.set_alarm_in(redraw_period, self._redraw, redraw_period)
 
+    def _before_draw(self):
+        """Applies updates made from other threads to the widgets, called by the main loop before each redraw."""
+
+        self._run_pending_calls()
+        if self._layout_changed and self._rendering:
+            self._layout_changed = False
+            self._resize_receive_area()
+        self._drain_receive()
+        if self._command_tracker is not None:
+            expired = self._command_tracker.expire()
+            if expired:
+                self._commands_completed(expired)
+        if self._command_scheduler is not None and self._command_scheduler.version != self._command_queue_version:
+            self._update_command_title()
+        if self._rendering and self.plot_pane is not None and self.plot_pane.refresh():
+            self._mark_dirty('plot')
+        if self._rendering and self.status_table is not None and self.status_table.refresh():
+            self._mark_dirty('status')
+        if self._server is not None:
+            self._server.publish()
+
+    ### THREAD SAFE UPDATE FUNCTIONS ###
+    def call_soon_threadsafe(self, callback : Callable, *args, **kwargs):
+        """Queues a call to be made by the main loop before the next redraw, waking the main loop if it is waiting. Use this to change widgets from other threads, the methods that change widgets (e.g. set_command_debug_text, enable_option) already do this when called from another thread. Calls are made in the order queued. Safe to call from any thread.
+
+        Args:
+            callback (Callable): the function to call
+            *args: the positional arguments for the callback
+            **kwargs: the keyword arguments for the callback
+        """
+        calls = getattr(self._batch_local, 'calls', None)
+        if calls is not None:
+            calls.append((callback, args, kwargs))
+        else:
+            self._queue_calls([(callback, args, kwargs)])
+
+    @contextlib.contextmanager
+    def batch(self):
+        """A context manager that queues the widget changes made within it, by call_soon_threadsafe or by the methods that change widgets, and applies them together before the next redraw, so they are never drawn half applied. Batches can be nested, the changes are queued when the outermost batch closes. If an exception is raised within the batch its changes are discarded.
+
+        Example:
+            with terminal_ui.batch():
+                terminal_ui.set_command_debug_text('Connected')
+                terminal_ui.enable_option('baud_rate', False)
+        """
+        if getattr(self._batch_local, 'calls', None) is not None:
+            yield self
+            return
+
+        self._batch_local.calls = []
+        try:
+            yield self
+            calls = self._batch_local.calls
+        finally:
+            self._batch_local.calls = None
+        if calls:
+            self._queue_calls(calls)
+
+    def _queue_calls(self, calls : list):
+        """Queues a batch of calls and writes to the wakeup pipe, once until the main loop reads it, so a waiting main loop applies them straight away rather than at the next redraw period."""
+
+        self._pending_calls.append(calls)
+        wakeup_fd = self._wakeup_fd
+        if wakeup_fd is not None and not self._wakeup_pending:
+            self._wakeup_pending = True
+            try:
+                os.write(wakeup_fd, b'\0')
+            except (BlockingIOError, OSError):
+                pass # a wakeup is already waiting to be read, or the main loop has exited
+
+    def _on_wakeup(self, data : bytes) -> bool:
+        """Main loop handler for the wakeup pipe, the queued calls are applied by _before_draw, which runs once the main loop is idle."""
+
+        self._wakeup_pending = False
+        return True
+
+    def _run_pending_calls(self):
+        """Makes the calls queued by call_soon_threadsafe. Calls queued while doing so are left for the next redraw."""
+
+        for _ in range(len(self._pending_calls)):
+            for callback, args, kwargs in self._pending_calls.popleft():
+                callback(*args, **kwargs)
+
+    def get_frame_stats(self) -> dict:
+        """Returns the number of frames drawn and skipped, the bytes written to the terminal and the time taken to draw each frame since TerminalUI.run() was called. Bytes are only counted when running with count_bytes=True or headless.
+
+        Returns:
+            dict: the frames, skipped_frames, bytes_written, mean_frame_bytes, max_frame_bytes and mean_frame_ms
+        """
+        if self.main_loop is None:
+            raise RuntimeError('Frame statistics are only available once the TerminalUI is running.')
+        return self.main_loop.frame_stats.summary()
+
+    def _mark_dirty(self, pane : str):
+        """Records that a pane has changed and must be drawn in the next frame when using the 'skip_unchanged' render mode.
+
+        Args:
+            pane (str): one of 'header', 'receive', 'options', 'command', 'plot' or 'status'
+        """
+        self._dirty_panes.add(pane)
+
+    def _take_dirty_panes(self) -> set:
+        """Returns and clears the set of panes changed since the last frame."""
+
+        dirty_panes, self._dirty_panes = self._dirty_panes, set()
+        return dirty_panes
+
+    def get_screen_text(self) -> list:
+        """Returns the text of the last frame drawn to the virtual screen. Only available when running headless.
+
+        Returns:
+            list: the rows of the last frame, one string per row
+        """
+        if self.main_loop is None or not isinstance(self.main_loop.screen, HeadlessScreen):
+            raise RuntimeError('The screen text is only available when running headless.')
+        return self.main_loop.screen.get_screen_text()
+
+    def _input_filter(self, keys : list, raw : list) -> list:
+        """Input filter for the urwid MainLoop, used to record keypresses and screen resizes and to handle global shortcuts.
+
+        Args:
+            keys (list): the keys received from the screen
+            raw (list): the raw key codes received from the screen
+
+        Returns:
+            list: the keys to be processed by the MainLoop
+        """
+        if self._recorder is not None:
+            if 'window resize' in keys:
+                self._recorder.record('size', self.main_loop.screen.get_cols_rows())
+                keys = [key for key in keys if key != 'window resize']
+                if keys:
+                    self._recorder.record('key', keys)
+                keys = keys + ['window resize']
+            else:
+                self._recorder.record('key', keys)
+
+        # input can change focus or any widget, so the whole frame must be drawn
+        if keys:
+            self._dirty_panes.update(('header', 'receive', 'options', 'command', 'plot', 'status'))
+        if 'window resize' in keys:
+            self._layout_changed = True
+
+        # global shortcuts take precedence over the focused widget, a handler returns the key to pass it on
+        remaining = []
+        for key in keys:
+            handler = self.key_bindings.get(key)
+            if handler is None or handler(self, key) is not None:
+                remaining.append(key)
+        return remaining
+
+    def _export_key_pressed(self, key : str):
+        self.export_receive_history()
+
+    def bind_key(self, key : str, handler : Callable[['TerminalUI', str], Union[str, None]], target : str='global'):
+        """Binds a handler to a key, replacing the default handling of the key. Keys are dispatched through a table built once, so the cost of handling a key does not grow with the number of bindings.
+
+        Args:
+            key (str): the urwid key name, e.g. 'ctrl r', 'f5' or 'page up'
+            handler (Callable[[TerminalUI, str], Union[str, None]]): called with the TerminalUI and the key. Return the key to pass it on, to the focused widget for global bindings and to the containing widgets otherwise, or None if it was handled. Option bindings are also passed the name of the focused option as a third argument.
+            target (str, optional): 'global' to handle the key whatever has focus, 'command' to handle it when the command edit has focus, or 'option' to handle it when an option has focus. Defaults to 'global'.
+
+        Raises:
+            RuntimeError: if the target is not recognised
+        """
+        if target == 'global':
+            self.key_bindings.bind(key, handler)
+        elif target == 'command':
+            self.command_edit.key_bindings.bind(key, lambda widget, size, key: handler(self, key))
+        elif target == 'option':
+            self._option_key_bindings.bind(key, lambda widget, size, key: handler(self, key, widget.get_option_name()))
+        else:
+            raise RuntimeError('The key binding target must be one of global, command or option.')
+
+    def unbind_key(self, key : str, target : str='global') -> bool:
+        """Removes a key binding made with bind_key, restoring the default handling of the key. If the key was not bound with bind_key, its default handling for the target is removed instead, e.g. unbind_key('ctrl e') disables the export shortcut, until the key is bound again.
+
+        Args:
+            key (str): the urwid key name
+            target (str, optional): 'global', 'command' or 'option'. Defaults to 'global'.
+
+        Raises:
+            RuntimeError: if the target is not recognised
+
+        Returns:
+            bool: false if the key was not bound
+        """
+        tables = {'global': self.key_bindings, 'command': self.command_edit.key_bindings, 'option': self._option_key_bindings}
+        if target not in tables:
+            raise RuntimeError('The key binding target must be one of global, command or option.')
+        return tables[target].unbind(key)
+
+
+    ### RECORD/REPLAY FUNCTIONS ###
+    def start_recording(self, path : str):
+        """Records the timestamped input/output event stream to a file until stop_recording is called or the TerminalUI exits. The file is gzip compressed if the path ends in '.gz'. Can be called before or after TerminalUI.run().
+
+        Args:
+            path (str): the path of the file to record to
+        """
+        self.stop_recording()
+        self._recorder = EventRecorder(path)
+        if self.main_loop is not None:
+            self._start_recording_screen()
+
+    def stop_recording(self):
+        """Stops recording and closes the recording file. Does nothing if not recording."""
+
+        if self._recorder is None:
+            return
+        if self.main_loop is not None and isinstance(self.main_loop.screen, HeadlessScreen):
+            self.main_loop.screen.draw_callback = None
+        self._recorder.close()
+        self._recorder = None
+
+    def _start_recording_screen(self):
+        """Records the initial screen size and hooks frame recording into the virtual screen."""
+
+        self._recorder.record('size', self.main_loop.screen.get_cols_rows())
+        if isinstance(self.main_loop.screen, HeadlessScreen):
+            self.main_loop.screen.draw_callback = self._recorder.record_frame
+
+    def replay(self, path : str, speed : float=1.0, exit_when_done : bool=True):
+        """Replays the keypresses, receive text and screen sizes of a recording made with start_recording. Can be called before or after TerminalUI.run().
+
+        Args:
+            path (str): the path of the recording file
+            speed (float, optional): The replay speed multiplier, 1.0 replays at the recorded rate. Set to 0 to replay as fast as possible. Defaults to 1.0.
+            exit_when_done (bool, optional): Exit the TerminalUI once every event has been replayed. Defaults to True.
+
+        Returns:
+            EventReplayer: the replayer, its elapsed attribute holds the time taken once the replay completes
+        """
+        self._replayer = EventReplayer(path, speed, self._on_replay_done if exit_when_done else None)
+        if self.main_loop is not None:
+            self._replayer.start(self)
+        return self._replayer
+
+    def _on_replay_done(self, replayer : EventReplayer):
+        """Draws the final frame then exits the TerminalUI on the next iteration of the event loop once a replay completes."""
+
+        self._before_draw()
+        self.main_loop.draw_screen()
+        self.main_loop.set_alarm_in(0, lambda main_loop, user_data: self.exit())
+
     ### COMMAND FUNCTIONS ###
     def _initialise_command_area(self):
         """Initiliases the command area which contains Edit and Text widgets."""
 
         # Setup Command Area Widgets
         self.command_edit = CommandEdit(">>")
+        self.command_edit.key_bindings = CommandEdit.key_bindings.copy()   # so bind_key only affects this TerminalUI
         self.command_txt = urwid.Text('Debug')
-        self.command_area = self._get_command_area()
+        self._command_pile = urwid.Pile([self.command_edit, urwid.Divider('-'), self.command_txt])
+        self._command_debug_items = self._command_pile.contents[1:]  # kept so the debug textbox can be shown again without rebuilding
+        self.command_area = urwid.LineBox(self._command_pile)
 
         # Connect Signals
         urwid.connect_signal(self.command_edit, 'done', self._on_command_enter) 
@@ -125,24 +550,24 @@ class TerminalUI():
             command (str): the string entered into the edit widget
         """
 
-        self._command_entered_callback(self, command)
+        if self._recorder is not None:
+            self._recorder.record('cmd', command)
+        if self._command_scheduler is not None:
+            self._command_scheduler.put(command, self._command_entered_priority)
+            self._update_command_title()
+        else:
+            self._send_command(command)
 
-    def _get_command_area(self) -> urwid.Widget:
-        """Builds and returns the complete widget for the command area.
+    def _send_command(self, command : str):
+        """Tracks a command, if command tracking is enabled, and passes it to the command_entered_callback. Called on the main loop, or on the command queue thread if the command queue is enabled."""
 
-        Returns:
-            urwid.Widget: returns the widget for the command area
-        """
-        command_pile = urwid.Pile([self.command_edit, urwid.Divider('-'), self.command_txt])
-        if self._command_debug_visible:
-            command_area = urwid.LineBox(command_pile)
-        else:
-            command_area = urwid.LineBox(self.command_edit)
-        
-        return command_area
+        if self._command_tracker is not None:
+            self.track_command(command)
+        self._command_entered_callback(self, command)
 
+    @_on_main_loop
     def set_command_debug_text(self, text, clear : bool=True):
-        """Sets the text within the command debug textbox.
+        """Sets the text within the command debug textbox. Safe to call from any thread: when called from another thread or within batch the change is queued and made before the next redraw, see call_soon_threadsafe.
         
         Args:
             clear (bool, optional): used to specify if wish to clear current text within the textbox. Defaults to True.
@@ -152,215 +577,771 @@ class TerminalUI():
         else:
             current_txt = self.command_txt.get_text()[0]
             self.command_txt.set_text(current_txt + text)
+        self._mark_dirty('command')
+        if self._server is not None:
+            self._server.set_debug_text(self.command_txt.get_text()[0])
 
+    @_on_main_loop
     def command_debug_text_visible(self, visible):
-        """Used to show/hide the command debug textbox."""
+        """Used to show/hide the command debug textbox. Safe to call from any thread: when called from another thread or within batch the change is queued and made before the next redraw, see call_soon_threadsafe."""
 
         self._command_debug_visible = visible
-        self.main_frame.footer = self._get_command_area()
+        self._command_pile.contents[1:] = self._command_debug_items if visible else []
+        self._mark_dirty('command')
+        self._layout_changed = True
 
+    @_on_main_loop
     def enable_command(self, enable : bool):
-        """Used to enable/disable the command edit text area.
+        """Used to enable/disable the command edit text area. Safe to call from any thread: when called from another thread or within batch the change is queued and made before the next redraw, see call_soon_threadsafe.
 
         Args:
             enable (bool): used to specify if the write command edit text is selectable
         """
 
         self.command_edit.enable(enable)
-        self.main_frame.footer = self._get_command_area()
+        self.command_edit._invalidate()
+        self._mark_dirty('command')
+
+
+    ### COMMAND TRACKING FUNCTIONS ###
+    def enable_command_tracking(self, matcher : Callable[[str, str], bool], timeout : float=5.0, capacity : int=1024) -> CommandTracker:
+        """Measures the round-trip latency of request/response commands. Each command entered is given an ID and timestamp before the command_entered_callback is called, and received lines are passed to the matcher to find the response to each pending command. The latency of the last answered command and the rolling p50/p99 are shown in the title of the command area. Can be called before or after TerminalUI.run().
+
+        Args:
+            matcher (Callable[[str, str], bool]): called with a pending command and a received line, returns true if the line is the response to the command
+            timeout (float, optional): The seconds a command waits for its response before it is counted as timed out. Defaults to 5.0.
+            capacity (int, optional): The number of most recent latencies used for the rolling percentiles. Defaults to 1024.
+
+        Raises:
+            RuntimeError: if the timeout is not greater than 0 or the capacity is less than 1
+
+        Returns:
+            CommandTracker: the tracker, also see get_command_latency
+        """
+        self._command_tracker = CommandTracker(matcher, timeout, capacity)
+        self._update_command_title()
+        return self._command_tracker
+
+    def disable_command_tracking(self):
+        """Stops tracking commands, discarding the pending commands and latencies."""
+
+        self._command_tracker = None
+        self._update_command_title()
+
+    def track_command(self, command : str) -> int:
+        """Starts tracking a command sent by the application rather than entered by the user. Commands entered by the user are tracked automatically. Safe to call from any thread.
+
+        Args:
+            command (str): the command sent
+
+        Raises:
+            RuntimeError: if command tracking is not enabled
+
+        Returns:
+            int: the ID of the command
+        """
+        if self._command_tracker is None:
+            raise RuntimeError('Command tracking is not enabled, see enable_command_tracking.')
+        command_id = self._command_tracker.submit(command)
+        if threading.current_thread() is self._loop_thread:
+            self._update_command_title()
+        return command_id
+
+    def get_command_latency(self, command_id : int=None):
+        """Returns the round-trip latency of a command, or the tracking summary.
+
+        Args:
+            command_id (int, optional): The ID of a tracked command. Defaults to None, returning the summary.
+
+        Raises:
+            RuntimeError: if command tracking is not enabled
+
+        Returns:
+            the latency of the command in seconds, None if it has not been answered or is no longer retained, or if command_id is None a dictionary with the completed, expired and pending counts, the last_id, last_command and last_ms of the last answered command and the rolling p50_ms and p99_ms
+        """
+        if self._command_tracker is None:
+            raise RuntimeError('Command tracking is not enabled, see enable_command_tracking.')
+        if command_id is None:
+            return self._command_tracker.summary()
+        return self._command_tracker.latency(command_id)
+
+    def _commands_completed(self, count : int):
+        """Releases the command queue's in flight slots for tracked commands that were answered or timed out, and updates the command area title."""
+
+        if self._command_scheduler is not None:
+            self._command_scheduler.complete(count)
+        self._update_command_title()
+
+    def _update_command_title(self):
+        """Shows the latest command latency and the command queue depth in the title of the command area."""
+
+        parts = []
+        if self._command_tracker is not None:
+            parts.append(self._command_tracker.describe())
+        if self._command_scheduler is not None:
+            self._command_queue_version = self._command_scheduler.version
+            parts.append(self._command_scheduler.describe())
+        self.command_area.set_title(' | '.join(part for part in parts if part))
+        self._mark_dirty('command')
+
+
+    ### COMMAND QUEUE FUNCTIONS ###
+    def enable_command_queue(self, rate : float, burst : int=1, max_in_flight : int=None, entered_priority : int=0) -> CommandScheduler:
+        """Paces the commands passed to the command_entered_callback for devices that drop data when commands arrive too quickly. Commands entered by the user, and those passed to queue_command, are queued by priority and the command_entered_callback is called for each on a worker thread, limited by a token bucket and optionally by the number of commands in flight, so typing and redrawing are never blocked. The queue depth is shown in the title of the command area. Can be called before or after TerminalUI.run().
+
+        While the command queue is enabled the command_entered_callback is called on the worker thread rather than the main loop, so must change widgets through the thread safe methods (see call_soon_threadsafe). An OSError raised by the callback is treated as a failure to reach the device: it is counted in the command area title and the next command is sent. Any other exception, including urwid.ExitMainLoop, is raised again on the main loop as if the callback had been called there.
+
+        When command tracking is also enabled (see enable_command_tracking) a command stops being in flight once its response is matched or it times out, otherwise call command_completed.
+
+        Args:
+            rate (float): the number of commands per second that can be sent
+            burst (int, optional): The number of commands that can be sent back to back after the queue has been idle. Defaults to 1.
+            max_in_flight (int, optional): The number of commands sent but not yet completed before sending waits. Defaults to None, not limited.
+            entered_priority (int, optional): The priority of commands entered by the user, lower values are sent first. Defaults to 0, ahead of queue_command's default.
+
+        Raises:
+            RuntimeError: if the command queue is already enabled, the rate is not greater than 0, or burst or max_in_flight is less than 1
+
+        Returns:
+            CommandScheduler: the scheduler
+        """
+        if self._command_scheduler is not None:
+            raise RuntimeError('The command queue is already enabled.')
+
+        self._command_scheduler = CommandScheduler(self._send_command, rate, burst, max_in_flight, self._command_failed)
+        self._command_entered_priority = entered_priority
+        if self.main_loop is not None:
+            self._command_scheduler.start()
+        self._update_command_title()
+        return self._command_scheduler
+
+    def _command_failed(self, command : str, error : Exception):
+        """Called on the command queue thread when the command_entered_callback raises anything other than an OSError, raises the exception again on the main loop."""
+        self.call_soon_threadsafe(_raise, error)
+
+    def disable_command_queue(self) -> int:
+        """Stops the command queue, commands are passed straight to the command_entered_callback again.
+
+        Returns:
+            int: the number of queued commands discarded
+        """
+        if self._command_scheduler is None:
+            return 0
+        scheduler, self._command_scheduler = self._command_scheduler, None
+        scheduler.stop()
+        self._update_command_title()
+        return scheduler.clear()
+
+    def queue_command(self, command : str, priority : int=1):
+        """Queues a command sent by the application, the command_entered_callback is called for it on the command queue thread. Safe to call from any thread.
+
+        Args:
+            command (str): the command
+            priority (int, optional): Lower values are sent first. Defaults to 1, behind commands entered by the user.
+
+        Raises:
+            RuntimeError: if the command queue is not enabled
+        """
+        if self._command_scheduler is None:
+            raise RuntimeError('The command queue is not enabled, see enable_command_queue.')
+        self._command_scheduler.put(command, priority)
+
+    def command_completed(self, count : int=1):
+        """Marks commands as complete, allowing more to be sent when the command queue has a max_in_flight. Not needed for commands completed by command tracking. Safe to call from any thread."""
+
+        if self._command_scheduler is not None:
+            self._command_scheduler.complete(count)
 
 
     ### RECEIVE FUNCTIONS ###
     def _initialise_receive_area(self):
         """Initiliases the receive area textbox and filler widgets."""
 
-        self.receive_txt = CustomText('')
-        self.receive_filler = CustomFiller(self.receive_txt, 'top')
+        self.receive_txt = CustomText('', layout=LineWidthLayout())
+        self.receive_filler = CustomFiller(self.receive_txt, 'top', show_tail=True)
         self.receive_area = urwid.LineBox(self.receive_filler)
 
     def set_receive_text(self, text : str, clear : bool=True):
-        """Sets the text within the receive textbox.
+        """Sets the text within the receive textbox. Safe to call from any thread, the text is shown on the next redraw.
 
         Args:
             text (str): the string for the receive textbox
             clear (bool, optional): used to specify if wish to clear current text within the textbox. Defaults to True.
         """
 
-        if clear or self.receive_txt.get_text()[0].strip() == '':
-            self.receive_txt.set_text(text)
-        else:
-            current_text = self.receive_txt.get_text()[0]
-            text_rows = self.receive_txt.get_size()[0] + 1 # plus one for new line about to add
-            filler_rows = self.receive_filler.get_size()[0]
-            if text_rows >= filler_rows:
-                current_text = current_text.split('\n')[text_rows-filler_rows:]
-                current_text = "\n".join(current_text)
-            current_text = current_text + "\n" + text
-            self.receive_txt.set_text(current_text)
+        if self._recorder is not None:
+            self._recorder.record('recv', (text, clear))
+
+        self._receive_buffer.push(text.split('\n'), clear, threading.current_thread() is not self._loop_thread)
+
+    def append_receive_lines(self, lines : list):
+        """Appends many lines to the receive textbox in one call, much cheaper than calling set_receive_text for each line. Safe to call from any thread, the lines are shown on the next redraw.
+
+        Args:
+            lines (list): the lines to append, without trailing new line characters
+        """
+
+        if self._recorder is not None:
+            self._recorder.record('recv', ('\n'.join(lines), False))
+
+        self._receive_buffer.push(lines, False, threading.current_thread() is not self._loop_thread)
+
+    def set_receive_policy(self, policy : str, high_water : int=None, sample_n : int=None):
+        """Sets what happens when received lines arrive faster than the screen is redrawn. Once high_water lines are waiting to be shown the policy is applied:
+            'block': the producing thread waits until the lines have been shown, data sources stop reading until there is room
+            'drop_oldest': the oldest waiting lines are discarded (the default)
+            'drop_newest': the new lines are discarded
+            'sample': only 1 in every sample_n new lines is kept
+        The number of dropped lines is shown in the title of the receive area.
+
+        Args:
+            policy (str): one of 'block', 'drop_oldest', 'drop_newest' or 'sample'
+            high_water (int, optional): The number of waiting lines at which the policy applies, unchanged if None. Defaults to None (initially 100000).
+            sample_n (int, optional): Keep 1 in every sample_n lines when the policy is 'sample', unchanged if None. Defaults to None (initially 10).
+
+        Raises:
+            RuntimeError: if the policy is not recognised, or high_water or sample_n is less than 1
+        """
+        self._receive_buffer.set_policy(policy, high_water, sample_n)
+
+    def get_receive_dropped(self) -> int:
+        """Returns the number of received lines dropped by the receive policy."""
+        return self._receive_buffer.dropped
+
+    def receive_would_block(self) -> bool:
+        """Returns true if the receive policy is 'block' and the high water mark has been reached, used by data sources to stop reading until there is room."""
+        return self._receive_buffer.policy == 'block' and self._receive_buffer.is_full()
+
+    def _drain_receive(self):
+        """Moves received lines into the receive history and updates the receive textbox, called by the main loop before each redraw."""
+
+        if self._receive_buffer.drain():
+            if self._rendering:
+                self._update_receive_text()
+            if self._server is not None:
+                self._server.add_lines(self._receive_buffer.last_drained, self._receive_buffer.last_cleared)
+            if self._command_tracker is not None:
+                matched = self._command_tracker.match(self._receive_buffer.last_drained, self._receive_buffer.last_drained_times)
+                if matched:
+                    self._commands_completed(matched)
+
+            # data sources paused by the block policy can read again
+            for source in self._data_sources:
+                if source.paused:
+                    source.attach(self)
+
+        dropped = self._receive_buffer.dropped
+        if dropped != self._receive_dropped_shown:
+            self._receive_dropped_shown = dropped
+            self.receive_area.set_title('%d lines dropped'%(dropped))
+            self._mark_dirty('receive')
+
+    def _resize_receive_area(self):
+        """Works out the size of the receive textbox from the screen size and the layout, and reflows the received lines if it has changed. Called by the main loop before the next redraw after the screen is resized or the layout changes, so the lines are reflowed once per resize rather than checked on every render."""
+
+        cols, rows = self.main_loop.screen.get_cols_rows()
+        _, (header_rows, footer_rows) = self.main_frame.frame_top_bottom((cols, rows), True)
+        body_rows = max(rows - header_rows - footer_rows, 0)
+        receive_size = self._layout.pane_size('receive', (cols, body_rows))
+        if receive_size is None:
+            return
+        cols, rows = receive_size
+
+        # inside the line box
+        if self.receive_filler.set_size((max(rows - 2, 0), max(cols - 2, 0))):
+            self.receive_txt.set_size(self.receive_filler.get_size())
+            self._update_receive_text()
+
+    def _update_receive_text(self):
+        """Sets the receive textbox to the most recent lines that can be shown. Every line takes at least one row, so only as many lines as the receive area has rows are needed. ANSI colour escape sequences in the lines are shown as colours, and the display width of each line is measured once, when it is first shown, see AnsiLines."""
+
+        rows = self.receive_filler.get_size()[0]
+        lines = self._receive_buffer.tail(rows or len(self._receive_buffer), self._timestamp_mode)
+        self.receive_txt.set_text_attributes(*self._receive_lines.lines(lines))
+        self._mark_dirty('receive')
+
+    def set_timestamp_mode(self, mode : str):
+        """Sets how the time each line was received is shown in the receive textbox. The time is recorded for every line regardless of the mode, so the mode can be changed at any time.
+
+        Args:
+            mode (str): 'hidden' for no timestamp, 'absolute' to prefix each line with the local time it was received, or 'delta' to prefix each line with the seconds since the previous line
+
+        Raises:
+            RuntimeError: if the mode is not recognised
+        """
+        if mode not in ReceiveBuffer.TIMESTAMP_MODES:
+            raise RuntimeError('The timestamp mode must be one of %s.'%(', '.join(ReceiveBuffer.TIMESTAMP_MODES)))
+        self._timestamp_mode = mode
+        self._update_receive_text()
+
+
+    def export_receive_history(self, path : str=None, fmt : str=None) -> bool:
+        """Writes every retained received line, and the time it was received, to a file on a background thread so the screen keeps updating. Progress is shown in the command debug textbox. Also triggered by pressing ctrl+e (see EXPORT_KEY).
+
+        Args:
+            path (str, optional): the path of the file to write. Defaults to receive_history_<date>_<time>.txt in export_directory.
+            fmt (str, optional): one of 'text', 'jsonl' or 'csv'. Defaults to the file extension of path if it is .jsonl or .csv, else 'text'.
+
+        Raises:
+            RuntimeError: if the format is not recognised
+
+        Returns:
+            bool: true if the export was started, false if an export is already running
+        """
+        if self._export_thread is not None and self._export_thread.is_alive():
+            return False
+
+        if path is None:
+            path = os.path.join(self.export_directory, time.strftime('receive_history_%Y%m%d_%H%M%S.txt'))
+        if fmt is None:
+            extension = os.path.splitext(path)[1].lstrip('.').lower()
+            fmt = extension if extension in EXPORT_FORMATS else 'text'
+        if fmt not in EXPORT_FORMATS:
+            raise RuntimeError('The export format must be one of %s.'%(', '.join(EXPORT_FORMATS)))
+
+        # the snapshot is taken on the calling thread so the history cannot change under the export thread
+        lines, times, wall_clock_offset = self._receive_buffer.snapshot()
+        self._export_thread = threading.Thread(target=self._export_worker, args=(path, fmt, lines, times, wall_clock_offset), daemon=True)
+        self._export_thread.start()
+        return True
+
+    def _export_worker(self, path : str, fmt : str, lines : list, times, wall_clock_offset : float):
+        """Runs on the export thread, writes the history and reports progress in the command debug textbox. The updates are queued for the main loop by set_command_debug_text, so they are shown in order and the last is never lost."""
+
+        def progress(written, total):
+            self.set_command_debug_text(' Exporting receive history: %d/%d lines'%(written, total))
+
+        try:
+            export_history(path, lines, times, wall_clock_offset, fmt, progress)
+            self.set_command_debug_text(' Exported %d lines to %s'%(len(lines), path))
+        except OSError as e:
+            self.set_command_debug_text(' Export failed: %s'%(e))
+
+
+    ### DATA SOURCE FUNCTIONS ###
+    def add_data_source(self, source : DataSource):
+        """Adds a data source whose lines are appended to the receive textbox. Sources are read by the TerminalUI event loop, so no reader thread is required. Can be called before or after TerminalUI.run().
+
+        Args:
+            source (DataSource): the data source, e.g. a FileTailSource, PipeSource, SubprocessSource, SocketSource or PtySource
+        """
+        self._data_sources.append(source)
+        if self.main_loop is not None:
+            source.attach(self)
+
+    def remove_data_source(self, source : DataSource, close : bool=True) -> bool:
+        """Stops reading from a data source.
+
+        Args:
+            source (DataSource): the data source to remove
+            close (bool, optional): Close the underlying file, pipe, socket or process. Defaults to True.
+
+        Returns:
+            bool: true if the source was removed, false if it had not been added
+        """
+        if source not in self._data_sources:
+            return False
+
+        self._data_sources.remove(source)
+        source.detach()
+        if close:
+            source.close()
+        return True
+
+
+    ### PLOT FUNCTIONS ###
+    def add_plot(self, series : list, style : str='sparkline', capacity : int=4096, height_weight : float=0.4):
+        """Adds a plot area below the receive area for numeric telemetry, see add_samples. Can be called before or after TerminalUI.run().
+
+        Args:
+            series (list): the names of the series to plot, more can be added with plot_pane.add_series
+            style (str, optional): 'sparkline' or 'braille'. Defaults to 'sparkline'.
+            capacity (int, optional): The number of most recent samples retained for each series. Defaults to 4096.
+            height_weight (float, optional): The layout weight of the plot area, by default the receive area has a weight of 0.6. Defaults to 0.4.
+
+        Raises:
+            RuntimeError: if a plot area already exists
+            RuntimeError: if the style is not recognised
+        """
+        if self.plot_pane is not None:
+            raise RuntimeError('The TerminalUI already has a plot area.')
+
+        self.plot_pane = PlotPane(series, style, capacity)
+        self.plot_area = urwid.LineBox(self.plot_pane, title='PLOT')
+        self._layout.set_weight('plot', height_weight)
+        self._layout.set_pane('plot', self.plot_area)
+        self._update_layout()
+
+    def remove_plot(self):
+        """Removes the plot area, discarding its samples."""
+
+        if self.plot_pane is None:
+            return
+        self.plot_pane = None
+        self.plot_area = None
+        self._layout.set_pane('plot', None)
+        self._update_layout()
+
+    def add_samples(self, series : str, samples):
+        """Adds numeric samples to a plotted series. Batches are much cheaper than single samples. Safe to call from any thread, the plot is redrawn on the next redraw.
+
+        Args:
+            series (str): the name of the series
+            samples: the samples, a list, array.array, memoryview or any other sequence of numbers
+
+        Raises:
+            RuntimeError: if there is no plot area, or no series exists with the passed name
+        """
+        if self.plot_pane is None:
+            raise RuntimeError('The TerminalUI has no plot area, see add_plot.')
+        self.plot_pane.add_samples(series, samples)
+
+
+    ### STATUS FUNCTIONS ###
+    def add_status_table(self, height_weight : float=0.4, formatter : Callable[[object], str]=str):
+        """Adds a status table below the receive area, and below the plot area if there is one, showing key and value rows that are updated in place, see update_status. The table can be scrolled when it has focus. Can be called before or after TerminalUI.run().
+
+        Args:
+            height_weight (float, optional): The layout weight of the status area, by default the receive area has a weight of 0.6. Defaults to 0.4.
+            formatter (Callable[[object], str], optional): converts values to the text shown. Defaults to str.
+
+        Raises:
+            RuntimeError: if a status table already exists
+        """
+        if self.status_table is not None:
+            raise RuntimeError('The TerminalUI already has a status table.')
+
+        self.status_table = StatusTable(formatter)
+        self.status_area = urwid.LineBox(self.status_table, title='STATUS')
+        self._layout.set_weight('status', height_weight)
+        self._layout.set_pane('status', self.status_area)
+        self._update_layout()
+
+    def remove_status_table(self):
+        """Removes the status table, discarding its rows."""
+
+        if self.status_table is None:
+            return
+        self.status_table = None
+        self.status_area = None
+        self._layout.set_pane('status', None)
+        self._update_layout()
+
+    def update_status(self, values : dict):
+        """Updates rows of the status table, adding rows for new keys. Safe to call from any thread, only the latest value of each key is applied on the next redraw and only the changed rows are re-rendered.
+
+        Args:
+            values (dict): key to value
+
+        Raises:
+            RuntimeError: if there is no status table
+        """
+        if self.status_table is None:
+            raise RuntimeError('The TerminalUI has no status table, see add_status_table.')
+        self.status_table.update(values)
+
+
+    ### REMOTE FUNCTIONS ###
+    def start_server(self, address, max_backlog : int=1048576) -> RemoteServer:
+        """Publishes this session to viewers, which attach with a RemoteSource (see examples/remote_viewer.py). Received lines, option changes and the command debug text are sent to every viewer as one serialized update per frame, and viewers that can not keep up are resynchronised rather than stalling the TerminalUI. Can be called before or after TerminalUI.run().
+
+        Args:
+            address: the path of a Unix domain socket, which only the current user can connect to, or a (host, port) to listen on with TCP. Use a host of '127.0.0.1' to only allow local viewers.
+            max_backlog (int, optional): The number of bytes queued for a viewer before it is resynchronised. Defaults to 1048576.
+
+        Raises:
+            RuntimeError: if a server is already running, or the Unix domain socket path exists and is not a socket or another server is listening on it
+
+        Returns:
+            RemoteServer: the server, its address attribute holds the address actually bound (e.g. the port when 0 is passed)
+        """
+        if self._server is not None:
+            raise RuntimeError('The TerminalUI is already serving viewers.')
+
+        self._server = RemoteServer(address, max_backlog)
+        if self.main_loop is not None:
+            self._server.attach(self)
+        return self._server
+
+    def stop_server(self):
+        """Disconnects all viewers and stops serving."""
+
+        if self._server is None:
+            return
+        self._server.close()
+        self._server = None
+
+    def get_remote_snapshot(self) -> dict:
+        """Returns the state sent to a viewer when it attaches: the title, the retained received lines, every option state and the command debug text."""
+
+        return {'title': self.title_text.get_text()[0], 'recv': self._receive_buffer.snapshot()[0],
+                'opt': {name: widget.get_state() for name, widget in self._option_index.items()},
+                'debug': self.command_txt.get_text()[0]}
 
 
     ### OPTIONS FUNCTIONS ###
-    def _initialise_options_area(self, options : dict):
-        """Initiliases the options area widgets and checks options data is valid.
+    def _initialise_options_area(self, options : Union[dict, OptionSchema]):
+        """Initiliases the options area widgets, compiling the options data into an OptionSchema if required.
 
         Args:
-            options (dict): the options data dictionary passed to the TerminalUI constructor.
+            options (Union[dict, OptionSchema]): the options data dictionary or OptionSchema passed to the TerminalUI constructor.
 
         Raises:
-            RuntimeError: if the options is not a dictionary
+            RuntimeError: if the options is not a dictionary or OptionSchema
             RuntimeError: if the value for each key in options is not a dictionary or a tuple
             RuntimeError: if the length of the tuple for the group name key value has a length greater than 3
             RuntimeError: if all options names are not unique
         """     
 
-        # Make sure options is a dictionary
-        if type(options) != dict:
-            raise RuntimeError('The passed options must be a dictionary')
-
-        # Store options dictionary - need to check all names are unique
-        self._options = options
-        names = []
-        for group_key in self._options:
-            # Get data from group name - this is dependent on type
-            if type(self._options[group_key]) == dict:
-                group_options_dict = self._options[group_key]
-            elif type(self._options[group_key]) == tuple:
-                # First element in tuple will be a dictionary containing the option names dictionary
-                group_options_dict = self._options[group_key][0]
-                if len(self._options[group_key]) > 3:
-                    raise RuntimeError('The length of the tuple for the value field for the %s key must have a length no greater than 3'%(group_key))
-            else:
-                raise RuntimeError('The value of the %s key within options should be dictionary or a tuple.'%(group_key))
+        # Validate and compile the options once, a prebuilt schema is used as is
+        if not isinstance(options, OptionSchema):
+            options = OptionSchema.from_dict(options)
+        self._option_dependencies = options.dependencies()
+        self._option_dependencies_shared = True
+        self._create_options_area(options.groups)
+        self._apply_option_dependencies(options.options, include_changed=True)
 
-            # Get keys from group_options_dict
-            for option_name in group_options_dict:
-                names.append(option_name)
+    def _create_options_area(self, groups : list):
+        """Creates the options list walker and the options area showing it.
 
-        if len(names) > len(set(names)):
-            raise RuntimeError('All option names must be unique.')
-        
-        # Generate options body - will also result in _option_widgets list been generated
-        self._generate_options_body()
+        Args:
+            groups (list): the GroupSpec of each group, in display order
+        """
+
+        # Generate options body - will also result in _option_index, _option_groups and _option_group_positions been generated
+        self._options_body = [urwid.Text('OPTIONS', align='center'), urwid.Divider()]
+        for group in groups:
+            self._option_group_positions[group.name] = len(self._options_body)
+            self._options_body.extend(self._generate_group_widgets(group.name, group.options, group.show_title, group.divider_on))
         
         # Create listbox and options area
-        options_listbox = urwid.ListBox(urwid.SimpleFocusListWalker(self._options_body))
-        self.options_area = urwid.LineBox(options_listbox) 
+        self._options_walker = urwid.SimpleFocusListWalker(self._options_body)
+        self.options_area = urwid.LineBox(urwid.ListBox(self._options_walker)) 
     
-    def _generate_options_body(self):
-        """Generates the list of widgets for the options area.
+    def _generate_group_widgets(self, group_name : str, options : list, show_title : bool, divider_on : bool) -> list:
+        """Generates the list of widgets for a group of options and adds them to the option name index.
+
+        Args:
+            group_name (str): the name of the group, used as the title
+            options (list): the list of OptionSpec within the group
+            show_title (bool): used to specify if the group name is shown above the options
+            divider_on (bool): used to specify if a blank row is left after the options
+
+        Returns:
+            list: the widgets for the group in display order
+        """
+        group_widgets = []
+
+        # Add urwid.Text() widget to be used as a title if required
+        if show_title:
+            group_widgets.append(urwid.Text(group_name, align='center'))
+
+        # Create the actual widgets, connect the change signal and index them by name
+        for option in options:
+            user_option = self._create_user_option(option)
+            group_widgets.append(user_option)
+            self._option_index[option.name] = user_option
+            self._option_group_names[option.name] = group_name
+
+        # Add urwid.Divider() widget if required
+        if divider_on:
+            group_widgets.append(urwid.Divider())
+
+        self._option_groups[group_name] = group_widgets
+        return group_widgets
+
+    def _create_user_option(self, option : OptionSpec) -> UserOption:
+        """Creates the UserOption widget for an option and connects its change signal.
+
+        Args:
+            option (OptionSpec): the option to create the widget for
+
+        Returns:
+            UserOption: the connected widget
+        """
+        number_format = get_numeric_format(option.number_format, option.digits) if option.number_format is not None else None
+        user_option = UserOption(option.name, option.value, option.caption, option.increment, list(option.limits), option.enter_fires_change_event, option.enabled, number_format, option.units)
+        user_option.key_bindings = self._option_key_bindings
+        urwid.connect_signal(user_option, 'value_change', self._option_item_selected)
+        return user_option
+
+    def _ensure_options_area(self):
+        """Creates an empty options area and places it beside the receive area, if the TerminalUI was created without options."""
+
+        if self.options_area is not None:
+            return
+        self._create_options_area([])
+        self._layout.set_pane('options', self.options_area)
+        self._update_layout()
+
+    def _set_option_conditions(self, option_name : str, enabled_when : dict):
+        """Sets, or removes if None, the enabled_when conditions of an option added or removed at runtime. The graph compiled by the OptionSchema is shared with it, so it is copied before the first change.
 
         Raises:
-            RuntimeError: if it is a selectable option list passed as part of a tuple and the tuple has a length greater than 4
-            RuntimeError: if it is an editable value option passed as part of a tuple and the tuple has a length greater than 6
-            RuntimeError: if the value for the option name key is not a str, int, float, list or tuple
+            RuntimeError: if the conditions would form a cycle
         """
+        if self._option_dependencies_shared:
+            self._option_dependencies = self._option_dependencies.copy()
+            self._option_dependencies_shared = False
+        self._option_dependencies.set_conditions(option_name, enabled_when)
 
-        self._options_body = [urwid.Text('OPTIONS', align='center'), urwid.Divider()]
-        self._option_widgets = []
-
-        for group_key in self._options:
-            # Get data from group key
-            if type(self._options[group_key]) == dict:
-                group_options_data = self._options[group_key]
-                show_title = True
-                divider_on = True
-            elif type(self._options[group_key]) == tuple:
-                # First element in tuple will be a dictionary containing the option names dictionary
-                group_options_data = self._options[group_key][0]
-                if len(self._options[group_key]) == 2:
-                    # Assume second element is show title
-                    show_title = self._options[group_key][1]
-                elif len(self._options[group_key]) == 3:
-                    # Assume second element is show title and divider on is third element
-                    show_title = self._options[group_key][1]
-                    divider_on = self._options[group_key][2] 
-
-            # Add urwid.Text() widget to _options_body to be used as a title if required
-            if show_title:
-                self._options_body.append(urwid.Text(group_key, align='center'))
-
-            # Add buttons to _options_body 
-            for option_name in group_options_data:
-
-                # Create defaults for optional components
-                caption = ""
-                increment = None
-                limits = [None, None]
-                enter_fires_change_event = True
-                enabled = True
-
-                # Create a UserOption widget
-                option_data = group_options_data[option_name]
-
-                # Determine if option_data is a list, a single value or a tuple containing optional UserOption parameters
-                if type(option_data) == tuple:
-                    # Option data contains optional UserOption parameters
-
-                    # Get value component from option_data tuple
-                    value = option_data[0]
-                    
-                    # Value component will determine if is a list of selectable values or an editable value
-                    if type(value) == list:
-                        # list of selectable values
-                        if len(option_data) == 2:
-                            caption = option_data[1]
-                        elif len(option_data) == 3:
-                            caption = option_data[1]
-                            enter_fires_change_event = option_data[2]
-                        elif len(option_data) == 4:
-                            caption = option_data[1]
-                            enter_fires_change_event = option_data[2]
-                            enabled = option_data[3]
-                        else:
-                            raise RuntimeError('The tuple containing the option data when the option is a list of selectable values must have a length less of 4 or less.')
-                    elif type(value) == int or type(value) == float or type(value) == str:
-                        # editable value
-                        if len(option_data) == 2:
-                            caption = option_data[1]
-                        elif len(option_data) == 3:
-                            caption = option_data[1]
-                            increment = option_data[2]
-                        elif len(option_data) == 4:
-                            caption = option_data[1]
-                            increment = option_data[2]
-                            limits = option_data[3]
-                        elif len(option_data) == 5:
-                            caption = option_data[1]
-                            increment = option_data[2]
-                            limits = option_data[3]
-                            enter_fires_change_event = option_data[4]
-                        elif len(option_data) == 6:
-                            caption = option_data[1]
-                            increment = option_data[2]
-                            limits = option_data[3]
-                            enter_fires_change_event = option_data[4]
-                            enabled = option_data[5]
-                        else:
-                            raise RuntimeError('The tuple containing the option data when the option is an editable value must have a length less of 6 or less.')
-
-                    
-                elif type(option_data) == list:
-                    # option_data is a list of selectable values
-                    value = option_data
-
-                elif type(option_data) == int or type(option_data) == float or type(option_data) == str:
-                    # option_data is an editable value
-                    value = option_data
-
-                else:
-                    raise RuntimeError('The option data must be a list, int, float or str, or a tuple where the first element is a list, int, float or str')
-
-                # print(option_name, value, caption, increment, limits, enter_fires_change_event, enabled)
-
-                # Create the actual widget, connect the change signal, append user_option to body and option_widgets list
-                user_option = UserOption(option_name, value, caption, increment, limits, enter_fires_change_event, enabled)
-                urwid.connect_signal(user_option, 'value_change', self._option_item_selected)
-                self._options_body.append(user_option)
-                self._option_widgets.append(user_option) # used to find user_options
-
-            # Add urwid.Divider() widget to _options_body if required
-            if divider_on:
-                self._options_body.append(urwid.Divider()) 
+    def _shift_group_positions(self, group_name : str, count : int):
+        """Moves the walker positions of the groups shown after a group, when widgets are inserted into or removed from it.
+
+        Args:
+            group_name (str): the name of the group that changed
+            count (int): the number of widgets inserted, negative if removed
+        """
+        after = False
+        for name in self._option_group_positions:
+            if after:
+                self._option_group_positions[name] += count
+            elif name == group_name:
+                after = True
+
+    def add_group(self, group_name : str, options : Union[dict, list]=None, show_title : bool=True, divider_on : bool=True, index : int=None):
+        """Adds a group of options to the options area without rebuilding it. The options area is created if the TerminalUI has no options.
+
+        Args:
+            group_name (str): the name of the group, used as the title
+            options (Union[dict, list], optional): either a dictionary of option name to option data, in the format accepted by the constructor, or a list of OptionSpec. Defaults to None.
+            show_title (bool, optional): used to specify if the group name is shown above the options. Defaults to True.
+            divider_on (bool, optional): used to specify if a blank row is left after the options. Defaults to True.
+            index (int, optional): the position of the group amongst the existing groups, appended to the end if None. Defaults to None.
+
+        Raises:
+            RuntimeError: if a group with the same name already exists
+            RuntimeError: if any option name is already in use, or the option data is invalid
+        """
+        if group_name in self._option_groups:
+            raise RuntimeError('A group with the name %s already exists.'%(group_name))
+
+        if isinstance(options, dict):
+            options = [OptionSpec.from_tuple(name, data) for name, data in options.items()]
+        options = options or []
+        names = [option.name for option in options]
+        if len(names) > len(set(names)) or any(name in self._option_index for name in names):
+            raise RuntimeError('All option names must be unique.')
+
+        added_conditions = []
+        try:
+            for option in options:
+                if option.enabled_when:
+                    self._set_option_conditions(option.name, option.enabled_when)
+                    added_conditions.append(option.name)
+        except RuntimeError:
+            for name in added_conditions:
+                self._set_option_conditions(name, None)
+            raise
+
+        # Only once the group is valid, so a rejected group does not leave an empty options area
+        self._ensure_options_area()
+
+        # Work out the walker position before the new group is added to _option_groups
+        group_names = list(self._option_groups)
+        if index is None or index >= len(group_names):
+            position = len(self._options_walker)
+            group_names.append(group_name)
+        else:
+            position = self._option_group_positions[group_names[index]]
+            group_names.insert(index, group_name)
+
+        group_widgets = self._generate_group_widgets(group_name, options, show_title, divider_on)
+        self._option_groups = {name: self._option_groups[name] for name in group_names}
+        self._option_group_positions = {name: self._option_group_positions.get(name, position) for name in group_names}
+        self._shift_group_positions(group_name, len(group_widgets))
+        self._options_walker[position:position] = group_widgets
+        self._mark_dirty('options')
+        self._apply_option_dependencies(names, include_changed=True)
+
+    def remove_group(self, group_name : str) -> bool:
+        """Removes a group and all of its options from the options area without rebuilding it.
+
+        Args:
+            group_name (str): the name of the group to remove
+
+        Returns:
+            bool: true if the group was removed, false if no group exists with the passed group_name
+        """
+        if group_name not in self._option_groups:
+            return False
+
+        group_widgets = self._option_groups.pop(group_name)
+        self._shift_group_positions(group_name, -len(group_widgets))
+        position = self._option_group_positions.pop(group_name)
+        del self._options_walker[position:position+len(group_widgets)]
+        self._mark_dirty('options')
+
+        names = [widget.get_option_name() for widget in group_widgets if isinstance(widget, UserOption)]
+        for name in names:
+            del self._option_index[name]
+            del self._option_group_names[name]
+            if name in self._option_dependencies:
+                self._set_option_conditions(name, None)
+        self._apply_option_dependencies(names)
+        return True
+
+    def add_option(self, group_name : str, option_name : str, option_data, index : int=None):
+        """Adds an option to an existing group without rebuilding the options area.
+
+        Args:
+            group_name (str): the name of the group to add the option to
+            option_name (str): the unique name of the option
+            option_data: the option data in the format accepted by the constructor (see examples/option_example.py), or an OptionSpec
+            index (int, optional): the position of the option within the group, appended to the end of the group if None. Defaults to None.
+
+        Raises:
+            RuntimeError: if no group exists with the passed group_name
+            RuntimeError: if the option name is already in use, or the option data is invalid
+        """
+        if group_name not in self._option_groups:
+            raise RuntimeError('No group with the name %s exists.'%(group_name))
+
+        option = option_data if isinstance(option_data, OptionSpec) else OptionSpec.from_tuple(option_name, option_data)
+        if option.name in self._option_index:
+            raise RuntimeError('All option names must be unique.')
+        if option.enabled_when:
+            self._set_option_conditions(option.name, option.enabled_when)
+        user_option = self._create_user_option(option)
+
+        # Position within the group, skipping the title and never going past the divider
+        group_widgets = self._option_groups[group_name]
+        first = 1 if group_widgets and not isinstance(group_widgets[0], (UserOption, urwid.Divider)) else 0
+        last = len(group_widgets) - (1 if group_widgets and isinstance(group_widgets[-1], urwid.Divider) else 0)
+        offset = last if index is None else min(first + index, last)
+
+        group_widgets.insert(offset, user_option)
+        self._shift_group_positions(group_name, 1)
+        self._options_walker.insert(self._option_group_positions[group_name] + offset, user_option)
+        self._mark_dirty('options')
+        self._option_index[option.name] = user_option
+        self._option_group_names[option.name] = group_name
+        self._apply_option_dependencies((option.name,), include_changed=True)
+
+    def remove_option(self, option_name : str) -> bool:
+        """Removes an option from the options area without rebuilding it.
+
+        Args:
+            option_name (str): the name of the option to remove
+
+        Returns:
+            bool: true if the option was removed, false if no option exists with the passed option_name
+        """
+        widget = self._option_index.pop(option_name, None)
+        if widget is None:
+            return False
+
+        group_name = self._option_group_names.pop(option_name)
+        group_widgets = self._option_groups[group_name]
+        offset = group_widgets.index(widget)
+        del group_widgets[offset]
+        self._shift_group_positions(group_name, -1)
+        del self._options_walker[self._option_group_positions[group_name] + offset]
+        self._mark_dirty('options')
+        if option_name in self._option_dependencies:
+            self._set_option_conditions(option_name, None)
+        self._apply_option_dependencies((option_name,))
+        return True
 
     def _option_item_selected(self, widget : urwid.Widget):
         """Event handler that calls the used defined option_item_selected_callback function passed to the constructor.
@@ -369,6 +1350,9 @@ class TerminalUI():
             widget (urwid.Widget): The widget that raised the change event
         """
 
+        if self._recorder is not None:
+            self._recorder.record('opt', (widget.get_option_name(), widget.get_value(), widget.get_value_index()))
+        self._mark_option_changed(widget)
         if self._option_item_selected_callback != None:
             self._option_item_selected_callback(self, widget.get_option_name(), widget.get_value(), widget.get_value_index())
         
@@ -386,22 +1370,19 @@ class TerminalUI():
         """
         
         # Find widget with that name
-        widget = None
-        for tmp_widget in self._option_widgets:
-            if tmp_widget.get_option_name() == option_name:
-                widget = tmp_widget
-                break
-        
+        widget = self._option_index.get(option_name)
         if widget is None:
             return False
 
         # Try to set option
         try:
             widget.set_value(option_value)
-            return True
         except RuntimeError:
             return False
 
+        self._mark_option_changed(widget)
+        return True
+
 
     def get_option(self, option_name : str):
         """Gets the value and index, if the option is a list of selectable values, for the specified option name. The return type for the value will automatically be converted to a int, float or bool if possible, else it will be returned as a string.
@@ -413,14 +1394,15 @@ class TerminalUI():
             tuple: (successful, value, index). Successfull will be true if an option with the given name could be found. The value will contain the value of the option. The index will contain the list index if the option is a list of selectable values.
         """
 
-        for widget in self._option_widgets:
-            if widget.get_option_name() == option_name:
-                return True, widget.get_value(), widget.get_value_index()
+        widget = self._option_index.get(option_name)
+        if widget is None:
+            return False, None, None
 
-        return False, None, None
+        return True, widget.get_value(), widget.get_value_index()
 
+    @_on_main_loop
     def set_option_list(self, option_name : str, options : list, idx : int=0) -> bool:
-        """Sets the option list for selectable list option. Will do nothing if the option is an editable value.
+        """Sets the option list for selectable list option. Will do nothing if the option is an editable value. Safe to call from any thread: when called from another thread or within batch the change is queued and made before the next redraw, see call_soon_threadsafe.
 
         Args:
             option_name (str): the name of the option to set the list for
@@ -428,27 +1410,54 @@ class TerminalUI():
             idx (int, optional): the index of the list to display. Defaults to 0.
 
         Returns:
-            bool: if the list was successfull set
+            bool: if the list was successfull set. None if the call was queued (from another thread or within batch), as the result is only known once the main loop makes it, use get_option afterwards to check it.
         """
         # Find widget with that name
-        widget = None
-        for widget in self._option_widgets:
-            if widget.get_option_name() == option_name:
-                return widget.set_option_list(options, idx)
-        
-        return False
+        widget = self._option_index.get(option_name)
+        if widget is None:
+            return False
+
+        if not widget.set_option_list(options, idx):
+            return False
 
+        self._mark_option_changed(widget)
+        return True
+
+    @_on_main_loop
     def enable_option(self, option_name : str, enable : bool):
-        """Enables/Disables an option
+        """Enables/Disables an option. Options whose enabled_when conditions depend on it are updated, and an option with enabled_when conditions is set again by them when the options it depends on change. Safe to call from any thread: when called from another thread or within batch the change is queued and made before the next redraw, see call_soon_threadsafe.
 
         Args:
             name (str): The name of the option want to enable/disable
             enable (bool): Specify to true/false if wanting to enable/disable the option
         """
 
-        for widget in self._option_widgets:
-            if widget.get_option_name() == option_name:
-                widget.enable(enable)
+        widget = self._option_index.get(option_name)
+        if widget is not None:
+            widget.enable(enable)
+            self._mark_dirty('options')
+            self._apply_option_dependencies((option_name,))
+
+    def _apply_option_dependencies(self, option_names, include_changed : bool=False):
+        """Enables or disables the options whose enabled_when conditions depend on the changed options, in one batch and in dependency order.
+
+        Args:
+            option_names: the names of the changed options
+            include_changed (bool, optional): Also evaluate the conditions of the changed options, used when options are added. Defaults to False.
+        """
+        if not self._option_dependencies:
+            return
+
+        changed = False
+        for name in self._option_dependencies.affected(option_names, include_changed):
+            widget = self._option_index.get(name)
+            if widget is not None:
+                enabled = self._option_dependencies.is_enabled(name, self._option_index)
+                if widget.selectable() != enabled:
+                    widget.enable(enabled)
+                    changed = True
+        if changed:
+            self._mark_dirty('options')
 
     def option_enter_fires_change_event(self, option_name : str, enter_fires_change_event : bool):
         """Speficies if an option fires a change event when the enter or space key is pressed or if the change event is fired as soon as the option is changed (i.e. left/arrow key alters option).
@@ -458,9 +1467,134 @@ class TerminalUI():
             enable (bool): Specify to true if want to fire change event when enter or space is pressed, or false as soon as option text is changed.
         """
 
-        for widget in self._option_widgets:
-            if widget.get_option_name() == option_name:
-                widget.enter_fires_change_event(enter_fires_change_event)
+        widget = self._option_index.get(option_name)
+        if widget is not None:
+            widget.enter_fires_change_event(enter_fires_change_event)
+
+
+    ### OPTION PERSISTENCE FUNCTIONS ###
+    def save_options(self, path : str):
+        """Saves the current value of every option to a JSON file. The file is written atomically, so it is never left partially written.
+
+        Args:
+            path (str): the path of the file to save to
+        """
+        _atomic_write_json(path, {name: widget.get_state() for name, widget in self._option_index.items()})
+
+    def load_options(self, path : str, fire_change_events : bool=False) -> list:
+        """Restores option values from a file written by save_options or by autosave. Options in the file that no longer exist, or whose value is no longer valid, are skipped.
+
+        Args:
+            path (str): the path of the file to load from
+            fire_change_events (bool, optional): Call the option_item_selected_callback for each restored option. Defaults to False.
+
+        Returns:
+            list: the names of the options that were restored
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            states = json.load(f)
+        return self.set_options(states, fire_change_events)
+
+    def set_options(self, states : dict, fire_change_events : bool=False) -> list:
+        """Applies many option states in one bulk update. Each state is a dictionary with a 'value' key and, for selectable list options, an 'index' key as returned by UserOption.get_state.
+
+        Args:
+            states (dict): option name to option state
+            fire_change_events (bool, optional): Call the option_item_selected_callback for each restored option. Defaults to False.
+
+        Returns:
+            list: the names of the options that were restored
+        """
+        restored = []
+        for name, state in states.items():
+            widget = self._option_index.get(name)
+            if widget is not None and widget.set_state(state):
+                restored.append(name)
+        if restored:
+            self._mark_dirty('options')
+            self._apply_option_dependencies(restored)
+        if self._server is not None:
+            for name in restored:
+                self._server.set_option_state(name, self._option_index[name].get_state())
+
+        # the restored values now match the file, so they do not need autosaving
+        with self._autosave_lock:
+            for name in restored:
+                self._autosave_dirty.pop(name, None)
+                self._autosave_state[name] = self._option_index[name].get_state()
+
+        if fire_change_events and self._option_item_selected_callback != None:
+            for name in restored:
+                widget = self._option_index[name]
+                self._option_item_selected_callback(self, name, widget.get_value(), widget.get_value_index())
+
+        return restored
+
+    def enable_autosave(self, path : str, delay : float=1.0, restore : bool=True):
+        """Automatically saves option values to a file whenever they change. Changes are batched, the file is rewritten at most once every delay seconds and only the changed options are snapshotted.
+
+        Args:
+            path (str): the path of the autosave file
+            delay (float, optional): The number of seconds to wait after a change before writing, further changes within this time are written in the same batch. Defaults to 1.0.
+            restore (bool, optional): Restore option values from the file if it already exists. Defaults to True.
+
+        Returns:
+            list: the names of the options that were restored
+        """
+        self.disable_autosave()
+
+        restored = []
+        with self._autosave_lock:
+            self._autosave_state = {name: widget.get_state() for name, widget in self._option_index.items()}
+        if restore and os.path.exists(path):
+            restored = self.load_options(path)
+
+        self._autosave_path = path
+        self._autosave_delay = delay
+        return restored
+
+    def disable_autosave(self):
+        """Writes any pending changes then stops autosaving."""
+
+        self.flush_autosave()
+        self._autosave_path = None
+
+    def flush_autosave(self):
+        """Immediately writes any pending autosave changes rather than waiting for the delay."""
+
+        # the timer thread and the main loop can both flush, an older snapshot must not be written after a newer one
+        with self._autosave_write_lock:
+            with self._autosave_lock:
+                if self._autosave_timer is not None:
+                    self._autosave_timer.cancel()
+                    self._autosave_timer = None
+                if self._autosave_path is None or not self._autosave_dirty:
+                    return
+                self._autosave_state.update(self._autosave_dirty)
+                self._autosave_dirty = {}
+                state = dict(self._autosave_state)
+                path = self._autosave_path
+            _atomic_write_json(path, state)
+
+    def _mark_option_changed(self, widget : UserOption):
+        """Snapshots the state of a changed option and schedules the autosave write if autosave is enabled.
+
+        Args:
+            widget (UserOption): the option that changed
+        """
+        self._mark_dirty('options')
+        self._apply_option_dependencies((widget.get_option_name(),))
+        if self._server is not None:
+            self._server.set_option_state(widget.get_option_name(), widget.get_state())
+        if self._autosave_path is None:
+            return
+
+        with self._autosave_lock:
+            self._autosave_dirty[widget.get_option_name()] = widget.get_state()
+            if self._autosave_timer is None:
+                self._autosave_timer = threading.Timer(self._autosave_delay, self.flush_autosave)
+                self._autosave_timer.daemon = True
+                self._autosave_timer.start()
 
 
     ### TIMER EVENTS ###
@@ -475,7 +1609,12 @@ class TerminalUI():
         self.main_loop.set_alarm_in(sec, callback, user_data)
 
 
+### HELPER FUNCTIONS ###
+def _raise(error : BaseException):
+    raise error
 
+def _atomic_write_json(path : str, data):
+    """Writes data as JSON to a temporary file in the same directory then renames it over path, so readers only ever see a complete file."""
 
-
-
+    with atomic_open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
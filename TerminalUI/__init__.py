@@ -1,2 +1,53 @@
-from TerminalUI.TerminalUI import *
-from TerminalUI.CustomUrwidWidgets import *
\ No newline at end of file
+# The submodules are only imported when one of their names is first used (PEP 562), so importing the
+# package does not pull in urwid. Tools that only sometimes launch the UI do not pay for it on every run.
+import sys
+import importlib
+
+# Classes that share their submodule's name (ReceiveBuffer, SharedRing, ...) are not listed, as the import system
+# binds the submodule to that package attribute and e.g. import TerminalUI.ReceiveBuffer as m must still give the
+# submodule. Import them from their submodule instead. TerminalUI is the one exception: the package has always
+# exported the class under that name, so it is rebound to the class whenever names are bound. Submodules import it
+# through the package (from TerminalUI import TerminalUI) so that importing one of them does not leave it unbound.
+_LAZY_NAMES = {
+    'TerminalUI': ('TerminalUI',),
+    'CustomUrwidWidgets': ('CommandEdit', 'UserOption', 'CustomFrame', 'CustomText', 'CustomFiller'),
+    'Headless': ('HeadlessScreen', 'EventRecorder', 'EventReplayer'),
+    'OptionSchema': ('OptionSpec', 'GroupSpec', 'OptionDependencies'),
+    'DataSources': ('DataSource', 'PipeSource', 'SubprocessSource', 'SocketSource', 'PtySource', 'FileTailSource'),
+    'ReceiveBuffer': ('EXPORT_FORMATS', 'export_history'),
+    'Rendering': ('FrameStats', 'ByteCountingScreen', 'CustomMainLoop'),
+    'SharedRing': ('SharedRingSource',),
+    'Plotting': ('SeriesBuffer', 'PlotPane'),
+    'Layout': ('default_layout',),
+    'Remote': ('RemoteServer', 'RemoteSource'),
+    'Correlation': ('CommandTracker',),
+    'CommandQueue': ('CommandScheduler',),
+    'NumericFormats': ('NumericFormat', 'NUMERIC_FORMATS', 'get_numeric_format'),
+    'AnsiText': ('AnsiLines', 'LineWidthLayout'),
+    'Sessions': ('SessionManager',),
+}
+_NAME_TO_MODULE = {name: module for module, names in _LAZY_NAMES.items() for name in names}
+_SUBMODULES = ('OptionSchema', 'ReceiveBuffer', 'SharedRing', 'StatusTable', 'Layout', 'KeyBindings')
+
+__all__ = list(_NAME_TO_MODULE) + list(_SUBMODULES)
+
+def __getattr__(name : str):
+    module_name = _NAME_TO_MODULE.get(name)
+    if module_name is None:
+        raise AttributeError('module %r has no attribute %r'%(__name__, name))
+
+    importlib.import_module('%s.%s'%(__name__, module_name))
+    _bind_loaded_names()
+    return globals()[name]
+
+def _bind_loaded_names():
+    """Caches the names of every loaded submodule as package attributes, so __getattr__ is only called once per name."""
+
+    for module_name, names in _LAZY_NAMES.items():
+        module = sys.modules.get('%s.%s'%(__name__, module_name))
+        if module is not None:
+            for name in names:
+                globals()[name] = getattr(module, name)
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
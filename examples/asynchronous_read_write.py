@@ -42,6 +42,10 @@ def option_item_selected_testing(terminal_ui : TerminalUI, option_name : str, va
         enable_read = value
         terminal_ui.set_receive_text('Read Enabled: %s'%str(value), False)
 
+    # change how the time each line was received is shown, previously received lines are updated too
+    elif option_name == 'timestamps':
+        terminal_ui.set_timestamp_mode(value)
+
 def read_thread_callback():
     global threads_enabled, enable_read
 
@@ -49,9 +53,8 @@ def read_thread_callback():
 
         while threads_enabled and enable_read:
             
-            # Create text to dump into receive textbo
-            txt = time.strftime("%Y-%m-%d %H:%M:%S - Read", time.gmtime(time.time()))
-            terminal_ui.set_receive_text(txt, False)
+            # Dump text into receive textbox, the TerminalUI records the time each line is received
+            terminal_ui.set_receive_text('Read', False)
             
             # sleep for 1 second
             time.sleep(1)
@@ -63,11 +66,12 @@ read_thread = None
 
 if __name__ == "__main__":    
     # Options
-    options = {'Read Settings': {'read_enabled': ([True, False], 'Read Enabled', False)}}
+    options = {'Read Settings': {'read_enabled': ([True, False], 'Read Enabled', False), 'timestamps': (['absolute', 'delta', 'hidden'], 'Timestamps', False)}}
 
     # Create TerminalUI object with the title 'Terminal UI v0.1', command_entered_testing function callback, 
     # the options specified and the option_item_selected_testing callback function.
     terminal_ui = TerminalUI('Terminal UI v0.1', command_entered_testing, options, option_item_selected_testing)
+    terminal_ui.set_timestamp_mode('absolute')
 
 
     # Start serial read thread
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import os
+import time
+import threading
+from TerminalUI import TerminalUI, PtySource
+
+
+### USER DEFINED FUNCTIONS ###
+def command_entered_testing(terminal_ui : TerminalUI, command : str):
+    """An example function that could be passed into the TerminalUI command_entered_callback argument, which will be called everytime a user enters a command.
+
+    Args:
+        terminal_ui (TerminalUI): The TerminalUI object that called the command_entered_callback function
+        command (str): The command entered by the user
+    """
+
+    # Send the command to the simulated device through the pseudo terminal
+    pty_source.write((command + '\n').encode())
+    terminal_ui.set_command_debug_text(" Sent: %s"%command)
+
+
+def simulated_device(port_name : str):
+    """Simulates a serial device by opening the pseudo terminal like a serial port, writing a line every second and echoing back any command received.
+
+    Args:
+        port_name (str): The name of the pseudo terminal, e.g. /dev/pts/3
+    """
+    global threads_enabled
+
+    fd = os.open(port_name, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    while threads_enabled:
+        # Write a line, the TerminalUI reads it in its own event loop so no reader thread is required
+        os.write(fd, time.strftime("%Y-%m-%d %H:%M:%S - Device Read\n", time.gmtime(time.time())).encode())
+
+        # Echo any commands sent by the TerminalUI
+        try:
+            os.write(fd, b'Device Echo: ' + os.read(fd, 1024))
+        except BlockingIOError:
+            pass
+
+        time.sleep(1)
+    os.close(fd)
+
+
+### MAIN FUNCTION ###
+threads_enabled = True
+
+if __name__ == "__main__":
+    # Create TerminalUI object with the title 'Terminal UI v0.1' and command_entered_testing function callback
+    terminal_ui = TerminalUI('Terminal UI v0.1', command_entered_testing)
+
+    # Create a pseudo terminal to act as a local stand-in for a serial port and add it as a data source.
+    # FileTailSource, PipeSource, SubprocessSource and SocketSource can be added in the same way.
+    pty_source = PtySource()
+    terminal_ui.add_data_source(pty_source)
+
+    # Start the simulated device
+    device_thread = threading.Thread(target=simulated_device, args=(pty_source.port_name,))
+    device_thread.start()
+
+    # Run the terminal catching crtl+c keyboard interrupt to close everything appropriately
+    try:
+        terminal_ui.run()
+    except KeyboardInterrupt:
+        pass
+
+    # Close appropriately
+    threads_enabled = False
+    device_thread.join()
+    terminal_ui.remove_data_source(pty_source)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+
+### CONSTANTS ###
+# The statements timed, importing the package alone should not load urwid
+STATEMENTS = {
+    'package': 'import TerminalUI',
+    'terminal_ui': 'from TerminalUI import TerminalUI',
+}
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+### USER DEFINED FUNCTIONS ###
+def import_time(statement : str) -> tuple:
+    """Runs a statement in a fresh interpreter with python -X importtime and parses the report written to stderr.
+
+    Args:
+        statement (str): the import statement to run
+
+    Returns:
+        tuple: (total_us, modules) where total_us is the sum of the cumulative time of each top level import and modules is a dictionary of module name to cumulative microseconds
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])))
+
+    # the interpreter's own startup imports are reported before the statement runs, so mark where it starts
+    code = 'import sys; sys.stderr.write("--- start\\n"); sys.stderr.flush(); ' + statement
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+    total_us = 0
+    modules = {}
+    started = False
+    for line in result.stderr.splitlines():
+        if line == '--- start':
+            started = True
+            continue
+        if not started or not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        # e.g. "import time:       412 |      13580 |   TerminalUI"
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+        if not name.startswith('  '): # top level imports are indented by a single space, nested imports by more
+            total_us += int(cumulative)
+    return total_us, modules
+
+
+def benchmark(repeat : int) -> dict:
+    """Times each of the STATEMENTS, taking the median of several runs to reduce noise.
+
+    Args:
+        repeat (int): the number of times to run each statement
+
+    Returns:
+        dict: statement name to a dictionary with the median total milliseconds and whether urwid was imported
+    """
+    results = {}
+    for name, statement in STATEMENTS.items():
+        totals = []
+        for _ in range(repeat):
+            total_us, modules = import_time(statement)
+            totals.append(total_us)
+        results[name] = {'statement': statement, 'median_ms': statistics.median(totals) / 1000, 'imports_urwid': 'urwid' in modules}
+    return results
+
+
+### MAIN FUNCTION ###
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measures the cost of importing TerminalUI with python -X importtime, so startup regressions are visible.')
+    parser.add_argument('--repeat', type=int, default=5, help='the number of runs of each import, the median is reported')
+    parser.add_argument('--record', help='append the results to this JSON lines file and compare them with the previous record')
+    parser.add_argument('--threshold', type=float, default=20.0, help='the percentage increase over the previous record reported as a regression')
+    args = parser.parse_args()
+
+    results = benchmark(args.repeat)
+    for name, result in results.items():
+        print('%-12s %-36s %8.2f ms  urwid imported: %s'%(name, result['statement'], result['median_ms'], result['imports_urwid']))
+
+    if args.record is None:
+        sys.exit(0)
+
+    # Compare with the last record before adding this one
+    previous = None
+    if os.path.exists(args.record):
+        with open(args.record, 'r', encoding='utf-8') as f:
+            lines = [line for line in f if line.strip()]
+        if lines:
+            previous = json.loads(lines[-1])
+
+    with open(args.record, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'time': time.time(), 'python': sys.version.split()[0], 'results': results}) + '\n')
+
+    regressed = False
+    if previous is not None:
+        for name, result in results.items():
+            before = previous['results'].get(name)
+            if before is None or before['median_ms'] <= 0:
+                continue
+            change = 100 * (result['median_ms'] - before['median_ms']) / before['median_ms']
+            print('%-12s %+.1f%% compared with the previous record'%(name, change))
+            if change > args.threshold or (result['imports_urwid'] and not before['imports_urwid']):
+                regressed = True
+                print('%-12s REGRESSION'%(name))
+    sys.exit(1 if regressed else 0)
@@ -3,6 +3,7 @@
 ### IMPORT MODULES ###
 from typing import Union
 from TerminalUI import TerminalUI
+from TerminalUI.OptionSchema import OptionSchema, OptionSpec
 
 
 ### USER DEFINED FUNCTIONS ###
@@ -32,15 +33,10 @@ def option_item_selected_testing(terminal_ui : TerminalUI, option_name : str, va
     txt = 'Option Name: %s, Current Value: %s, Index: %s'%(option_name, value, str(index))
     terminal_ui.set_receive_text(txt, clear=False)
 
-    # If the enable_options option fired the change event
-    if option_name == 'enable_options':
-        terminal_ui.enable_option('option_3', value)
-        terminal_ui.enable_option('option_4', value)
-        terminal_ui.enable_option('option_10', value)
-        terminal_ui.enable_option('option_11', value)
+    # The enable_options option is handled by the enabled_when conditions set in the schema below
 
     # if the enable_command option fired the change event
-    elif option_name == 'enable_command':
+    if option_name == 'enable_command':
         terminal_ui.enable_command(value)
 
     # if the show_cmd_debug option is fired
@@ -159,9 +155,26 @@ if __name__ == "__main__":
     # options['Demo Group 2'] = (demo_group_2_option_data, False, False) # hide the title and do not have a blank row after the set
 
 
+    # Compile the options into a schema so options can be enabled by the value of other options.
+    # Option 3, 4, 10 and 11 are only enabled while enable_options is True, the TerminalUI updates
+    # them whenever enable_options changes so the callback does not need to. A condition can also
+    # be a list of values, e.g. {'option_1': ['A', 'B']}, and an option can depend on several options.
+    # The conditions can also be given as the enabled_when key of an option record, see OptionSpec.
+    schema = OptionSchema.from_dict(options)
+    for option_name in ['option_3', 'option_4', 'option_10', 'option_11']:
+        schema.set_enabled_when(option_name, {'enable_options': True})
+
     # Create TerminalUI object with the title 'Terminal UI v0.1', command_entered_testing function callback, 
-    # the options specified and the option_item_selected_testing callback function.
-    terminal_ui = TerminalUI('Terminal UI v0.1', command_entered_testing, options, option_item_selected_testing)
+    # the options schema and the option_item_selected_testing callback function.
+    terminal_ui = TerminalUI('Terminal UI v0.1', command_entered_testing, schema, option_item_selected_testing)
+
+    # Typed numeric options only accept numbers of their format, show units after the value and step
+    # by the increment, or the smallest step of the format if no increment is given. The formats are
+    # 'int', 'float', 'fixed' (with digits decimal places) and 'hex' (padded to digits hex digits).
+    terminal_ui.add_group('Typed Value Options', [
+        OptionSpec('register', 0x1F, 'Register', limits=[0, 0xFFFF], number_format='hex', digits=4),
+        OptionSpec('voltage', 1.5, 'Voltage', 0.25, [-5, 5], number_format='fixed', digits=2, units='V'),
+        OptionSpec('samples', 10, 'Samples', 5, [0, 100], number_format='int', units='pcs')])
 
     # Set initial value for the enable_options command to be disabled
     terminal_ui.set_option('enable_options', 1)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import sys
+from TerminalUI import TerminalUI, RemoteSource
+
+
+### USER DEFINED FUNCTIONS ###
+def command_entered_testing(terminal_ui : TerminalUI, command : str):
+    """An example function that could be passed into the TerminalUI command_entered_callback argument, which will be called everytime a user enters a command.
+
+    Args:
+        terminal_ui (TerminalUI): The TerminalUI object that called the command_entered_callback function
+        command (str): The command entered by the user
+    """
+
+    # The viewer only watches the session, commands are not sent back to it
+    terminal_ui.set_command_debug_text(" Viewer is read only")
+
+
+### MAIN FUNCTION ###
+if __name__ == "__main__":
+    # The session being watched calls start_server, for example
+    #     terminal_ui.start_server('/tmp/terminal_ui.sock')
+    # or  terminal_ui.start_server(('127.0.0.1', 5000))
+    if len(sys.argv) != 2:
+        print('Usage: remote_viewer.py <socket path or host:port>')
+        sys.exit(1)
+    address = sys.argv[1]
+    if ':' in address:
+        host, port = address.rsplit(':', 1)
+        address = (host, int(port))
+
+    # Create TerminalUI object to show the session, the receive textbox, options with the same names and the command debug text follow the session
+    terminal_ui = TerminalUI('Terminal UI Viewer - %s'%(sys.argv[1]), command_entered_testing)
+    remote_source = RemoteSource(address)
+    terminal_ui.add_data_source(remote_source)
+
+    # Run the terminal catching crtl+c keyboard interrupt to close everything appropriately
+    try:
+        terminal_ui.run()
+    except KeyboardInterrupt:
+        pass
+
+    # Close appropriately, the session keeps running
+    terminal_ui.remove_data_source(remote_source)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import time
+import random
+import threading
+from TerminalUI import TerminalUI, SessionManager
+
+
+### USER DEFINED FUNCTIONS ###
+def command_entered(terminal_ui : TerminalUI, command : str):
+    """Echoes each command back into the receive textbox of the session it was entered in.
+
+    Args:
+        terminal_ui (TerminalUI): The TerminalUI object that called the command_entered_callback function
+        command (str): The command entered by the user
+    """
+    terminal_ui.append_receive_lines(['> %s'%(command)])
+
+
+def device_thread_callback(terminal_ui : TerminalUI, name : str, period : float):
+    """Simulates a device console, appending a reading every period seconds. Lines are received whether or not the session is shown."""
+
+    count = 0
+    while threads_enabled:
+        count += 1
+        terminal_ui.append_receive_lines(['%s reading %d: %.3f'%(name, count, random.random())])
+        time.sleep(period)
+
+
+### MAIN FUNCTION ###
+threads_enabled = True
+
+if __name__ == "__main__":
+    # One TerminalUI per device, shown one at a time. Press ctrl right/ctrl left to switch between them, or meta 1 to meta 3 to show one directly
+    devices = {'Device 1': 0.1, 'Device 2': 0.5, 'Device 3': 1.0}
+    session_manager = SessionManager()
+    for name, period in devices.items():
+        terminal_ui = TerminalUI('%s (ctrl left/right to switch)'%(name), command_entered)
+        session_manager.add_session(name, terminal_ui)
+        threading.Thread(target=device_thread_callback, args=(terminal_ui, name, period), daemon=True).start()
+
+    # Run every session in one main loop, catching ctrl+c keyboard interrupt to close everything appropriately
+    try:
+        session_manager.run()
+    except KeyboardInterrupt:
+        pass
+
+    # Close appropriately
+    threads_enabled = False
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import threading
+from TerminalUI import TerminalUI
+
+
+### CONSTANTS ###
+# The default key script: move to the command area, type and enter a command, walk the command history, then move to the options and change one
+DEFAULT_KEY_SCRIPT = 'tab,p,i,n,g,enter,up,down,tab,down,right'
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+### USER DEFINED FUNCTIONS ###
+def rss_mb() -> float:
+    """Returns the resident set size of this process in megabytes, or the peak resident set size where /proc is not available."""
+
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE / 1e6
+    except OSError:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 1e6 if sys.platform == 'darwin' else maxrss / 1e3
+
+
+def cpu_seconds() -> float:
+    """Returns the user and system CPU time used by this process."""
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def percentile(values : list, percent : float) -> float:
+    """Returns the nearest rank percentile of a list of values, or 0 if it is empty."""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = -(-percent * len(ordered) // 100)     # ceil
+    return ordered[max(int(rank), 1) - 1]
+
+
+class StressHarness():
+    """Drives a TerminalUI with producer threads appending received lines at a fixed rate, a scripted sequence of keypresses and a frame latency probe, and samples the dropped lines, CPU and RSS while it runs.
+
+    Frame latency is measured by a probe thread that sets the command debug text to a unique marker and times how long it takes to appear in a drawn frame. This is the latency of any update made from another thread, and is not affected by received lines scrolling off before they are drawn.
+    """
+
+    def __init__(self, args : argparse.Namespace):
+        self.args = args
+        self.terminal_ui = TerminalUI('Stress Harness', self.command_entered, {'Stress': {'status': (['on', 'off'], 'Status', False)}},
+                                      receive_history_size=args.history)
+        self.terminal_ui.set_receive_policy(args.policy, args.high_water)
+        self.running = False
+        self.produced = [0] * args.producers     # lines produced by each producer
+        self.commands = 0
+        self.keys_sent = 0
+        self.latencies = []                     # frame latency of each probe in seconds
+        self.probes_lost = 0
+        self.samples = []
+        self._probe_marker = None
+        self._probe_seen = threading.Event()
+
+    def command_entered(self, terminal_ui : TerminalUI, command : str):
+        self.commands += 1
+
+    ### THREADS ###
+    def producer(self, index : int):
+        """Appends lines at the line rate in batches, catching up on any lines that are due after a slow batch."""
+
+        args = self.args
+        padding = 'x' * max(args.line_size - 24, 0)
+        colour = '\x1b[3%dm'%(index % 7 + 1)
+        start = time.monotonic()
+        sent = 0
+        while self.running:
+            due = int((time.monotonic() - start) * args.rate) - sent
+            if due > 0:
+                lines = ['p%02d %010d %s'%(index, sent + i, padding) for i in range(due)]
+                if args.ansi:
+                    lines = [colour + line + '\x1b[0m' for line in lines]
+                self.terminal_ui.append_receive_lines(lines)
+                sent += due
+                self.produced[index] = sent
+            time.sleep(args.batch_period)
+
+    def key_script(self):
+        """Presses each key of the key script in turn, repeating it until the harness stops."""
+
+        keys = self.args.keys.split(',') if self.args.keys else []
+        while self.running and keys:
+            for key in keys:
+                if not self.running:
+                    return
+                self.terminal_ui.call_soon_threadsafe(self._press_key, key)
+                self.keys_sent += 1
+                time.sleep(self.args.key_period)
+
+    def _press_key(self, key : str):
+        """Passes a key through the main loop's input filter then to the widgets, as a typed key is, so global shortcuts and recording see it too."""
+
+        main_loop = self.terminal_ui.main_loop
+        keys = main_loop.input_filter([key], [])
+        if keys:
+            main_loop.process_input(keys)
+
+    def probe(self):
+        """Measures the time from setting the command debug text on this thread to it being drawn."""
+
+        count = 0
+        while self.running:
+            count += 1
+            self._probe_seen.clear()
+            self._probe_marker = ('probe %08d'%(count)).encode('utf-8')
+            sent = time.perf_counter()
+            self.terminal_ui.set_command_debug_text(self._probe_marker.decode('utf-8'))
+            if self._probe_seen.wait(self.args.probe_timeout):
+                self.latencies.append(time.perf_counter() - sent)
+            elif self.running:
+                self.probes_lost += 1
+            self._probe_marker = None
+            time.sleep(self.args.probe_period)
+
+    def sampler(self):
+        """Samples the counts, CPU use and RSS every sample period, then stops the TerminalUI after the duration."""
+
+        args = self.args
+        start = last_time = time.monotonic()
+        last_cpu = cpu_seconds()
+        while time.monotonic() - start < args.duration:
+            time.sleep(min(args.sample_period, max(args.duration - (time.monotonic() - start), 0)))
+            now, cpu = time.monotonic(), cpu_seconds()
+            frames = self.terminal_ui.get_frame_stats()
+            sample = {'seconds': now - start, 'produced': sum(self.produced), 'dropped': self.terminal_ui.get_receive_dropped(),
+                      'cpu_percent': 100 * (cpu - last_cpu) / max(now - last_time, 1e-9), 'rss_mb': rss_mb(),
+                      'frames': frames['frames'], 'mean_frame_ms': frames['mean_frame_ms']}
+            self.samples.append(sample)
+            last_time, last_cpu = now, cpu
+            if args.verbose:
+                print('%7.1f s %10d produced %10d dropped %6.1f%% cpu %8.1f MB rss'%(sample['seconds'], sample['produced'], sample['dropped'],
+                      sample['cpu_percent'], sample['rss_mb']), file=sys.stderr)
+
+        self.running = False
+        self.terminal_ui.call_soon_threadsafe(self.terminal_ui.exit)
+
+    def _draw_screen(self, draw_screen):
+        """Wraps the draw_screen method of the screen to look for the probe marker in each drawn frame."""
+
+        def timed_draw_screen(size, canvas):
+            draw_screen(size, canvas)
+            marker = self._probe_marker
+            if marker is not None and any(marker in row for row in canvas.text):
+                self._probe_seen.set()
+        return timed_draw_screen
+
+    def _started(self):
+        """Called by the main loop once it is running, starts the threads."""
+
+        screen = self.terminal_ui.main_loop.screen
+        screen.draw_screen = self._draw_screen(screen.draw_screen)
+        self.running = True
+        targets = [(self.producer, (index,)) for index in range(self.args.producers)] + [(self.key_script, ()), (self.probe, ()), (self.sampler, ())]
+        for target, args in targets:
+            threading.Thread(target=target, args=args, daemon=True).start()
+
+    ### RUN ###
+    def run(self) -> dict:
+        """Runs the TerminalUI until the duration has passed and returns the results."""
+
+        args = self.args
+        self.terminal_ui.call_soon_threadsafe(self._started)
+        rss_start = rss_mb()
+        self.terminal_ui.run(args.redraw_period, headless=not args.terminal, screen_size=(args.cols, args.rows), count_bytes=True)
+        self.running = False
+
+        # RSS growth is measured from the first sample, after the receive history has had time to fill
+        frames = self.terminal_ui.get_frame_stats()
+        produced = sum(self.produced)
+        first, last = (self.samples[0], self.samples[-1]) if self.samples else ({'rss_mb': rss_start}, {'rss_mb': rss_mb()})
+        cpu_percents = [sample['cpu_percent'] for sample in self.samples]
+        return {'producers': args.producers, 'rate': args.rate, 'line_size': args.line_size, 'policy': args.policy,
+                'duration': args.duration, 'produced': produced, 'dropped': self.terminal_ui.get_receive_dropped(),
+                'dropped_percent': 100 * self.terminal_ui.get_receive_dropped() / max(produced, 1),
+                'keys_sent': self.keys_sent, 'commands': self.commands,
+                'frames': frames['frames'], 'mean_frame_ms': frames['mean_frame_ms'], 'mean_frame_bytes': frames['mean_frame_bytes'],
+                'latency_p50_ms': 1000 * percentile(self.latencies, 50), 'latency_p99_ms': 1000 * percentile(self.latencies, 99),
+                'latency_max_ms': 1000 * max(self.latencies, default=0.0), 'probes': len(self.latencies), 'probes_lost': self.probes_lost,
+                'cpu_mean_percent': sum(cpu_percents) / max(len(cpu_percents), 1), 'cpu_max_percent': max(cpu_percents, default=0.0),
+                'rss_start_mb': first['rss_mb'], 'rss_end_mb': last['rss_mb'], 'rss_growth_mb': last['rss_mb'] - first['rss_mb'],
+                'samples': self.samples}
+
+
+### MAIN FUNCTION ###
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Stress tests the asynchronous read/write path of TerminalUI with producer threads and scripted keypresses, reporting dropped lines, CPU, RSS growth and frame latency.')
+    parser.add_argument('--producers', type=int, default=4, help='the number of producer threads')
+    parser.add_argument('--rate', type=float, default=5000, help='the lines per second appended by each producer')
+    parser.add_argument('--line-size', type=int, default=80, help='the characters in each line')
+    parser.add_argument('--batch-period', type=float, default=0.01, help='the seconds between each batch of lines appended by a producer')
+    parser.add_argument('--ansi', action='store_true', help='colour each line with ANSI escape sequences')
+    parser.add_argument('--duration', type=float, default=30.0, help='the seconds to run for')
+    parser.add_argument('--policy', default='drop_oldest', choices=['block', 'drop_oldest', 'drop_newest', 'sample'], help='the receive policy')
+    parser.add_argument('--high-water', type=int, default=None, help='the receive policy high water mark')
+    parser.add_argument('--history', type=int, default=1000, help='the receive history size')
+    parser.add_argument('--keys', default=DEFAULT_KEY_SCRIPT, help='comma separated urwid keys pressed in turn and repeated, empty for none')
+    parser.add_argument('--key-period', type=float, default=0.05, help='the seconds between keypresses')
+    parser.add_argument('--probe-period', type=float, default=0.05, help='the seconds between frame latency probes')
+    parser.add_argument('--probe-timeout', type=float, default=5.0, help='the seconds before a probe that has not been drawn is counted as lost')
+    parser.add_argument('--sample-period', type=float, default=1.0, help='the seconds between CPU and RSS samples')
+    parser.add_argument('--redraw-period', type=float, default=0.05, help='the TerminalUI redraw period')
+    parser.add_argument('--terminal', action='store_true', help='draw to the terminal rather than a headless screen')
+    parser.add_argument('--cols', type=int, default=120, help='the columns of the headless screen')
+    parser.add_argument('--rows', type=int, default=40, help='the rows of the headless screen')
+    parser.add_argument('--record', help='append the results to this JSON lines file')
+    parser.add_argument('--max-latency-p99-ms', type=float, default=None, help='fail if the p99 frame latency is greater than this')
+    parser.add_argument('--max-rss-growth-mb', type=float, default=None, help='fail if the RSS grows by more than this after the first sample')
+    parser.add_argument('--max-dropped-percent', type=float, default=None, help='fail if more than this percentage of lines are dropped')
+    parser.add_argument('--verbose', action='store_true', help='print each sample to stderr while running')
+    args = parser.parse_args()
+
+    results = StressHarness(args).run()
+    print('produced   %d lines from %d producers at %g lines/s each, %d dropped (%.1f%%)'%(results['produced'], results['producers'], results['rate'], results['dropped'], results['dropped_percent']))
+    print('keys       %d pressed, %d commands entered'%(results['keys_sent'], results['commands']))
+    print('frames     %d drawn, %.2f ms and %.0f bytes per frame'%(results['frames'], results['mean_frame_ms'], results['mean_frame_bytes']))
+    print('latency    p50 %.1f ms p99 %.1f ms max %.1f ms over %d probes, %d lost'%(results['latency_p50_ms'], results['latency_p99_ms'], results['latency_max_ms'], results['probes'], results['probes_lost']))
+    print('cpu        mean %.1f%% max %.1f%%'%(results['cpu_mean_percent'], results['cpu_max_percent']))
+    print('rss        %.1f MB to %.1f MB, %+.1f MB'%(results['rss_start_mb'], results['rss_end_mb'], results['rss_growth_mb']))
+
+    if args.record is not None:
+        with open(args.record, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(dict(results, time=time.time(), python=sys.version.split()[0])) + '\n')
+
+    # Release qualification thresholds
+    failures = []
+    if args.max_latency_p99_ms is not None and results['latency_p99_ms'] > args.max_latency_p99_ms:
+        failures.append('p99 frame latency %.1f ms is greater than %.1f ms'%(results['latency_p99_ms'], args.max_latency_p99_ms))
+    if args.max_rss_growth_mb is not None and results['rss_growth_mb'] > args.max_rss_growth_mb:
+        failures.append('RSS growth %.1f MB is greater than %.1f MB'%(results['rss_growth_mb'], args.max_rss_growth_mb))
+    if args.max_dropped_percent is not None and results['dropped_percent'] > args.max_dropped_percent:
+        failures.append('%.1f%% of lines dropped is greater than %.1f%%'%(results['dropped_percent'], args.max_dropped_percent))
+    for failure in failures:
+        print('FAIL       ' + failure)
+    sys.exit(1 if failures else 0)
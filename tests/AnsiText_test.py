@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import urwid
+import pytest
+from TerminalUI.AnsiText import AnsiLines, LineWidthLayout
+
+
+### HELPER FUNCTIONS ###
+def parse(line : str) -> tuple:
+    return AnsiLines().parse(line)
+
+
+def foreground(line : str) -> str:
+    """Returns the foreground of the first run of a parsed line."""
+    return parse(line)[1][0][0].foreground
+
+
+### TESTS ###
+def test_plain_and_styled_lines():
+    assert parse('plain') == ('plain', [], 5)
+    text, runs, width = parse('a\x1b[1;31mbold red\x1b[0m b')
+    assert text == 'abold red b' and width == 11
+    assert runs[0] == (None, 1) and runs[2] == (None, 2)
+    assert runs[1][1] == 8 and runs[1][0].foreground == 'dark red,bold'
+
+
+def test_non_sgr_escapes_are_removed():
+    assert parse('\x1b[2Ja\x1b[10;5Hb\x1b]0;title\x07c\x1b=d\x1b(Be\x1bcf') == ('abcdef', [], 6)
+
+
+@pytest.mark.parametrize('colon_form, semicolon_form', [
+    ('\x1b[38:5:196mx', '\x1b[38;5;196mx'),
+    ('\x1b[38:2::255:128:0mx', '\x1b[38;2;255;128;0mx'),
+    ('\x1b[38:2:255:128:0mx', '\x1b[38;2;255;128;0mx'),
+    ('\x1b[48:5:21;1mx', '\x1b[48;5;21;1mx'),
+])
+def test_colon_sub_parameters(colon_form, semicolon_form):
+    assert parse(colon_form) == parse(semicolon_form)
+    assert parse(colon_form)[1]
+
+
+@pytest.mark.parametrize('line', ['\x1b[?25mx', '\x1b[<1mx', '\x1b[=5mx', '\x1b[1 mx', '\x1b[38;5mx', '\x1b[38:5mx',
+                                  '\x1b[38;2;1;2mx', '\x1b[38:9:1mx', '\x1b[99999999999999999999mx', '\x1b[mx', '\x1b[;mx'])
+def test_malformed_sequences_leave_default_attributes(line):
+    assert parse(line) == ('x', [], 1)
+
+
+def test_out_of_range_values_are_clamped():
+    assert foreground('\x1b[38;5;999mx') == foreground('\x1b[38;5;255mx')
+    assert foreground('\x1b[38;2;999;0;0mx') == foreground('\x1b[38;2;255;0;0mx')
+
+
+def test_underline_sub_parameters_and_underline_colour():
+    assert 'underline' in foreground('\x1b[4:3mx')
+    assert parse('\x1b[4m\x1b[4:0mx') == ('x', [], 1)
+    # the underline colour is not shown, and its parameters are not read as other settings
+    assert parse('\x1b[58;5;9mx') == ('x', [], 1)
+
+
+def test_wide_characters_and_cache():
+    ansi_lines = AnsiLines()
+    text, attributes, widths = ansi_lines.lines(['ascii', '\x1b[32m日本\x1b[0m', ''])
+    assert text == 'ascii\n日本\n' and widths == [5, 4, 0]
+    assert sum(length for _, length in attributes) == len(text)
+    assert ansi_lines.lines(['plain']) == ('plain', [], [5])
+
+
+@pytest.mark.parametrize('wrap', ['space', 'any', 'clip'])
+def test_line_width_layout_matches_standard_layout(wrap):
+    text = 'short\n' + 'a much longer line that has to be wrapped ' * 3 + '\n\n日本語のテキスト\nend'
+    widths = [AnsiLines().parse(line)[2] for line in text.split('\n')]
+    layout = LineWidthLayout()
+    layout.set_widths(widths)
+    standard = urwid.StandardTextLayout()
+    for width in (10, 20, 80):
+        expected = urwid.Text(text, wrap=wrap, layout=standard).render((width,)).text
+        assert urwid.Text(text, wrap=wrap, layout=layout).render((width,)).text == expected
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import time
+import threading
+import pytest
+from TerminalUI import TerminalUI
+from TerminalUI.CommandQueue import CommandScheduler
+
+
+### HELPER FUNCTIONS ###
+class Recorder():
+    """A send function that records each command and the time it was sent, raising the exception queued for a command."""
+
+    def __init__(self, errors : dict=None):
+        self.sent = []
+        self.errors = errors or {}
+        self.event = threading.Event()
+
+    def __call__(self, command : str):
+        self.sent.append((command, time.monotonic()))
+        self.event.set()
+        if command in self.errors:
+            raise self.errors[command]
+
+
+def wait_for(condition, timeout : float=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+### TESTS ###
+def test_token_bucket_paces_commands():
+    recorder = Recorder()
+    scheduler = CommandScheduler(recorder, rate=20, burst=3)
+    for number in range(6):
+        scheduler.put('cmd%d'%(number))
+    scheduler.start()
+    try:
+        wait_for(lambda: len(recorder.sent) == 6)
+    finally:
+        scheduler.stop()
+
+    times = [sent_time for _, sent_time in recorder.sent]
+    assert times[2] - times[0] < 0.03                           # the burst is sent back to back
+    assert all(0.03 < later - earlier < 0.15 for earlier, later in zip(times[2:], times[3:]))    # then one every 1 / rate seconds
+    assert [command for command, _ in recorder.sent] == ['cmd%d'%(number) for number in range(6)]
+    assert scheduler.sent == 6 and scheduler.depth == 0
+
+
+def test_priority_and_max_in_flight():
+    recorder = Recorder()
+    scheduler = CommandScheduler(recorder, rate=1000, burst=10, max_in_flight=2)
+    scheduler.put('low', 5)
+    scheduler.put('high', 0)
+    scheduler.put('middle', 1)
+    scheduler.start()
+    try:
+        wait_for(lambda: scheduler.in_flight == 2)
+        time.sleep(0.05)
+        assert [command for command, _ in recorder.sent] == ['high', 'middle']
+        scheduler.complete()
+        wait_for(lambda: len(recorder.sent) == 3)
+    finally:
+        scheduler.stop()
+    assert recorder.sent[2][0] == 'low'
+    assert scheduler.describe() == '0 queued 2/2 in flight'
+
+
+def test_transport_errors_are_counted():
+    recorder = Recorder({'unplugged': OSError('device disconnected')})
+    scheduler = CommandScheduler(recorder, rate=1000, burst=10)
+    for command in ('first', 'unplugged', 'last'):
+        scheduler.put(command)
+    scheduler.start()
+    try:
+        wait_for(lambda: len(recorder.sent) == 3)
+    finally:
+        scheduler.stop()
+    assert scheduler.sent == 2 and scheduler.errors == 1
+    assert isinstance(scheduler.last_error, OSError)
+
+
+def test_other_errors_are_passed_on():
+    failures = []
+    recorder = Recorder({'bug': ValueError('bad command')})
+    scheduler = CommandScheduler(recorder, rate=1000, burst=10, error_callback=lambda command, error: failures.append((command, error)))
+    scheduler.put('bug')
+    scheduler.put('after')
+    scheduler.start()
+    try:
+        wait_for(lambda: len(recorder.sent) == 2)
+    finally:
+        scheduler.stop()
+    assert len(failures) == 1 and failures[0][0] == 'bug' and isinstance(failures[0][1], ValueError)
+
+    # without an error callback the worker thread stops
+    recorder = Recorder({'bug': ValueError('bad command')})
+    scheduler = CommandScheduler(recorder, rate=1000, burst=10)
+    scheduler.put('bug')
+    scheduler.put('after')
+    exceptions = []
+    excepthook, threading.excepthook = threading.excepthook, lambda args: exceptions.append(args.exc_type)
+    try:
+        scheduler.start()
+        wait_for(lambda: exceptions)
+    finally:
+        threading.excepthook = excepthook
+        scheduler.stop()
+    assert exceptions == [ValueError] and [command for command, _ in recorder.sent] == ['bug']
+
+
+def test_callback_errors_are_raised_on_the_main_loop():
+    def command_entered(terminal_ui, command):
+        raise ValueError(command)
+
+    terminal_ui = TerminalUI('Command Queue Test', command_entered)
+    terminal_ui.enable_command_queue(rate=1000)
+    terminal_ui.queue_command('bad command')
+    with pytest.raises(ValueError, match='bad command'):
+        terminal_ui.run(redraw_period=0.01, headless=True)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import pytest
+from TerminalUI.Correlation import CommandTracker
+
+
+### HELPER FUNCTIONS ###
+def echo_matcher(command : str, line : str) -> bool:
+    return line == 'ok ' + command
+
+
+### TESTS ###
+def test_latency_and_percentiles():
+    tracker = CommandTracker(echo_matcher, capacity=4)
+    assert tracker.latency(1) is None and tracker.percentiles() == (None, None)
+
+    ids = [tracker.submit('cmd%d'%(number)) for number in range(6)]
+    submitted = tracker._pending[0][2]
+    # answered out of order, each 0.1 seconds later than the last
+    order = [1, 0, 2, 3, 5, 4]
+    assert tracker.match(['ok cmd%d'%(number) for number in order], [submitted + 0.1 * (n + 1) for n in range(6)]) == 6
+
+    assert tracker.pending == 0 and tracker.completed == 6
+    # the window holds the last 4 completed commands
+    assert tracker.latency(ids[1]) is None and tracker.latency(ids[0]) is None
+    assert tracker.latency(ids[2]) == pytest.approx(0.3, abs=0.01)
+    assert tracker.latency(ids[4]) == pytest.approx(0.6, abs=0.01)
+    assert tracker.latency(0) is None and tracker.latency(100) is None
+    assert tracker.percentiles() == (pytest.approx(0.4, abs=0.01), pytest.approx(0.6, abs=0.01))
+    assert tracker.last[1] == 'cmd4'
+
+
+def test_unmatched_lines_and_expiry():
+    tracker = CommandTracker(echo_matcher, timeout=0.01)
+    command_id = tracker.submit('ping')
+    assert tracker.match(['noise', 'ok pong']) == 0
+    tracker._pending[0] = (command_id, 'ping', tracker._pending[0][2] - 1)
+    assert tracker.expire() == 1
+    assert tracker.expired == 1 and tracker.latency(command_id) is None
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import urwid
+from TerminalUI import TerminalUI
+from TerminalUI.CustomUrwidWidgets import CustomText, CustomFiller
+
+
+### HELPER FUNCTIONS ###
+def run_script(terminal_ui : TerminalUI, steps : list):
+    """Runs a TerminalUI headless, calling each step on the main loop in turn then exiting."""
+
+    def next_step(index=0):
+        if index == len(steps):
+            terminal_ui.exit()
+        steps[index]()
+        terminal_ui.main_loop.set_alarm_in(0.01, lambda main_loop, user_data: next_step(index + 1))
+
+    terminal_ui.call_soon_threadsafe(next_step)
+    terminal_ui.run(redraw_period=0.01, headless=True)
+
+
+### TESTS ###
+def test_size_is_held_per_instance():
+    first_text, second_text = CustomText(''), CustomText('')
+    filler = CustomFiller(first_text)
+    resizes = []
+    urwid.connect_signal(first_text, 'resize', lambda widget, old_size, size: resizes.append((old_size, size)))
+
+    assert first_text.set_size((5, 10)) and not first_text.set_size((5, 10))
+    assert first_text.get_size() == (5, 10) and second_text.get_size() == (0, 0) and filler.get_size() == (0, 0)
+    assert '_size' in vars(first_text) and '_size' in vars(second_text)
+    assert resizes == [((0, 0), (5, 10))]
+
+
+def test_screen_resize_reflows_once():
+    terminal_ui = TerminalUI('Resize Test', lambda terminal_ui, command: None)
+    terminal_ui.append_receive_lines(['line %d'%(number) for number in range(100)])
+    resizes, reflows = [], []
+    urwid.connect_signal(terminal_ui.receive_txt, 'resize', lambda widget, old_size, size: resizes.append(size))
+    update_receive_text = terminal_ui._update_receive_text
+    terminal_ui._update_receive_text = lambda: (reflows.append(terminal_ui.receive_filler.get_size()), update_receive_text())
+
+    def resize(screen_size):
+        return lambda: terminal_ui.main_loop.screen.set_screen_size(screen_size)
+
+    def count():
+        counts.append((len(resizes), len(reflows)))
+
+    # the first step runs before the first frame, once the lines are shown and the receive area is sized
+    counts = []
+    run_script(terminal_ui, [lambda: None, count, resize((100, 30)), lambda: None, count, resize((100, 30)), lambda: None, count])
+    (resized, reflowed), *later = counts
+    assert resized == 1 and later == [(resized + 1, reflowed + 1)] * 2
+    assert resizes[-1] == reflows[-1] == terminal_ui.receive_filler.get_size()
+    assert any('line 99' in row for row in terminal_ui.get_screen_text())
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import pytest
+from TerminalUI.DataSources import DataSource
+
+
+### HELPER FUNCTIONS ###
+class ListTerminalUI():
+    """Stands in for a TerminalUI, collecting the lines a data source appends."""
+
+    def __init__(self):
+        self.lines = []
+
+    def append_receive_lines(self, lines : list):
+        self.lines.extend(lines)
+
+
+class BytesSource(DataSource):
+    """A data source fed directly with feed rather than read from a file descriptor."""
+
+    def fileno(self) -> int:
+        return None
+
+    def close(self):
+        pass
+
+
+### TESTS ###
+def test_data_source_is_abstract():
+    with pytest.raises(TypeError):
+        DataSource()
+
+
+def test_feed_splits_partial_lines():
+    terminal_ui = ListTerminalUI()
+    source = BytesSource()
+    source._terminal_ui = terminal_ui
+    source.feed(b'first\r\nsec')
+    source.feed(b'ond\nthi')
+    assert terminal_ui.lines == ['first', 'second']
+    source.feed(b'rd', final=True)
+    assert terminal_ui.lines == ['first', 'second', 'third']
+    assert source.lines_read == 3 and source.bytes_read == 19
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+from TerminalUI import TerminalUI
+
+
+### HELPER FUNCTIONS ###
+def run_script(terminal_ui : TerminalUI, steps : list):
+    """Runs a TerminalUI headless, calling each step on the main loop in turn then exiting."""
+
+    def next_step(index=0):
+        if index == len(steps):
+            terminal_ui.exit()
+        steps[index]()
+        terminal_ui.main_loop.set_alarm_in(0.01, lambda main_loop, user_data: next_step(index + 1))
+
+    terminal_ui.call_soon_threadsafe(next_step)
+    terminal_ui.run(redraw_period=0.01, headless=True)
+
+
+def create_terminal_ui(commands : list, shortcuts : list) -> TerminalUI:
+    terminal_ui = TerminalUI('Headless Test', lambda terminal_ui, command: commands.append(command))
+    terminal_ui.bind_key('ctrl r', lambda terminal_ui, key: shortcuts.append(key))
+    return terminal_ui
+
+
+### TESTS ###
+def test_headless_screen_text():
+    terminal_ui = TerminalUI('Headless Test', lambda terminal_ui, command: None)
+    run_script(terminal_ui, [lambda: terminal_ui.set_receive_text('hello world')])
+
+    screen = terminal_ui.get_screen_text()
+    assert len(screen) == 24 and all(len(row) == 80 for row in screen)
+    assert 'Headless Test' in screen[0]
+    assert any('hello world' in row for row in screen)
+
+
+def test_record_replay_round_trip(tmp_path):
+    path = str(tmp_path / 'session.jsonl.gz')
+    commands, shortcuts = [], []
+    terminal_ui = create_terminal_ui(commands, shortcuts)
+    terminal_ui.start_recording(path)
+    feed = lambda keys: (lambda: terminal_ui.main_loop.screen.feed_input(keys))
+    run_script(terminal_ui, [feed(['p', 'i', 'n', 'g', 'enter']), feed(['ctrl r']), lambda: terminal_ui.set_receive_text('reply', False), feed(['x'])])
+    recorded_screen = terminal_ui.get_screen_text()
+    assert commands == ['ping'] and shortcuts == ['ctrl r']
+
+    replayed_commands, replayed_shortcuts = [], []
+    replay_ui = create_terminal_ui(replayed_commands, replayed_shortcuts)
+    replayer = replay_ui.replay(path, speed=0)
+    replay_ui.run(redraw_period=0.01, headless=True)
+
+    assert replayer.elapsed is not None
+    assert replayed_commands == commands
+    assert replayed_shortcuts == shortcuts      # global bindings fire on replay, as keys go through the input filter
+    assert replay_ui.get_screen_text() == recorded_screen
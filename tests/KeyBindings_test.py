@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import urwid
+from TerminalUI import TerminalUI
+from TerminalUI.KeyBindings import KeyBindings
+
+
+### HELPER FUNCTIONS ###
+def run_keys(terminal_ui : TerminalUI, keys : list):
+    """Runs a TerminalUI headless, typing the keys then exiting."""
+
+    def type_keys():
+        terminal_ui.main_loop.screen.feed_input(keys)
+        terminal_ui.main_loop.set_alarm_in(0.01, lambda main_loop, user_data: terminal_ui.exit())
+
+    terminal_ui.call_soon_threadsafe(type_keys)
+    terminal_ui.run(redraw_period=0.01, headless=True)
+
+
+### TESTS ###
+def test_lookup_precedence():
+    command_map = urwid.CommandMap()
+    key_bindings = KeyBindings({urwid.CURSOR_UP: 'default up'}, {'enter': 'default enter'}, command_map)
+    assert key_bindings.get('up') == 'default up' and key_bindings.get('enter') == 'default enter'
+    assert key_bindings.get('x') is None and 'x' not in key_bindings
+
+    # command bindings follow changes to the command map
+    command_map['k'] = urwid.CURSOR_UP
+    assert key_bindings.get('k') == 'default up'
+
+    key_bindings.bind_command(urwid.CURSOR_UP, 'added up')
+    key_bindings.bind('k', 'added k')
+    assert key_bindings.get('up') == 'added up' and key_bindings.get('k') == 'added k'
+
+
+def test_unbind_restores_default():
+    key_bindings = KeyBindings(keys={'enter': 'default enter'})
+    key_bindings.bind('enter', 'added enter')
+    copied = key_bindings.copy()
+    assert key_bindings.unbind('enter')
+    assert key_bindings.get('enter') == 'default enter'
+    assert copied.get('enter') == 'added enter'
+
+    # with nothing added the default is removed, until the key is bound again
+    assert key_bindings.unbind('enter')
+    assert key_bindings.get('enter') is None and not key_bindings.unbind('enter')
+    key_bindings.bind('enter', 'added enter')
+    assert key_bindings.unbind('enter') and key_bindings.get('enter') == 'default enter'
+
+
+def test_unbind_key_restores_command_submission():
+    commands, shortcuts = [], []
+    terminal_ui = TerminalUI('Key Bindings Test', lambda terminal_ui, command: commands.append(command))
+    terminal_ui.bind_key('enter', lambda terminal_ui, key: shortcuts.append(key), target='command')
+    assert terminal_ui.unbind_key('enter', target='command')
+    assert terminal_ui.unbind_key('ctrl e')
+
+    run_keys(terminal_ui, ['p', 'i', 'n', 'g', 'enter', 'ctrl e'])
+    assert commands == ['ping'] and shortcuts == []
+    assert terminal_ui._export_thread is None
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import urwid
+import pytest
+from TerminalUI.Layout import Layout, default_layout
+
+
+### HELPER FUNCTIONS ###
+def create_panes() -> dict:
+    # every pane is a box widget, the options pane is the only selectable one
+    return {'receive': urwid.SolidFill('r'), 'plot': urwid.SolidFill('p'), 'status': urwid.SolidFill('s'), 'options': urwid.Filler(urwid.Edit())}
+
+
+def shown_widgets(container) -> list:
+    return [widget for widget, _ in container.contents]
+
+
+### TESTS ###
+def test_set_pane():
+    panes = create_panes()
+    layout = Layout(default_layout())
+    assert isinstance(layout.widget, urwid.SolidFill)
+    assert not layout.is_visible('receive') and layout.pane_size('receive', (100, 40)) is None
+
+    assert layout.set_pane('receive', panes['receive'])
+    assert not layout.set_pane('missing', panes['plot']) and not layout.has_pane('missing')
+    columns = layout.widget
+    assert isinstance(columns, urwid.Columns) and layout.is_visible('receive')
+    rows = shown_widgets(columns)[0]
+    assert shown_widgets(rows) == [panes['receive']]
+
+    # removing the only pane of a split hides the split
+    layout.set_pane('options', panes['options'])
+    layout.set_pane('receive', None)
+    assert shown_widgets(columns) == [panes['options']]
+    assert layout.widget is columns
+
+
+def test_set_visible():
+    panes = create_panes()
+    layout = Layout(default_layout(), panes)
+    columns = layout.widget
+    rows = shown_widgets(columns)[0]
+    assert shown_widgets(rows) == [panes['receive'], panes['plot'], panes['status']]
+
+    assert layout.set_visible('plot', False) and not layout.is_visible('plot')
+    assert shown_widgets(rows) == [panes['receive'], panes['status']]
+    assert layout.set_visible('plot', True)
+    assert shown_widgets(rows) == [panes['receive'], panes['plot'], panes['status']]
+    assert not layout.set_visible('missing', False)
+
+    for name in ('receive', 'plot', 'status'):
+        layout.set_visible(name, False)
+    assert shown_widgets(columns) == [panes['options']]
+    layout.set_visible('options', False)
+    assert isinstance(layout.widget, urwid.SolidFill)
+    layout.set_visible('status', True)
+    assert layout.widget is columns and shown_widgets(rows) == [panes['status']]
+
+
+def test_pane_size():
+    panes = create_panes()
+    layout = Layout(default_layout(0.3), panes)
+    layout.set_visible('status', False)
+    receive_cols, receive_rows = layout.pane_size('receive', (100, 40))
+    plot_cols, plot_rows = layout.pane_size('plot', (100, 40))
+    options_cols, options_rows = layout.pane_size('options', (100, 40))
+    assert (receive_cols, receive_rows, plot_rows) == (70, 24, 16)
+    assert plot_cols == receive_cols and (options_cols, options_rows) == (30, 40)
+
+    layout.set_weight('plot', 0.6)
+    assert layout.pane_size('plot', (100, 40)) == (70, 20)
+    with pytest.raises(RuntimeError):
+        layout.set_weight('plot', 0)
+    layout.set_visible('options', False)
+    assert layout.pane_size('receive', (100, 40)) == (100, 20)
+    assert layout.pane_size('options', (100, 40)) is None
+
+
+def test_focus_is_kept_when_a_pane_is_hidden():
+    panes = create_panes()
+    layout = Layout(default_layout(), panes)
+    columns = layout.widget
+    assert columns.focus is panes['options']
+
+    # hiding or showing another pane keeps the focus
+    layout.set_visible('receive', False)
+    layout.set_visible('plot', False)
+    assert columns.focus is panes['options']
+    layout.set_visible('receive', True)
+    assert columns.focus is panes['options']
+
+    # hiding the focused pane moves the focus to a shown pane
+    layout.set_visible('options', False)
+    assert columns.focus in shown_widgets(columns)
+    layout.set_visible('options', True)
+    assert panes['options'] in shown_widgets(columns)
+
+
+def test_spec_round_trip():
+    panes = create_panes()
+    layout = Layout(default_layout(0.25), panes)
+    layout.set_visible('plot', False)
+    layout.set_weight('status', 2)
+    spec = layout.to_spec()
+
+    copied = Layout(spec, panes)
+    assert copied.to_spec() == spec
+    assert not copied.is_visible('plot') and copied.is_visible('status')
+    assert copied.pane_size('status', (80, 30)) == layout.pane_size('status', (80, 30))
+    assert spec['children'][1] == {'pane': 'options', 'weight': 0.25, 'hidden': False}
+
+
+@pytest.mark.parametrize('spec', [{'pane': 'receive'}, {'split': 'grid'}, {'split': 'rows', 'children': [{'pane': 'a'}, {'pane': 'a'}]},
+                                  {'split': 'rows', 'children': [{'pane': 'a', 'weight': 0}]}, {'split': 'rows', 'pane': 'a'}])
+def test_invalid_spec(spec):
+    with pytest.raises(RuntimeError):
+        Layout(spec)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import pytest
+from TerminalUI.NumericFormats import NumericFormat, get_numeric_format
+
+
+### TESTS ###
+@pytest.mark.parametrize('name, digits, partial, rejected', [
+    ('int', None, ['', '-', '-12', '007'], ['1.5', '1-', '--1', 'a']),
+    ('float', None, ['', '-', '.', '-.5', '1.', '0.25'], ['1.2.3', '1e5', '1-']),
+    ('fixed', 2, ['-', '1.', '1.5', '-0.25'], ['1.255', '1.2.', 'x']),
+    ('fixed', 0, ['-', '12'], ['1.', '1.5']),
+    ('hex', None, ['', '0', '0x', '0X1f', 'ff'], ['-1', '0x0x1', 'g', '1x']),
+])
+def test_accepts(name, digits, partial, rejected):
+    number_format = get_numeric_format(name, digits)
+    assert all(number_format.accepts(text) for text in partial)
+    assert not any(number_format.accepts(text) for text in rejected)
+
+
+def test_parse_and_format():
+    assert get_numeric_format('int').parse('-12') == -12
+    assert get_numeric_format('int').parse('-') is None
+    assert get_numeric_format('float').parse('.5') == 0.5
+    assert get_numeric_format('float').parse('1.') == 1.0
+    assert get_numeric_format('float').parse('.') is None
+
+    fixed = get_numeric_format('fixed', 2)
+    assert fixed.parse('1.5') == 1.5 and fixed.format(1.5) == '1.50'
+    assert fixed.step == pytest.approx(0.01)
+    assert fixed.coerce(0.1 + 0.2) == 0.3      # rounded to the decimal places so steps do not accumulate error
+
+    hex_format = get_numeric_format('hex', 4)
+    assert hex_format.parse('0x1f') == 31 and hex_format.parse('FF') == 255 and hex_format.parse('0x') is None
+    assert hex_format.format(31) == '0x001F'
+    assert hex_format.coerce(-3) == 0
+
+
+def test_coerce_strings():
+    assert get_numeric_format('int').coerce(' 42 ') == 42
+    assert get_numeric_format('int').coerce(2.6) == 3
+    with pytest.raises(RuntimeError):
+        get_numeric_format('int').coerce('4.2')
+    with pytest.raises(RuntimeError):
+        get_numeric_format('hex').coerce('0xZZ')
+
+
+def test_formats_are_shared_and_validated():
+    assert get_numeric_format('fixed', 3) is get_numeric_format('fixed', 3)
+    assert get_numeric_format('fixed', 3) is not get_numeric_format('fixed', 2)
+    with pytest.raises(RuntimeError):
+        NumericFormat('octal')
+    with pytest.raises(RuntimeError):
+        NumericFormat('fixed', -1)
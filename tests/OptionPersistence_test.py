@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import sys
+import json
+import time
+import threading
+from TerminalUI import TerminalUI
+
+terminal_ui_module = sys.modules['TerminalUI.TerminalUI']
+
+
+### HELPER FUNCTIONS ###
+def create_terminal_ui() -> TerminalUI:
+    options = {'Settings': {'mode': (['a', 'b', 'c'], 'Mode', False), 'gain': ('1.5', 'Gain', False)}}
+    return TerminalUI('Option Persistence Test', lambda terminal_ui, command: None, options)
+
+
+### TESTS ###
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / 'options.json')
+    terminal_ui = create_terminal_ui()
+    terminal_ui.set_option('mode', 'c')
+    terminal_ui.save_options(path)
+
+    restored_ui = create_terminal_ui()
+    assert restored_ui.load_options(path) == ['mode', 'gain']
+    assert restored_ui.get_option('mode') == (True, 'c', 2)
+
+
+def test_autosave_writes_snapshots_in_order(tmp_path, monkeypatch):
+    path = str(tmp_path / 'autosave.json')
+    terminal_ui = create_terminal_ui()
+    terminal_ui.enable_autosave(path, delay=60)
+
+    # the first write is slow, so without serialising the writes the newer snapshot would be overwritten by the older one
+    atomic_write_json = terminal_ui_module._atomic_write_json
+    first_write_started = threading.Event()
+    def slow_write(write_path, data):
+        if not first_write_started.is_set():
+            first_write_started.set()
+            time.sleep(0.2)
+        atomic_write_json(write_path, data)
+    monkeypatch.setattr(terminal_ui_module, '_atomic_write_json', slow_write)
+
+    terminal_ui.set_option('mode', 'b')
+    flush_thread = threading.Thread(target=terminal_ui.flush_autosave)
+    flush_thread.start()
+    first_write_started.wait(1)
+    terminal_ui.set_option('mode', 'c')
+    terminal_ui.flush_autosave()
+    flush_thread.join()
+
+    with open(path, 'r', encoding='utf-8') as f:
+        assert json.load(f)['mode']['value'] == 'c'
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import json
+import pytest
+from TerminalUI import TerminalUI
+from TerminalUI.OptionSchema import OptionSchema, OptionSpec, OptionDependencies
+
+
+### HELPER FUNCTIONS ###
+class FakeOption():
+    """Stands in for a UserOption widget when evaluating conditions."""
+
+    def __init__(self, value, enabled : bool=True):
+        self.value = value
+        self.enabled = enabled
+
+    def get_value(self):
+        return self.value
+
+    def selectable(self) -> bool:
+        return self.enabled
+
+
+def option_record(name : str, value, enabled_when : dict=None) -> dict:
+    record = {'name': name, 'value': value}
+    if enabled_when is not None:
+        record['enabled_when'] = enabled_when
+    return record
+
+
+### TESTS ###
+def test_dependency_order_and_affected():
+    # diamond: mode -> (rate, gain) -> filter, plus a chain off rate
+    dependencies = OptionDependencies({'filter': {'rate': 'fast', 'gain': [1, 2]}, 'gain': {'mode': 'manual'},
+                                       'rate': {'mode': ['manual', 'auto']}, 'window': {'filter': 'on'}})
+    order = dependencies.order
+    assert sorted(order) == ['filter', 'gain', 'rate', 'window']
+    assert order.index('filter') > max(order.index('rate'), order.index('gain'))
+    assert order.index('window') > order.index('filter')
+
+    affected = dependencies.affected(['mode'])
+    assert sorted(affected) == ['filter', 'gain', 'rate', 'window']
+    assert affected.index('filter') > max(affected.index('rate'), affected.index('gain')) and affected[-1] == 'window'
+    assert dependencies.affected(['gain']) == ('filter', 'window')
+    assert dependencies.affected(['window']) == ()
+    assert dependencies.affected(['gain', 'window'], include_changed=True) == ('gain', 'filter', 'window')
+    assert 'filter' in dependencies and 'mode' not in dependencies and len(dependencies) == 4
+
+
+def test_is_enabled():
+    dependencies = OptionDependencies({'gain': {'mode': 'manual', 'enable': True}})
+    widgets = {'mode': FakeOption('manual'), 'enable': FakeOption(True)}
+    assert dependencies.is_enabled('gain', widgets)
+    widgets['enable'].enabled = False         # disabling an option disables those depending on it
+    assert not dependencies.is_enabled('gain', widgets)
+    widgets['enable'].enabled = True
+    widgets['mode'].value = 'auto'
+    assert not dependencies.is_enabled('gain', widgets)
+    assert not dependencies.is_enabled('gain', {'mode': FakeOption('manual')})
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(RuntimeError, match='cycle'):
+        OptionDependencies({'a': {'b': 1}, 'b': {'c': 1}, 'c': {'a': 1}})
+
+    dependencies = OptionDependencies({'b': {'a': 1}})
+    with pytest.raises(RuntimeError, match='cycle'):
+        dependencies.set_conditions('a', {'b': 1})
+    assert 'a' not in dependencies and dependencies.order == ('b',)
+    dependencies.set_conditions('b', None)
+    assert len(dependencies) == 0
+
+
+def test_copy_is_independent():
+    dependencies = OptionDependencies({'gain': {'mode': 'manual'}})
+    copied = dependencies.copy()
+    copied.set_conditions('rate', {'gain': 1})
+    assert copied.affected(['mode']) == ('gain', 'rate') and copied.affected(['gain']) == ('rate',)
+    assert dependencies.affected(['mode']) == ('gain',) and 'rate' not in dependencies
+
+
+def test_terminal_ui_reuses_the_compiled_graph():
+    schema = OptionSchema.from_dict({'Settings': {'mode': (['manual', 'auto'], 'Mode'), 'gain': (1, 'Gain')}})
+    schema.set_enabled_when('gain', {'mode': 'manual'})
+    compiled = schema.dependencies()
+    terminal_ui = TerminalUI('Schema Test', lambda terminal_ui, command: None, schema)
+    assert terminal_ui._option_dependencies is compiled
+
+    # options added at runtime change a copy, not the schema's graph
+    terminal_ui.add_option('Settings', 'rate', (2, 'Rate'))
+    terminal_ui.add_option('Settings', 'window', OptionSpec('window', 3, enabled_when={'gain': 1}))
+    assert terminal_ui._option_dependencies is not compiled and 'window' in terminal_ui._option_dependencies
+    assert schema.dependencies() is compiled and 'window' not in compiled
+
+
+def test_schema_validation():
+    with pytest.raises(RuntimeError, match='does not exist'):
+        OptionSchema.from_dict({'groups': [{'name': 'Main', 'options': [option_record('gain', 1.0, {'missing': True})]}]})
+    with pytest.raises(RuntimeError, match='itself'):
+        OptionSpec('gain', 1.0, enabled_when={'gain': 1.0})
+    with pytest.raises(RuntimeError, match='unique'):
+        OptionSchema.from_dict({'One': {'gain': ('1', 'Gain')}, 'Two': {'gain': ('2', 'Gain')}})
+
+    schema = OptionSchema.from_dict({'groups': [{'name': 'Main', 'options': [option_record('mode', ['manual', 'auto']), option_record('gain', 1.0, {'mode': 'manual'})]}]})
+    with pytest.raises(RuntimeError, match='cycle'):
+        schema.set_enabled_when('mode', {'gain': 1.0})
+    assert schema['mode'].enabled_when is None and schema.dependencies().order == ('gain',)
+
+
+def test_schema_round_trip(tmp_path):
+    schema = OptionSchema.from_dict({'Settings': ({'mode': (['a', 'b'], 'Mode', False), 'gain': (1.5, 'Gain', 0.5, [0, 10])}, False, True)})
+    assert len(schema) == 2 and schema['gain'].type == 'float' and schema['gain'].limits == [0, 10]
+    assert not schema.groups[0].show_title
+
+    path = tmp_path / 'options.json'
+    path.write_text(json.dumps(schema.to_dict()))
+    assert OptionSchema.from_json(str(path)).to_dict() == schema.to_dict()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import urwid
+import pytest
+from TerminalUI import TerminalUI
+from TerminalUI.CustomUrwidWidgets import UserOption
+from TerminalUI.OptionSchema import OptionSpec
+
+
+### HELPER FUNCTIONS ###
+def create_terminal_ui(options : dict=None) -> TerminalUI:
+    if options is None:
+        options = {'A': {'a1': 1, 'a2': (['x', 'y'], 'A2')}, 'C': {'c1': 'text'}}
+    return TerminalUI('Options Test', lambda terminal_ui, command: None, options)
+
+
+def walker_names(terminal_ui : TerminalUI) -> list:
+    """Describes the options list walker: the name of each option, the text of each title and '-' for each divider."""
+
+    names = []
+    for widget in terminal_ui._options_walker:
+        if isinstance(widget, UserOption):
+            names.append(widget.get_option_name())
+        elif isinstance(widget, urwid.Divider):
+            names.append('-')
+        else:
+            names.append(widget.get_text()[0])
+    return names
+
+
+def focused_widget(terminal_ui : TerminalUI):
+    return terminal_ui._options_walker.get_focus()[0]
+
+
+### TESTS ###
+def test_add_group_and_option_at_index():
+    terminal_ui = create_terminal_ui()
+    terminal_ui.add_group('B', {'b1': 5}, index=1)
+    terminal_ui.add_group('Z', [OptionSpec('z1', 'z')], show_title=False, divider_on=False, index=0)
+    terminal_ui.add_option('C', 'c0', 2.5, index=0)
+    terminal_ui.add_option('A', 'a3', 3)
+    terminal_ui.add_group('D')
+    assert walker_names(terminal_ui) == ['OPTIONS', '-', 'z1', 'A', 'a1', 'a2', 'a3', '-', 'B', 'b1', '-', 'C', 'c0', 'c1', '-', 'D', '-']
+    assert terminal_ui.get_option('c0') == (True, 2.5, None)
+
+    with pytest.raises(RuntimeError):
+        terminal_ui.add_group('B')
+    with pytest.raises(RuntimeError):
+        terminal_ui.add_option('B', 'a1', 1)
+    with pytest.raises(RuntimeError):
+        terminal_ui.add_option('missing', 'm1', 1)
+    assert len(terminal_ui._options_walker) == 17
+
+
+def test_remove_group_and_option():
+    terminal_ui = create_terminal_ui()
+    terminal_ui.add_group('B', {'b1': 5, 'b2': 6}, index=1)
+    assert terminal_ui.remove_option('a2') and terminal_ui.remove_option('b1')
+    assert terminal_ui.remove_group('A')
+    assert not terminal_ui.remove_group('A') and not terminal_ui.remove_option('a1')
+    assert terminal_ui.get_option('a1') == (False, None, None)
+    assert walker_names(terminal_ui) == ['OPTIONS', '-', 'B', 'b2', '-', 'C', 'c1', '-']
+
+    # the positions of the remaining groups follow the removals
+    terminal_ui.add_option('C', 'c2', 2)
+    terminal_ui.add_group('A', {'a1': 1}, index=1)
+    assert walker_names(terminal_ui) == ['OPTIONS', '-', 'B', 'b2', '-', 'A', 'a1', '-', 'C', 'c1', 'c2', '-']
+
+
+def test_focus_is_kept_on_the_same_option():
+    terminal_ui = create_terminal_ui()
+    c1 = terminal_ui._option_index['c1']
+    terminal_ui._options_walker.set_focus(walker_names(terminal_ui).index('c1'))
+
+    terminal_ui.add_group('B', {'b1': 5}, index=0)
+    terminal_ui.add_option('C', 'c0', 0, index=0)
+    terminal_ui.add_option('C', 'c2', 2)
+    assert focused_widget(terminal_ui) is c1
+    assert terminal_ui.remove_group('A') and terminal_ui.remove_option('c0')
+    assert focused_widget(terminal_ui) is c1
+
+    # removing the focused option moves the focus to the option after it
+    assert terminal_ui.remove_option('c1')
+    assert focused_widget(terminal_ui) is terminal_ui._option_index['c2']
+
+
+def test_rejected_group_leaves_no_options_area():
+    terminal_ui = TerminalUI('Options Test', lambda terminal_ui, command: None)
+    cycle = [OptionSpec('x', 1, enabled_when={'y': 1}), OptionSpec('y', 1, enabled_when={'x': 1})]
+    with pytest.raises(RuntimeError):
+        terminal_ui.add_group('G', cycle)
+    with pytest.raises(RuntimeError):
+        terminal_ui.add_group('G', [OptionSpec('x', 1), OptionSpec('x', 2)])
+    assert terminal_ui.options_area is None
+
+    terminal_ui.add_group('G', {'x': 1})
+    assert terminal_ui.options_area is not None
+    assert walker_names(terminal_ui) == ['OPTIONS', '-', 'G', 'x', '-']
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import os
+import sys
+import subprocess
+import pytest
+
+
+### HELPER FUNCTIONS ###
+def run_python(code : str) -> str:
+    """Runs code in a new interpreter, so the package is imported from scratch, and returns its output."""
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (root, os.environ.get('PYTHONPATH')))))
+    return subprocess.run([sys.executable, '-c', code], env=env, stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout.strip()
+
+
+### TESTS ###
+def test_import_is_lazy():
+    assert run_python("import sys, TerminalUI; print('urwid' in sys.modules)") == 'False'
+
+
+@pytest.mark.parametrize('first_import', ['', 'from TerminalUI.Sessions import SessionManager', 'from TerminalUI import SessionManager',
+                                          'from TerminalUI import TerminalUI'])
+def test_terminal_ui_name_is_the_class(first_import):
+    assert run_python('%s\nfrom TerminalUI import TerminalUI\nprint(isinstance(TerminalUI, type))'%(first_import)) == 'True'
+
+
+@pytest.mark.parametrize('first_import', ['', 'from TerminalUI import TerminalUI', 'from TerminalUI import SharedRingSource'])
+def test_submodule_imports_give_the_submodule(first_import):
+    code = '%s\nimport TerminalUI.ReceiveBuffer as m\nimport TerminalUI.SharedRing\nfrom TerminalUI import Layout\n'%(first_import)
+    code += 'print(m.export_history.__name__, TerminalUI.SharedRing.SharedRingSource.__name__, Layout.default_layout.__name__)'
+    assert run_python(code) == 'export_history SharedRingSource default_layout'
+
+
+def test_submodule_attributes_can_be_patched():
+    code = 'from unittest import mock\nfrom TerminalUI import TerminalUI\nimport TerminalUI.ReceiveBuffer\n'
+    code += "with mock.patch('TerminalUI.ReceiveBuffer.time') as patched:\n    print(TerminalUI.ReceiveBuffer.time is patched)"
+    assert run_python(code) == 'True'
+
+
+def test_star_import():
+    code = 'from TerminalUI import *\nprint(isinstance(TerminalUI, type), ReceiveBuffer.ReceiveBuffer.__name__, PtySource.__name__)'
+    assert run_python(code) == 'True ReceiveBuffer PtySource'
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import array
+import pytest
+from TerminalUI.Plotting import SeriesBuffer, PlotPane
+
+
+### HELPER FUNCTIONS ###
+def render_text(plot_pane : PlotPane, size : tuple) -> list:
+    return [row.decode('utf-8') for row in plot_pane.render(size).text]
+
+
+### TESTS ###
+def test_decimate():
+    series = SeriesBuffer(capacity=8)
+    series.extend(range(12))
+    assert series.decimate(4) == [(4.0, 5.0), (6.0, 7.0), (8.0, 9.0), (10.0, 11.0)]
+    series.extend([20])
+    assert series.decimate(4) == [(6.0, 7.0), (8.0, 9.0), (10.0, 11.0), (20.0, 20.0)]
+    assert series.last() == 20
+
+
+def test_non_finite_samples_are_discarded():
+    series = SeriesBuffer(capacity=8)
+    series.extend([1.0, float('nan'), 2.0, float('inf')])
+    series.extend(array.array('d', [float('-inf'), 3.0]))
+    assert series.total == 3
+    assert series.decimate(8) == [(1.0, 1.0), (2.0, 2.0), (3.0, 3.0)]
+
+
+@pytest.mark.parametrize('style', PlotPane.STYLES)
+def test_render_with_non_finite_samples(style):
+    plot_pane = PlotPane(['finite', 'non finite'], style)
+    plot_pane.add_samples('finite', [0, 1, 2, 3])
+    plot_pane.add_samples('non finite', [float('inf'), float('nan'), float('-inf')])
+    rows = render_text(plot_pane, (40, 6))
+    assert rows[0].startswith('finite  last 3  min 0  max 3')
+    assert rows[3].strip() == 'non finite'
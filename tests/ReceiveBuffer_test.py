@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import os
+import csv
+import json
+import stat
+import time
+import array
+import threading
+import pytest
+from TerminalUI import TerminalUI
+from TerminalUI.ReceiveBuffer import ReceiveBuffer, export_history, atomic_open
+
+
+### HELPER FUNCTIONS ###
+def numbered_lines(start : int, stop : int) -> list:
+    return ['line %d'%(number) for number in range(start, stop)]
+
+
+def file_mode(path : str) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def open_fd_count() -> int:
+    return len(os.listdir('/proc/self/fd'))
+
+
+def timed_buffer(times : list, history_size : int=10) -> ReceiveBuffer:
+    """Returns a ReceiveBuffer holding a line for each of the monotonic times, with a wall clock offset of 1000 seconds."""
+
+    receive_buffer = ReceiveBuffer(history_size)
+    receive_buffer.push(numbered_lines(0, len(times)))
+    receive_buffer.drain()
+    receive_buffer._times[:] = array.array('d', times)
+    receive_buffer._wall_clock_offset = 1000.0
+    return receive_buffer
+
+
+def drained_lines(receive_buffer : ReceiveBuffer) -> list:
+    receive_buffer.drain()
+    return receive_buffer.tail(receive_buffer.history_size)
+
+
+### TESTS ###
+def test_drop_oldest_policy():
+    receive_buffer = ReceiveBuffer(policy='drop_oldest', high_water=4)
+    receive_buffer.push(numbered_lines(0, 3))
+    receive_buffer.push(numbered_lines(3, 6))
+    assert drained_lines(receive_buffer) == numbered_lines(2, 6)
+    assert receive_buffer.dropped == 2
+
+    # more lines than the high water mark in one push keeps only the newest
+    receive_buffer.push(numbered_lines(6, 16), clear=True)
+    assert drained_lines(receive_buffer) == numbered_lines(12, 16)
+    assert receive_buffer.dropped == 8
+
+
+def test_drop_newest_policy():
+    receive_buffer = ReceiveBuffer(policy='drop_newest', high_water=4)
+    receive_buffer.push(numbered_lines(0, 3))
+    receive_buffer.push(numbered_lines(3, 6))
+    receive_buffer.push(numbered_lines(6, 8))
+    assert drained_lines(receive_buffer) == numbered_lines(0, 4)
+    assert receive_buffer.dropped == 4
+
+
+def test_sample_policy():
+    receive_buffer = ReceiveBuffer(policy='sample', high_water=2, sample_n=3)
+    receive_buffer.push(numbered_lines(0, 10))
+    assert drained_lines(receive_buffer) == ['line 0', 'line 1', 'line 2', 'line 5', 'line 8']
+    assert receive_buffer.dropped == 5
+
+    # the sampling phase carries over between pushes
+    receive_buffer.push(numbered_lines(10, 12))
+    receive_buffer.push(numbered_lines(12, 16))
+    receive_buffer.drain()
+    assert receive_buffer.tail(3) == ['line 10', 'line 11', 'line 13']
+
+
+def test_block_policy_waits_for_drain():
+    receive_buffer = ReceiveBuffer(policy='block', high_water=2)
+    receive_buffer.push(numbered_lines(0, 2))
+    producer = threading.Thread(target=receive_buffer.push, args=(numbered_lines(2, 4),))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive() and receive_buffer.is_full()
+
+    receive_buffer.drain()
+    producer.join(1)
+    assert not producer.is_alive()
+    assert drained_lines(receive_buffer) == numbered_lines(0, 4)
+    assert receive_buffer.dropped == 0
+
+    # the draining thread is never blocked
+    receive_buffer.push(numbered_lines(4, 8), can_block=False)
+    assert drained_lines(receive_buffer) == numbered_lines(0, 8)
+
+
+def test_history_is_trimmed():
+    receive_buffer = ReceiveBuffer(history_size=3)
+    for start in range(0, 10, 2):
+        receive_buffer.push(numbered_lines(start, start + 2))
+        receive_buffer.drain()
+    assert len(receive_buffer) == 3
+    assert receive_buffer.tail(5) == numbered_lines(7, 10)
+    assert receive_buffer.tail(5, 'delta')[0].startswith('+0.000000 ')
+
+
+def test_set_policy_validation():
+    receive_buffer = ReceiveBuffer()
+    with pytest.raises(RuntimeError):
+        receive_buffer.set_policy('unknown')
+    with pytest.raises(RuntimeError):
+        receive_buffer.set_policy('sample', sample_n=0)
+
+
+def test_export_formats(tmp_path):
+    receive_buffer = ReceiveBuffer()
+    receive_buffer.push(['first', 'second, with a comma'])
+    receive_buffer.drain()
+    lines, times, wall_clock_offset = receive_buffer.snapshot()
+    progress = []
+
+    export_history(str(tmp_path / 'history.txt'), lines, times, wall_clock_offset, 'text', lambda written, total: progress.append((written, total)), chunk_size=1)
+    with open(str(tmp_path / 'history.txt'), 'r', encoding='utf-8') as f:
+        text_lines = f.read().splitlines()
+    assert [line.split(' ', 2)[2] for line in text_lines] == lines
+    assert progress == [(1, 2), (2, 2)]
+
+    export_history(str(tmp_path / 'history.jsonl'), lines, times, wall_clock_offset, 'jsonl')
+    with open(str(tmp_path / 'history.jsonl'), 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [record['line'] for record in records] == lines
+    assert records[0]['time'] == pytest.approx(times[0] + wall_clock_offset)
+
+    export_history(str(tmp_path / 'history.csv'), lines, times, wall_clock_offset, 'csv')
+    with open(str(tmp_path / 'history.csv'), 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['time', 'line'] and [row[1] for row in rows[1:]] == lines
+
+    with pytest.raises(RuntimeError):
+        export_history(str(tmp_path / 'history.xml'), lines, times, wall_clock_offset, 'xml')
+    assert sorted(os.listdir(str(tmp_path))) == ['history.csv', 'history.jsonl', 'history.txt']
+
+
+def test_export_file_mode(tmp_path):
+    path = str(tmp_path / 'history.txt')
+    umask = os.umask(0o022)
+    try:
+        export_history(path, ['line'], [0.0], 0.0)
+    finally:
+        os.umask(umask)
+    assert file_mode(path) == 0o644
+
+    # replacing a file keeps its permissions
+    os.chmod(path, 0o600)
+    export_history(path, ['line'], [0.0], 0.0)
+    assert file_mode(path) == 0o600
+
+
+def test_export_failure_leaves_no_file(tmp_path):
+    def fail(written, total):
+        raise OSError('disk full')
+
+    path = str(tmp_path / 'history.txt')
+    with pytest.raises(OSError):
+        export_history(path, ['line'], [0.0], 0.0, progress_callback=fail)
+    assert os.listdir(str(tmp_path)) == []
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='needs /proc/self/fd')
+def test_atomic_open_failure_closes_file(tmp_path):
+    path = str(tmp_path / 'history.txt')
+    fd_count = open_fd_count()
+    with pytest.raises(ValueError):
+        with atomic_open(path, 'wq'):
+            pass
+    with pytest.raises(LookupError):
+        with atomic_open(path, encoding='no such encoding'):
+            pass
+    assert open_fd_count() == fd_count and os.listdir(str(tmp_path)) == []
+
+
+def test_export_reports_completion(tmp_path):
+    path = str(tmp_path / 'history.txt')
+    terminal_ui = TerminalUI('Export Test', lambda terminal_ui, command: None, receive_history_size=25000)
+    terminal_ui.append_receive_lines(numbered_lines(0, 25000))
+
+    def export(main_loop, user_data):
+        # the lines are added to the history on the first redraw
+        assert terminal_ui.export_receive_history(path)
+        terminal_ui._export_thread.join()
+        main_loop.set_alarm_in(0.05, lambda main_loop, user_data: terminal_ui.exit())
+
+    terminal_ui.call_soon_threadsafe(lambda: terminal_ui.main_loop.set_alarm_in(0.01, export))
+    terminal_ui.run(redraw_period=0.01, headless=True)
+    assert terminal_ui.command_txt.get_text()[0] == ' Exported 25000 lines to %s'%(path)
+    with open(path) as f:
+        assert sum(1 for line in f) == 25000
+
+
+def test_tail_absolute_timestamps():
+    assert ReceiveBuffer().tail(5, 'absolute') == []
+    receive_buffer = timed_buffer([1.5, 2.25, 62.0])
+    expected = ['%s.%03d line %d'%(time.strftime('%H:%M:%S', time.localtime(t)), milliseconds, number)
+                for number, (t, milliseconds) in enumerate([(1001.5, 500), (1002.25, 250), (1062.0, 0)])]
+    assert receive_buffer.tail(5, 'absolute') == expected
+    assert receive_buffer.tail(1, 'absolute') == expected[-1:]
+    assert receive_buffer.tail(5) == numbered_lines(0, 3)
+
+
+def test_tail_delta_timestamps():
+    assert ReceiveBuffer().tail(5, 'delta') == []
+    receive_buffer = timed_buffer([1.0, 1.5, 3.75])
+    assert receive_buffer.tail(5, 'delta') == ['+0.000000 line 0', '+0.500000 line 1', '+2.250000 line 2']
+
+    # a line part way through the history shows the time since the line before it
+    assert receive_buffer.tail(1, 'delta') == ['+2.250000 line 2']
+
+    # the first retained line shows 0, even if an older line has not been trimmed yet
+    receive_buffer = timed_buffer([1.0, 1.5, 3.75], history_size=2)
+    assert receive_buffer.tail(5, 'delta') == ['+0.000000 line 1', '+2.250000 line 2']
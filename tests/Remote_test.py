@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import os
+import stat
+import socket
+import pytest
+from TerminalUI.Remote import RemoteServer
+
+
+### TESTS ###
+def test_unix_socket_permissions(tmp_path):
+    path = str(tmp_path / 'session.sock')
+    umask = os.umask(0o002)
+    try:
+        server = RemoteServer(path)
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    server.close()
+    assert not os.path.exists(path)
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    path = str(tmp_path / 'session.sock')
+    stale_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale_socket.bind(path)
+    stale_socket.close()
+
+    server = RemoteServer(path)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    client.close()
+    server.close()
+
+
+def test_existing_file_is_not_removed(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_text('keep me')
+    with pytest.raises(RuntimeError):
+        RemoteServer(str(path))
+    assert path.read_text() == 'keep me'
+
+
+def test_second_server_does_not_take_over_a_running_one(tmp_path):
+    path = str(tmp_path / 'session.sock')
+    server = RemoteServer(path)
+    with pytest.raises(RuntimeError):
+        RemoteServer(path)
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    client.close()
+    server.close()
+    assert not os.path.exists(path)
+
+
+def test_close_leaves_a_later_servers_socket(tmp_path):
+    path = str(tmp_path / 'session.sock')
+    first_server = RemoteServer(path)
+    os.unlink(path)
+    second_server = RemoteServer(path)
+
+    first_server.close()
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    client.close()
+    second_server.close()
+    assert not os.path.exists(path)
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import pytest
+from TerminalUI import TerminalUI
+from TerminalUI.Rendering import CustomMainLoop
+
+
+### TESTS ###
+def test_skip_unchanged_render_mode():
+    terminal_ui = TerminalUI('Rendering Test', lambda terminal_ui, command: None)
+    stats = {}
+
+    def idle(main_loop=None, user_data=None):
+        stats['idle'] = terminal_ui.get_frame_stats()
+        terminal_ui.set_receive_text('changed')
+        terminal_ui.main_loop.set_alarm_in(0.05, changed)
+
+    def changed(main_loop, user_data):
+        stats['changed'] = terminal_ui.get_frame_stats()
+        terminal_ui.exit()
+
+    terminal_ui.call_soon_threadsafe(lambda: terminal_ui.main_loop.set_alarm_in(0.1, idle))
+    terminal_ui.run(redraw_period=0.01, headless=True, render_mode='skip_unchanged')
+
+    assert stats['idle']['skipped_frames'] > 0
+    assert stats['changed']['frames'] > stats['idle']['frames']
+    assert any('changed' in row for row in terminal_ui.get_screen_text())
+
+
+def test_unknown_render_mode():
+    with pytest.raises(RuntimeError):
+        CustomMainLoop(None, render_mode='diff')
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import pytest
+from TerminalUI import TerminalUI
+from TerminalUI.Sessions import SessionManager
+
+
+### HELPER FUNCTIONS ###
+def run_script(session_manager : SessionManager, steps : list):
+    """Runs a SessionManager headless, calling each step on the main loop in turn then exiting."""
+
+    def next_step(index=0):
+        if index == len(steps):
+            session_manager.exit()
+        steps[index]()
+        session_manager.main_loop.set_alarm_in(0.01, lambda main_loop, user_data: next_step(index + 1))
+
+    session_manager.active.call_soon_threadsafe(next_step)
+    session_manager.run(redraw_period=0.01, headless=True)
+
+
+def create_session_manager(names : list) -> SessionManager:
+    sessions = {name: TerminalUI('Session %s'%(name), lambda terminal_ui, command: None) for name in names}
+    for name, terminal_ui in sessions.items():
+        terminal_ui.append_receive_lines(['%s line'%(name)])
+    return SessionManager(sessions)
+
+
+def shown_title(session_manager : SessionManager) -> str:
+    return session_manager.active.get_screen_text()[0].strip()
+
+
+def count_calls(terminal_ui : TerminalUI, method_name : str, calls : list):
+    """Replaces a method of a TerminalUI with one that records each call by name before calling it."""
+
+    method = getattr(terminal_ui, method_name)
+    setattr(terminal_ui, method_name, lambda *args, **kwargs: (calls.append(method_name), method(*args, **kwargs))[1])
+
+
+### TESTS ###
+def test_switching_sessions():
+    session_manager = create_session_manager(['one', 'two', 'three'])
+    titles = []
+    feed = lambda keys: (lambda: session_manager.main_loop.screen.feed_input(keys))
+    record = lambda: titles.append((session_manager.active_name, shown_title(session_manager)))
+    run_script(session_manager, [lambda: None, record, feed(['ctrl right']), record, feed(['ctrl left', 'ctrl left']), record,
+                                 feed(['meta 2']), record, feed(['meta 9']), record, lambda: session_manager.set_active('one'), record])
+
+    assert titles == [('one', 'Session one'), ('two', 'Session two'), ('three', 'Session three'),
+                      ('two', 'Session two'), ('two', 'Session two'), ('one', 'Session one')]
+    with pytest.raises(RuntimeError):
+        session_manager.set_active('missing')
+
+
+def test_hidden_sessions_do_no_draw_work():
+    session_manager = create_session_manager(['shown', 'hidden'])
+    hidden = session_manager.get_session('hidden')
+    calls = []
+    for method_name in ('_resize_receive_area', '_update_receive_text'):
+        count_calls(hidden, method_name, calls)
+    renders = []
+    render = hidden.main_frame.render
+    hidden.main_frame.render = lambda size, focus=False: (renders.append(size), render(size, focus))[1]
+
+    screens = []
+    run_script(session_manager, [lambda: hidden.append_receive_lines(['hidden %d'%(number) for number in range(50)]), lambda: None,
+                                 lambda: screens.append(list(calls)), lambda: session_manager.set_active('hidden'), lambda: None,
+                                 lambda: screens.append(session_manager.active.get_screen_text())])
+
+    # while hidden the lines are kept but never laid out or drawn
+    assert screens[0] == [] and len(hidden._receive_buffer) == 51
+    assert any('hidden 49' in row for row in screens[1])
+    assert renders and '_resize_receive_area' in calls
+
+
+def test_remove_sessions():
+    session_manager = create_session_manager(['one', 'two', 'three'])
+    removed = {}
+
+    def remove(name):
+        removed[name] = session_manager.remove_session(name)
+
+    titles = []
+    # the first session's queued calls are made before the later sessions apply their updates
+    run_script(session_manager, [lambda: None, lambda: session_manager.active.call_soon_threadsafe(remove, 'three'), lambda: titles.append(shown_title(session_manager)),
+                                 lambda: remove('one'), lambda: None, lambda: titles.append(shown_title(session_manager))])
+
+    # removing a background session leaves the shown one, removing the shown one shows the next
+    assert titles == ['Session one', 'Session two']
+    assert session_manager.get_session_names() == ['two'] and session_manager.active_name == 'two'
+    assert all(terminal_ui.main_loop is None and terminal_ui._wakeup_fd is None for terminal_ui in removed.values())
+    assert all(terminal_ui._rendering for terminal_ui in removed.values())
+
+    with pytest.raises(RuntimeError):
+        session_manager.remove_session('one')
+    session_manager.main_loop = session_manager.active.main_loop
+    with pytest.raises(RuntimeError):
+        session_manager.remove_session('two')
+    session_manager.main_loop = None
+    assert session_manager.remove_session('two') is not None and len(session_manager) == 0
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import os
+import sys
+import subprocess
+import pytest
+from TerminalUI.SharedRing import SharedRing
+
+
+### HELPER FUNCTIONS ###
+def read_ring(ring : SharedRing) -> bytes:
+    views = ring.peek()
+    data = b''.join(bytes(view) for view in views)
+    for view in views:
+        view.release()
+    ring.consume(len(data))
+    return data
+
+
+### TESTS ###
+def test_write_wraps_around():
+    ring = SharedRing(size=16)
+    try:
+        for number in range(20):
+            data = b'line %02d\n'%(number)
+            assert ring.write(data, block=False)
+            if number % 2:
+                assert len(ring.peek()) in (1, 2)
+                assert read_ring(ring) == b'line %02d\nline %02d\n'%(number - 1, number)
+
+        # a write that does not fit is dropped whole
+        assert ring.write(b'0123456789', block=False)
+        assert not ring.write(b'0123456789', block=False)
+        assert ring.dropped == 10
+        assert read_ring(ring) == b'0123456789'
+        with pytest.raises(RuntimeError):
+            ring.write(bytes(17))
+    finally:
+        ring.close()
+
+
+def test_attach_by_name():
+    ring = SharedRing(size=64)
+    worker_ring = SharedRing(ring.name)
+    try:
+        assert worker_ring.capacity == 64
+        worker_ring.write_lines(['first', 'second'])
+        worker_ring.set_eof()
+        assert ring.eof and read_ring(ring) == b'first\nsecond\n'
+    finally:
+        worker_ring.close()
+        ring.close()
+
+
+def test_worker_exit_keeps_ring():
+    ring = SharedRing(size=64)
+    try:
+        # stderr is only closed once the worker's resource tracker has exited, so any cleanup it does has happened by the time run returns
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = 'from TerminalUI.SharedRing import SharedRing\nring = SharedRing(%r)\nring.write_lines(["from worker"])\nring.close()'%(ring.name)
+        worker = subprocess.run([sys.executable, '-c', code], cwd=root, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        assert 'leaked' not in worker.stderr
+
+        SharedRing(ring.name).close()   # still attachable, so not destroyed when the worker exited
+        assert read_ring(ring) == b'from worker\n'
+    finally:
+        ring.close()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+from TerminalUI.StatusTable import StatusTable
+
+
+### HELPER FUNCTIONS ###
+def render_rows(status_table : StatusTable, size=(20, 3)) -> list:
+    return [row.decode().rstrip() for row in status_table.render(size).text]
+
+
+def create_status_table(rows : int) -> StatusTable:
+    status_table = StatusTable()
+    status_table.update({'ch%d'%(number): number for number in range(rows)})
+    status_table.refresh()
+    return status_table
+
+
+### TESTS ###
+def test_values_are_updated_in_place():
+    status_table = create_status_table(3)
+    status_table.update({'ch1': 10})
+    status_table.update({'ch1': 11, 'new': 'x'})
+    assert status_table.get_value('ch1') == '1'
+    assert status_table.refresh() and not status_table.refresh()
+    assert status_table.get_value('ch1') == '11' and status_table.get_value('missing') is None
+    assert len(status_table) == 4
+    assert render_rows(status_table, (20, 5)) == ['ch0 :  0', 'ch1 : 11', 'ch2 :  2', 'new :  x', '']
+
+    assert status_table.remove('ch1') and not status_table.remove('ch1')
+    assert render_rows(status_table, (20, 3)) == ['ch0 : 0', 'ch2 : 2', 'new : x']
+
+
+def test_only_changed_rows_are_rendered():
+    status_table = create_status_table(3)
+    render_rows(status_table)
+    canvases = dict(status_table._row_canvases)
+
+    # an unchanged value does not redraw, a changed one only drops its own row
+    status_table.update({'ch0': 0})
+    assert not status_table.refresh()
+    status_table.update({'ch1': 5})
+    assert status_table.refresh()
+    assert render_rows(status_table) == ['ch0 : 0', 'ch1 : 5', 'ch2 : 2']
+    assert status_table._row_canvases[0] is canvases[0] and status_table._row_canvases[2] is canvases[2]
+    assert status_table._row_canvases[1] is not canvases[1]
+
+
+def test_column_widths_are_cached():
+    status_table = create_status_table(2)
+    status_table.update({'ch0': 100})
+    status_table.refresh()
+    render_rows(status_table)
+    canvases = dict(status_table._row_canvases)
+
+    # the value column keeps its width when the widest value gets shorter
+    status_table.update({'ch0': 7})
+    status_table.refresh()
+    assert render_rows(status_table) == ['ch0 :   7', 'ch1 :   1', '']
+    assert status_table._row_canvases[1] is canvases[1]
+
+    # a wider value redraws every row
+    status_table.update({'ch1': 1000})
+    status_table.refresh()
+    assert render_rows(status_table) == ['ch0 :    7', 'ch1 : 1000', '']
+    assert status_table._row_canvases[0] is not canvases[0]
+
+    # removing a row works the widths out again
+    status_table.remove('ch1')
+    assert render_rows(status_table) == ['ch0 : 7', '', '']
+
+
+def test_scrolling_past_the_visible_rows():
+    status_table = create_status_table(10)
+    size = (20, 3)
+    assert render_rows(status_table, size) == ['ch0 : 0', 'ch1 : 1', 'ch2 : 2']
+
+    # rows that are not visible do not redraw the table
+    status_table.update({'ch8': 'x'})
+    assert not status_table.refresh()
+
+    assert status_table.keypress(size, 'down') is None
+    assert render_rows(status_table, size) == ['ch1 : 1', 'ch2 : 2', 'ch3 : 3']
+    assert status_table.keypress(size, 'end') is None
+    assert render_rows(status_table, size) == ['ch7 : 7', 'ch8 : x', 'ch9 : 9']
+    assert status_table.keypress(size, 'down') == 'down'
+    status_table.update({'ch8': 'y'})
+    assert status_table.refresh()
+
+    assert status_table.keypress(size, 'page up') is None
+    assert render_rows(status_table, size) == ['ch4 : 4', 'ch5 : 5', 'ch6 : 6']
+    assert status_table.keypress(size, 'home') is None
+    assert status_table.keypress(size, 'up') == 'up'
+    assert status_table.keypress(size, 'x') == 'x'
+    assert render_rows(status_table, size)[0] == 'ch0 : 0'
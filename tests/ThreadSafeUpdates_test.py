@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+### IMPORT MODULES ###
+import time
+import threading
+import pytest
+from TerminalUI import TerminalUI
+
+
+### HELPER FUNCTIONS ###
+def run_script(terminal_ui : TerminalUI, steps : list):
+    """Runs a TerminalUI headless, calling each step on the main loop in turn then exiting."""
+
+    def next_step(index=0):
+        if index == len(steps):
+            terminal_ui.exit()
+        steps[index]()
+        terminal_ui.main_loop.set_alarm_in(0.01, lambda main_loop, user_data: next_step(index + 1))
+
+    terminal_ui.call_soon_threadsafe(next_step)
+    terminal_ui.run(redraw_period=0.01, headless=True)
+
+
+def create_terminal_ui() -> TerminalUI:
+    return TerminalUI('Thread Test', lambda terminal_ui, command: None, {'Settings': {'mode': (['a', 'b', 'c'], 'Mode', False)}})
+
+
+def command_text(terminal_ui : TerminalUI) -> str:
+    return terminal_ui.command_txt.get_text()[0]
+
+
+### TESTS ###
+def test_calls_from_another_thread_are_queued():
+    terminal_ui = create_terminal_ui()
+    results = []
+
+    def worker():
+        results.append(terminal_ui.set_option_list('mode', ['x', 'y'], 1))
+        results.append(terminal_ui.get_option('mode'))
+        terminal_ui.set_command_debug_text('first')
+        terminal_ui.set_command_debug_text(' second', clear=False)
+
+    def start_worker():
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    run_script(terminal_ui, [start_worker, lambda: None])
+    assert results == [None, (True, 'a', 0)]
+    assert terminal_ui.get_option('mode') == (True, 'y', 1)
+    assert command_text(terminal_ui) == 'first second'
+
+    # on the main loop the methods run straight away and return their result
+    assert terminal_ui.set_option_list('mode', ['z']) is True
+
+
+def test_wakeup_pipe_applies_calls_before_the_redraw_period():
+    terminal_ui = create_terminal_ui()
+
+    def worker():
+        time.sleep(0.05)
+        terminal_ui.call_soon_threadsafe(terminal_ui.exit)
+
+    terminal_ui.call_soon_threadsafe(lambda: threading.Thread(target=worker, daemon=True).start())
+    start = time.monotonic()
+    terminal_ui.run(redraw_period=30, headless=True)
+    assert time.monotonic() - start < 5
+
+
+def test_nested_batches_are_queued_together():
+    terminal_ui = create_terminal_ui()
+    pending = []
+
+    def update():
+        text = command_text(terminal_ui)
+        with terminal_ui.batch():
+            terminal_ui.set_command_debug_text('outer')
+            with terminal_ui.batch():
+                terminal_ui.set_command_debug_text(' inner', clear=False)
+            pending.append(len(terminal_ui._pending_calls))
+            terminal_ui.enable_option('mode', False)
+            pending.append(command_text(terminal_ui) == text)
+        pending.append(len(terminal_ui._pending_calls))
+
+    run_script(terminal_ui, [update, lambda: None])
+    assert pending == [0, True, 1]
+    assert command_text(terminal_ui) == 'outer inner'
+    assert not terminal_ui._option_index['mode']._enabled
+
+
+def test_exception_in_batch_discards_its_changes():
+    terminal_ui = create_terminal_ui()
+
+    def update():
+        with pytest.raises(ValueError):
+            with terminal_ui.batch():
+                terminal_ui.set_command_debug_text('discarded')
+                raise ValueError('failed')
+        with terminal_ui.batch():
+            terminal_ui.set_command_debug_text(' kept', clear=False)
+
+    terminal_ui.set_command_debug_text('start')
+    run_script(terminal_ui, [update, lambda: None])
+    assert command_text(terminal_ui) == 'start kept'